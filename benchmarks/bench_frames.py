@@ -0,0 +1,92 @@
+"""Validate frames of a render layer of 100,000 frames
+
+Compares the range arithmetic of :mod:`pyblish_magenta.sequence`
+with sets of frames, one per file, on a layer of 10 passes.
+
+Usage:
+    $ python benchmarks/bench_frames.py [frames]
+
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pyblish_magenta import sequence
+
+PASSES = 10
+
+
+def generate(root, count):
+    """Write `count` frames, across passes, with gaps and empty frames"""
+    frames = count // PASSES
+    for index in range(PASSES):
+        dirname = os.path.join(root, "pass%d" % index)
+        os.makedirs(dirname)
+
+        for frame in range(1001, 1001 + frames):
+            if frame % 997 == index:
+                continue  # Missing
+
+            with open(os.path.join(dirname, "pass%d.%04d.exr"
+                                   % (index, frame)), "wb") as f:
+                if frame % 991 != index:
+                    f.write(b"\0")
+
+
+def with_sets(sequences):
+    """Validate as though every file was collected on its own"""
+    frames = [set(seq.frames()) for seq in sequences]
+    first = min(min(f) for f in frames)
+    last = max(max(f) for f in frames)
+
+    expected = set(range(first, last + 1))
+    return [sorted(expected - f) for f in frames]
+
+
+def with_ranges(sequences):
+    first = min(seq.first for seq in sequences)
+    last = max(seq.last for seq in sequences)
+    return [sequence.missing(seq.ranges, first, last) for seq in sequences]
+
+
+def measure(label, func, *args):
+    start = time.time()
+    result = func(*args)
+    print("%-10s %.3fs" % (label, time.time() - start))
+    return result
+
+
+def main(count=100000):
+    root = tempfile.mkdtemp()
+
+    try:
+        print("Writing %d frames of %d passes.." % (count, PASSES))
+        generate(root, count)
+
+        sequences, _ = measure("collect", sequence.collect, root)
+        print("Found %d sequences" % len(sequences))
+
+        gaps = measure("sets", with_sets, sequences)
+        ranges = measure("ranges", with_ranges, sequences)
+
+        assert [sum(last - first + 1 for first, last in r)
+                for r in ranges] == [len(g) for g in gaps]
+
+        measure("duplicates", sequence.duplicates, sequences)
+        empty = measure("empty", sequence.empty, sequences)
+
+        print("Missing %d frames, %d empty" % (
+            sum(len(g) for g in gaps),
+            sum(last - first + 1 for r in empty for first, last in r)))
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,98 @@
+"""Compare lucidity.parse() with the compiled schema matcher
+
+Usage:
+    $ python benchmarks/bench_schema.py [count]
+
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import lucidity
+from pyblish_magenta import schema
+
+PATTERNS = (
+    ("asset.work", "{root:.+}/assets/{asset}/{task}/work/maya/scenes/{file}"),
+    ("asset.publish", "{root:.+}/assets/{asset}/{task}/publish"),
+    ("asset.full", "{root:.+}/assets/{asset}/{task}/publish/{version}/"
+                   "{family}/{instance}/{file}"),
+    ("shot.work", "{root:.+}/film/{sequence}/{shot}/{task}/work/maya/scenes/"
+                  "{file}"),
+    ("shot.publish", "{root:.+}/film/{sequence}/{shot}/{task}/publish"),
+    ("shot.full", "{root:.+}/film/{sequence}/{shot}/{task}/publish/{version}/"
+                  "{family}/{instance}/{file}"),
+    ("dev.conceptArt", "{root:.+}/dev/conceptArt/{asset}/{file}"),
+    ("asset.conceptArt", "{root:.+}/asset/model/{asset}/conceptArt"),
+)
+
+
+def generate(count):
+    """Return `count` paths, with one in ten being a repeat"""
+    formats = (
+        "/projects/thedeal/assets/char{0}/modeling/publish/v{1:03d}/"
+        "model/char{0}/char{0}_v{1:03d}.ma",
+        "/projects/thedeal/film/seq{2:02d}/{0:04d}/animation/publish/"
+        "v{1:03d}/pointcache/ben{2:02d}/ben_v{1:03d}.abc",
+        "/projects/thedeal/assets/char{0}/rigging/work/maya/scenes/"
+        "rig_v{1:03d}.ma",
+        "/projects/thedeal/unrelated/{0}.txt",
+    )
+
+    paths = list()
+    for index in range(count):
+        if paths and index % 10 == 0:
+            paths.append(random.choice(paths))
+        else:
+            paths.append(random.choice(formats).format(
+                index, index % 1000, index % 100))
+
+    return paths
+
+
+def measure(label, func, *args):
+    start = time.time()
+    result = func(*args)
+    print("%-24s %.3fs" % (label, time.time() - start))
+    return result
+
+
+def main(count=10000):
+    templates = [lucidity.Template(name, pattern)
+                 for name, pattern in PATTERNS]
+    paths = generate(count)
+
+    print("Parsing %d paths against %d templates" % (count, len(templates)))
+
+    def reference():
+        results = list()
+        for path in paths:
+            try:
+                results.append(lucidity.parse(path, templates))
+            except lucidity.ParseError:
+                results.append(None)
+        return results
+
+    def compiled():
+        results = list()
+        for path in paths:
+            try:
+                results.append(matcher.parse(path))
+            except lucidity.ParseError:
+                results.append(None)
+        return results
+
+    matcher = schema.Matcher(templates)
+
+    expected = measure("lucidity.parse", reference)
+    cold = measure("Matcher.parse", compiled)
+    warm = measure("Matcher.parse (warm)", compiled)
+
+    assert expected == cold == warm, "Results differ from lucidity"
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
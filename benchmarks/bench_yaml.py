@@ -0,0 +1,59 @@
+"""Compare the pure-Python and libyaml backends of the vendored yaml
+
+Usage:
+    $ python benchmarks/bench_yaml.py [templates]
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pyblish_magenta.vendor import yaml
+
+
+def generate(count):
+    """Return a schema of `count` templates, as YAML"""
+    lines = ["templates:"]
+    for index in range(count):
+        lines.extend([
+            "  asset%d.work:" % index,
+            "    pattern: '{@root}/assets/{asset}/{task}/work/v%03d'"
+            % (index % 1000),
+            "    anchor: start",
+            "    keys: [root, asset, task]",
+            "  asset%d.publish:" % index,
+            "    pattern: '{@root}/assets/{asset}/{task}/publish'",
+            "    anchor: both",
+            "    keys: [root, asset, task]",
+        ])
+
+    return "\n".join(lines) + "\n"
+
+
+def measure(label, loader, source):
+    start = time.time()
+    data = yaml.load(source, Loader=loader)
+    print("%-10s %.3fs" % (label, time.time() - start))
+    return data
+
+
+def main(count=5000):
+    source = generate(count)
+
+    print("Active backend: %s" % yaml.__backend__)
+    print("Loading %d templates (%d kb)" % (count * 2, len(source) / 1024))
+
+    expected = measure("python", yaml.SafeLoader, source)
+
+    if not yaml.__with_libyaml__:
+        print("libyaml unavailable, skipping")
+        return
+
+    assert measure("libyaml", yaml.FastSafeLoader, source) == expected
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
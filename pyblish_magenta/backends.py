@@ -0,0 +1,285 @@
+"""Storage of published files
+
+Published files are stored on the local filesystem unless otherwise
+specified by $MAGENTA_BACKEND, set per project alongside $TOPICS.
+
+Backends:
+    file://: Local filesystem, the default
+    s3://<bucket>[/<prefix>]: S3-compatible object storage, such as
+        AWS or MinIO, at $MAGENTA_S3_ENDPOINT if set. Requires boto3.
+
+Example:
+    $ export MAGENTA_BACKEND=s3://thedeal/publish
+
+Versions are still reserved, journaled and described on the local
+filesystem, only their files are stored by the backend. Each file is
+stored under its absolute path, such that e.g.
+
+    /projects/thedeal/assets/ben/.../v002/thedeal_ben_modeling_v002_ben.ma
+
+is stored as the object
+
+    s3://thedeal/publish/projects/thedeal/assets/ben/.../v002/...
+
+"""
+
+import os
+import math
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+from . import transfer
+
+try:
+    import boto3
+    import botocore.config
+except ImportError:
+    boto3 = None
+
+# Unless $MAGENTA_BACKEND or otherwise specified
+BACKEND = "file://"
+
+# Size of each part of large uploads, in bytes
+PART_SIZE = 16 * 1024 * 1024
+
+# Parts uploaded at once, per backend, unless $MAGENTA_UPLOAD_WORKERS
+WORKERS = 8
+
+# Maximum number of parts of a multipart upload, as per S3
+MAX_PARTS = 10000
+
+
+def get(url=None, **kwargs):
+    """Return backend of `url`, defaults to $MAGENTA_BACKEND
+
+    Arguments:
+        url (str, optional): Location of backend, see :mod:`backends`
+        kwargs (dict, optional): Passed on to the backend
+
+    """
+
+    url = url or os.environ.get("MAGENTA_BACKEND") or BACKEND
+    scheme, _, location = url.partition("://")
+
+    if scheme == "file":
+        return Local(**kwargs)
+
+    if scheme == "s3":
+        bucket, _, prefix = location.partition("/")
+        return S3(bucket, prefix, **kwargs)
+
+    raise ValueError("Unsupported backend \"%s\"" % url)
+
+
+class Local(object):
+    """Files on the local filesystem
+
+    Arguments:
+        strategy (str, optional): See :data:`transfer.STRATEGIES`
+        buffer_size (int, optional): Size of each read and write
+        throttle (transfer.Throttle, optional): Limit bandwidth of copies
+
+    """
+
+    url = "file://"
+    local = True
+
+    def __init__(self,
+                 strategy="auto",
+                 buffer_size=transfer.BUFFER_SIZE,
+                 throttle=None):
+        self.strategy = strategy
+        self.buffer_size = buffer_size
+        self.throttle = throttle
+
+    def put(self, src, dst, checksum=False):
+        """Store `src` at `dst`
+
+        Returns tuple of strategy used and SHA-256, or None,
+        see :func:`transfer.transfer`.
+
+        """
+
+        return transfer.transfer(src, dst,
+                                 self.strategy,
+                                 self.buffer_size,
+                                 checksum,
+                                 self.throttle)
+
+    def unchanged(self, src, dst):
+        """Return whether `dst` is stored and identical to `src`"""
+        return os.path.lexists(dst) and transfer.unchanged(src, dst)
+
+    def close(self):
+        pass
+
+
+class S3(object):
+    """Objects of a bucket of S3-compatible storage
+
+    Files larger than `part_size` are uploaded in parts, concurrently.
+    A single client, and its pool of connections, is shared by every
+    upload, see :meth:`close`.
+
+    Arguments:
+        bucket (str): Name of bucket
+        prefix (str, optional): Prefix of each key
+        endpoint (str, optional): Address of storage,
+            defaults to $MAGENTA_S3_ENDPOINT or AWS
+        part_size (int, optional): Size of each part of large uploads
+        workers (int, optional): Number of parts uploaded at once
+        client (object, optional): Client with the interface of
+            boto3's S3 client, defaults to a new boto3 client
+        throttle (transfer.Throttle, optional): Limit bandwidth of
+            uploads, defaults to $MAGENTA_BANDWIDTH, if set
+
+    """
+
+    local = False
+
+    def __init__(self,
+                 bucket,
+                 prefix="",
+                 endpoint=None,
+                 part_size=PART_SIZE,
+                 workers=None,
+                 client=None,
+                 throttle=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.part_size = part_size
+        self.workers = workers or int(
+            os.environ.get("MAGENTA_UPLOAD_WORKERS") or WORKERS)
+        self.throttle = throttle or transfer.bandwidth()
+
+        if client is None:
+            assert boto3 is not None, "The S3 backend requires boto3"
+
+            # Parts of files uploaded concurrently by :class:`Transfer`
+            # are uploaded concurrently too.
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint or os.environ.get(
+                    "MAGENTA_S3_ENDPOINT"),
+                config=botocore.config.Config(
+                    max_pool_connections=(
+                        self.workers + transfer.concurrency())))
+
+        self.client = client
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "s3://%s/%s" % (self.bucket, self.prefix)
+
+    def key(self, dst):
+        """Return key of the object stored at `dst`"""
+        path = os.path.splitdrive(dst)[1].replace("\\", "/").strip("/")
+        return "/".join(part for part in (self.prefix, path) if part)
+
+    def put(self, src, dst, checksum=False):
+        """Upload `src` to the object of `dst`
+
+        The SHA-256 of `src` is stored with the object, such
+        that later uploads may compare it, see :meth:`unchanged`.
+
+        Returns tuple of strategy used and SHA-256, or None.
+
+        """
+
+        sha256 = transfer.digest(src)
+        metadata = {"sha256": sha256}
+        size = os.path.getsize(src)
+
+        if size <= self.part_size:
+            with open(src, "rb") as f:
+                body = f.read()
+
+            if self.throttle is not None:
+                self.throttle.consume(len(body))
+
+            self.client.put_object(Bucket=self.bucket,
+                                   Key=self.key(dst),
+                                   Body=body,
+                                   Metadata=metadata)
+        else:
+            self._put_multipart(src, dst, size, metadata)
+
+        return "s3", sha256 if checksum else None
+
+    def unchanged(self, src, dst):
+        """Return whether `dst` is stored and identical to `src`"""
+        try:
+            head = self.client.head_object(Bucket=self.bucket,
+                                           Key=self.key(dst))
+        except Exception as e:
+            if _code(e) in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+        return (head["ContentLength"] == os.path.getsize(src) and
+                head.get("Metadata", {}).get("sha256") ==
+                transfer.digest(src))
+
+    def close(self):
+        """Stop threads uploading parts"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+    def _put_multipart(self, src, dst, size, metadata):
+        key = self.key(dst)
+
+        # Parts are limited in number, not size
+        part_size = max(self.part_size,
+                        int(math.ceil(size / float(MAX_PARTS))))
+
+        upload = self.client.create_multipart_upload(Bucket=self.bucket,
+                                                     Key=key,
+                                                     Metadata=metadata)
+
+        def put_part(number):
+            with open(src, "rb") as f:
+                f.seek((number - 1) * part_size)
+                body = f.read(part_size)
+
+            if self.throttle is not None:
+                self.throttle.consume(len(body))
+
+            part = self.client.upload_part(Bucket=self.bucket,
+                                           Key=key,
+                                           UploadId=upload["UploadId"],
+                                           PartNumber=number,
+                                           Body=body)
+
+            return {"PartNumber": number, "ETag": part["ETag"]}
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self.workers,
+                                        initializer=transfer.lower_priority)
+
+        count = int(math.ceil(size / float(part_size)))
+
+        try:
+            parts = self._pool.map(put_part, range(1, count + 1), chunksize=1)
+        except Exception:
+            self.client.abort_multipart_upload(Bucket=self.bucket,
+                                               Key=key,
+                                               UploadId=upload["UploadId"])
+            raise
+
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload["UploadId"],
+            MultipartUpload={"Parts": parts})
+
+
+def _code(error):
+    """Return code of error raised by boto3, if any"""
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
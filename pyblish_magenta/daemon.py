@@ -0,0 +1,471 @@
+"""Integrate in a background process
+
+Integration of large publishes blocks Maya for as long as files are
+being copied. With $MAGENTA_BACKGROUND set, integrators instead describe
+their work as a job in a queue on local disk and return immediately,
+leaving a worker process to carry it out.
+
+Example:
+    $ python -m pyblish_magenta.daemon          # Run a worker
+    $ python -m pyblish_magenta.daemon status   # List jobs
+
+Jobs survive restarts of both Maya and the worker. Jobs left running by
+a worker no longer alive are run again, and resume where they left off,
+see :mod:`journal`.
+
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import traceback
+import subprocess
+import contextlib
+
+from . import journal
+
+# Unless $MAGENTA_QUEUE or otherwise specified
+DATABASE = os.path.join(os.path.expanduser("~"), ".magenta", "queue.sqlite")
+
+# Interpreter of workers started from within Maya, unless $MAGENTA_PYTHON,
+# see :func:`spawn`
+PYTHON = "mayapy"
+
+# Seconds between polls of an idle worker
+INTERVAL = 0.5
+
+# Seconds after which workers started by :func:`spawn` exit, when idle
+IDLE = 300
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    after TEXT NOT NULL,
+    status TEXT NOT NULL,
+    host TEXT,
+    pid INTEGER,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS workers (
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    started REAL NOT NULL
+);
+"""
+
+log = logging.getLogger(__name__)
+
+
+def _integrate(data, log):
+    from . import integration
+    return integration.integrate(data, log)
+
+
+def _wrap_alembics(data, log):
+    from .plugins import wrap_alembic
+    return wrap_alembic.wrap(data["paths"], log)
+
+
+# Kind of job -> function(data, log) returning result, if any
+HANDLERS = {
+    "integrate": _integrate,
+    "wrapAlembics": _wrap_alembics,
+}
+
+
+class Queue(object):
+    """Jobs of a single machine, stored in SQLite
+
+    Arguments:
+        path (str, optional): Absolute path to database,
+            defaults to $MAGENTA_QUEUE or ~/.magenta/queue.sqlite
+
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("MAGENTA_QUEUE") or DATABASE
+
+        dirname = os.path.dirname(self.path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def submit(self, kind, data, after=None):
+        """Add job and return its id
+
+        Arguments:
+            kind (str): One of :data:`HANDLERS`
+            data (dict): Everything needed to carry out the job
+            after (list, optional): Ids of jobs to finish first,
+                the job fails along with any of these
+
+        """
+
+        assert kind in HANDLERS, "Unknown kind of job \"%s\"" % kind
+
+        with self._connect() as db:
+            return db.execute(
+                "INSERT INTO jobs (kind, data, after, status, submitted) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(data), json.dumps(list(after or [])),
+                 QUEUED, time.time())).lastrowid
+
+    def claim(self):
+        """Mark the next job ready to run as running and return it
+
+        Returns None if no job is ready.
+
+        """
+
+        with self._connect() as db:
+            # Lock the database, such that each job is claimed once
+            db.execute("BEGIN IMMEDIATE")
+
+            try:
+                jobs = db.execute("SELECT * FROM jobs WHERE status = ? "
+                                  "ORDER BY id", (QUEUED,)).fetchall()
+
+                for job in jobs:
+                    after = json.loads(job["after"])
+                    statuses = [row[0] for row in db.execute(
+                        "SELECT status FROM jobs WHERE id IN (%s)"
+                        % ", ".join("?" * len(after)), after)]
+
+                    if FAILED in statuses:
+                        self._finish(db, job["id"], FAILED,
+                                     error="A job it depends on failed")
+
+                    elif statuses.count(DONE) == len(after):
+                        db.execute("UPDATE jobs SET status = ?, host = ?, "
+                                   "pid = ?, started = ? WHERE id = ?",
+                                   (RUNNING, socket.gethostname(),
+                                    os.getpid(), time.time(), job["id"]))
+                        db.execute("COMMIT")
+                        return _job(job, status=RUNNING)
+
+                db.execute("COMMIT")
+
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def finish(self, id, result=None):
+        """Mark job of `id` as done"""
+        with self._connect() as db:
+            self._finish(db, id, DONE, result=result)
+
+    def fail(self, id, error):
+        """Mark job of `id` as failed, with message `error`"""
+        with self._connect() as db:
+            self._finish(db, id, FAILED, error=error)
+
+    def status(self, id):
+        """Return job of `id`, or None if there is no such job"""
+        with self._connect() as db:
+            job = db.execute("SELECT * FROM jobs WHERE id = ?",
+                             (id,)).fetchone()
+        return job and _job(job)
+
+    def jobs(self, status=None):
+        """Return every job, optionally only those of `status`"""
+        with self._connect() as db:
+            if status is None:
+                rows = db.execute("SELECT * FROM jobs ORDER BY id")
+            else:
+                rows = db.execute("SELECT * FROM jobs WHERE status = ? "
+                                  "ORDER BY id", (status,))
+            return [_job(row) for row in rows]
+
+    def wait(self, ids, timeout=None):
+        """Block until jobs of `ids` have finished and return them
+
+        Raises RuntimeError if `timeout` seconds pass first.
+
+        """
+
+        start = time.time()
+        while True:
+            jobs = [self.status(id) for id in ids]
+            if all(job["status"] in (DONE, FAILED) for job in jobs):
+                return jobs
+
+            if timeout is not None and time.time() - start > timeout:
+                raise RuntimeError("Jobs %s still running after %ds"
+                                   % (ids, timeout))
+
+            time.sleep(INTERVAL)
+
+    def integrating(self, version_dir):
+        """Return whether a job integrating `version_dir` is yet to finish"""
+        version_dir = os.path.normpath(version_dir)
+
+        for job in self.jobs(QUEUED) + self.jobs(RUNNING):
+            if job["kind"] != "integrate":
+                continue
+
+            data = job["data"]
+            if os.path.normpath(os.path.join(
+                    data["versionsDir"], data["version"])) == version_dir:
+                return True
+
+        return False
+
+    def recover(self):
+        """Queue jobs left running by workers no longer alive again"""
+        requeued = list()
+
+        with self._connect() as db:
+            for job in db.execute("SELECT * FROM jobs WHERE status = ?",
+                                  (RUNNING,)).fetchall():
+                if journal.abandoned({"host": job["host"],
+                                      "pid": job["pid"],
+                                      "time": job["started"]}):
+                    requeued.append(job["id"])
+
+            for id in requeued:
+                db.execute("UPDATE jobs SET status = ? WHERE id = ?",
+                           (QUEUED, id))
+
+        return requeued
+
+    def workers(self):
+        """Return process ids of workers running on this machine"""
+        with self._connect() as db:
+            return self._workers(db)
+
+    def enlist(self, pid=None):
+        """Add worker of `pid` to those running on this machine
+
+        Arguments:
+            pid (int, optional): Defaults to the current process
+
+        """
+
+        with self._connect() as db:
+            self._enlist(db, pid or os.getpid())
+
+    def _enlist(self, db, pid):
+        if pid not in self._workers(db):
+            db.execute("INSERT INTO workers (host, pid, started) "
+                       "VALUES (?, ?, ?)",
+                       (socket.gethostname(), pid, time.time()))
+
+    def _workers(self, db):
+        rows = db.execute("SELECT * FROM workers WHERE host = ?",
+                          (socket.gethostname(),)).fetchall()
+
+        return [row["pid"] for row in rows
+                if row["pid"] == os.getpid()
+                or not journal.abandoned({"host": row["host"],
+                                          "pid": row["pid"],
+                                          "time": row["started"]})]
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def _finish(self, db, id, status, result=None, error=None):
+        db.execute("UPDATE jobs SET status = ?, finished = ?, result = ?, "
+                   "error = ? WHERE id = ?",
+                   (status, time.time(), json.dumps(result), error, id))
+
+
+def work(path=None, idle=None):
+    """Run jobs as they are submitted
+
+    Arguments:
+        path (str, optional): Absolute path to queue, see :class:`Queue`
+        idle (float, optional): Exit after this many seconds
+            without jobs, defaults to running forever
+
+    """
+
+    queue = Queue(path)
+
+    # Workers started by :func:`spawn` are enlisted already
+    queue.enlist()
+
+    try:
+        for id in queue.recover():
+            log.warning("Resuming job %d, left running by another worker" % id)
+
+        last = time.time()
+        while idle is None or time.time() - last < idle:
+            job = queue.claim()
+
+            if job is None:
+                time.sleep(INTERVAL)
+                continue
+
+            run(queue, job)
+            last = time.time()
+
+    finally:
+        with queue._connect() as db:
+            db.execute("DELETE FROM workers WHERE host = ? AND pid = ?",
+                       (socket.gethostname(), os.getpid()))
+
+
+def run(queue, job):
+    """Carry out claimed `job` and record its outcome in `queue`"""
+    log.info("Running %s job %d" % (job["kind"], job["id"]))
+
+    try:
+        result = HANDLERS[job["kind"]](job["data"], log)
+    except Exception:
+        error = traceback.format_exc()
+        log.error(error)
+        queue.fail(job["id"], error)
+    else:
+        log.info("Finished %s job %d" % (job["kind"], job["id"]))
+        queue.finish(job["id"], result)
+
+
+def spawn(path=None):
+    """Start a worker in the background, unless one is running already
+
+    The worker is enlisted as it is started, whilst the queue is locked,
+    such that spawning once per instance of a publish starts one worker.
+    The worker exits after :data:`IDLE` seconds without jobs.
+
+    Returns the process started, if any.
+
+    """
+
+    queue = Queue(path)
+
+    kwargs = dict()
+    if os.name == "nt":
+        kwargs["creationflags"] = 0x00000008  # DETACHED_PROCESS
+    else:
+        kwargs["preexec_fn"] = os.setsid  # Outlive Maya
+
+    with queue._connect() as db:
+        db.execute("BEGIN IMMEDIATE")
+
+        try:
+            if queue._workers(db):
+                db.execute("COMMIT")
+                return None
+
+            with open(os.devnull, "w") as devnull:
+                process = subprocess.Popen(
+                    [os.environ.get("MAGENTA_PYTHON") or PYTHON,
+                     "-m", "pyblish_magenta.daemon",
+                     "--queue", queue.path,
+                     "--idle", str(IDLE)],
+                    stdout=devnull,
+                    stderr=devnull,
+                    close_fds=True,
+                    **kwargs)
+
+            queue._enlist(db, process.pid)
+            db.execute("COMMIT")
+
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    return process
+
+
+def report(context, path=None):
+    """Update instances of `context` with the outcome of their jobs
+
+    Instances with a "publishJob" get its "publishStatus", along with
+    the result of the job once done, see :func:`integration.integrate`.
+    A "wrapAlembicsJob" of the context gets its "wrapAlembicsStatus".
+
+    Returns failed jobs.
+
+    """
+
+    queue = Queue(path)
+    failed = list()
+
+    id = context.data("wrapAlembicsJob")
+    if id is not None:
+        job = queue.status(id)
+        context.set_data("wrapAlembicsStatus", job["status"])
+
+        if job["status"] == FAILED:
+            failed.append(job)
+
+    for instance in context:
+        id = instance.data("publishJob")
+        if id is None:
+            continue
+
+        job = queue.status(id)
+        instance.set_data("publishStatus", job["status"])
+
+        if job["status"] == DONE:
+            for key, value in (job["result"] or {}).items():
+                instance.set_data(key, value)
+
+        elif job["status"] == FAILED:
+            failed.append(job)
+
+    return failed
+
+
+def _job(row, **overrides):
+    job = dict(zip(row.keys(), row))
+    job["data"] = json.loads(job["data"])
+    job["after"] = json.loads(job["after"])
+    job["result"] = json.loads(job["result"] or "null")
+    job.update(overrides)
+    return job
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pyblish_magenta.daemon",
+        description="Run queued publishing jobs")
+    parser.add_argument("command", nargs="?", default="work",
+                        choices=["work", "status"])
+    parser.add_argument("--queue", help="Path to queue, default: %s"
+                        % (os.environ.get("MAGENTA_QUEUE") or DATABASE))
+    parser.add_argument("--idle", type=float,
+                        help="Exit after this many seconds without jobs")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        for job in Queue(args.queue).jobs():
+            print("%5d %-14s %-8s %s" % (
+                job["id"], job["kind"], job["status"],
+                time.ctime(job["submitted"])))
+            if job["error"]:
+                print(job["error"])
+        return
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    work(args.queue, args.idle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Headers of OpenEXR images
+
+Only the header of each image is read, typically the first few
+kilobytes, without decompressing any pixels nor requiring OpenEXR.
+
+Example:
+    >>> header = read("/renders/beauty.1001.exr")  # doctest: +SKIP
+    >>> summarize(header)  # doctest: +SKIP
+    {'resolution': [1920, 1080], 'channels': ['A', 'B', 'G', 'R'], ...}
+
+"""
+
+import struct
+
+from multiprocessing.pool import ThreadPool
+
+from . import sequence
+
+MAGIC = b"\x76\x2f\x31\x01"
+
+# Bytes read at a time, until the end of the header
+BLOCK = 16 * 1024
+
+COMPRESSION = ("none", "rle", "zips", "zip", "piz", "pxr24",
+               "b44", "b44a", "dwaa", "dwab")
+
+LINE_ORDER = ("increasingY", "decreasingY", "randomY")
+
+PIXEL_TYPES = ("uint", "half", "float")
+
+# Type of attribute -> format of its value, see :func:`_value`
+FORMATS = {
+    "int": "<i",
+    "float": "<f",
+    "double": "<d",
+    "v2i": "<2i",
+    "v2f": "<2f",
+    "v3i": "<3i",
+    "v3f": "<3f",
+    "box2i": "<4i",
+    "box2f": "<4f",
+}
+
+
+class Truncated(Exception):
+    """More of the file is needed to read the header"""
+
+
+def read(path):
+    """Return attributes of the header of image at `path`
+
+    Attributes of types without a meaning here, such as matrices
+    and previews, are left out. Of multi-part images, the header
+    of the first part is returned.
+
+    Raises ValueError if `path` is not an OpenEXR image.
+
+    """
+
+    with open(path, "rb") as f:
+        data = f.read(BLOCK)
+
+        while True:
+            try:
+                return parse(data)
+            except Truncated:
+                more = f.read(len(data))
+                if not more:
+                    raise ValueError("%s: Incomplete header" % path)
+                data += more
+
+
+def parse(data):
+    """Return attributes of header at the beginning of bytes `data`
+
+    Raises Truncated if `data` ends before the header does.
+
+    """
+
+    if len(data) < 8:
+        raise Truncated()
+
+    if data[:4] != MAGIC:
+        raise ValueError("Not an OpenEXR image")
+
+    header = dict()
+    position = 8
+
+    while True:
+        name, position = _string(data, position)
+        if not name:
+            return header
+
+        kind, position = _string(data, position)
+
+        if position + 4 > len(data):
+            raise Truncated()
+        size, = struct.unpack_from("<i", data, position)
+        position += 4
+
+        if position + size > len(data):
+            raise Truncated()
+
+        value = _value(kind, data[position:position + size])
+        if value is not None:
+            header[name] = value
+
+        position += size
+
+
+def is_exr(path):
+    """Return whether `path` is named as an OpenEXR image
+
+    Example:
+        >>> is_exr("beauty.1001.EXR"), is_exr(".exr"), is_exr("beauty.jpg")
+        (True, True, False)
+
+    """
+
+    return path.lower().endswith(".exr")
+
+
+def summarize(header):
+    """Return what images of a sequence are expected to share
+
+    The data window is left out, as it may change from one frame
+    to the next, such as when cropped to the bounds of an object.
+
+    """
+
+    xmin, ymin, xmax, ymax = header.get("displayWindow", (0, 0, -1, -1))
+
+    channels = header.get("channels", [])
+    return {
+        "resolution": [xmax - xmin + 1, ymax - ymin + 1],
+        "channels": sorted(name for name, _ in channels),
+        "pixelTypes": sorted(set(kind for _, kind in channels)),
+        "compression": header.get("compression"),
+    }
+
+
+def inspect(sequences, workers=None):
+    """Return summary of each of `sequences`, along with frames differing
+
+    Headers are read in chunks of frames, concurrently.
+
+    Arguments:
+        sequences (list): Sequences of OpenEXR images
+        workers (int, optional): Number of chunks read at once,
+            defaults to $MAGENTA_SCAN_WORKERS or 8
+
+    Returns list of the summary most frames agree on, see
+    :func:`summarize`, and ranges of every other frame, including
+    frames not read, per sequence.
+
+    """
+
+    chunks = list()
+    for index, seq in enumerate(sequences):
+        for first, last in seq.ranges:
+            for start in range(first, last + 1, sequence.CHUNK):
+                chunks.append((index, seq, start,
+                               min(start + sequence.CHUNK - 1, last)))
+
+    if not chunks:
+        return [(None, list()) for seq in sequences]
+
+    pool = ThreadPool(min(len(chunks), workers or sequence.concurrency()))
+    try:
+        results = pool.map(_inspect, chunks)
+    finally:
+        pool.close()
+        pool.join()
+
+    # Summary -> frames, per sequence
+    groups = [dict() for seq in sequences]
+    for (index, _, _, _), result in zip(chunks, results):
+        for key, frames in result.items():
+            groups[index].setdefault(key, list()).extend(frames)
+
+    inspected = list()
+    for group in groups:
+        readable = [key for key in group if key is not None]
+        common = max(readable, key=lambda key: len(group[key])) \
+            if readable else None
+
+        differing = list()
+        for key, frames in group.items():
+            if key != common or key is None:
+                differing.extend(frames)
+
+        inspected.append((common and _unfreeze(common),
+                          sequence.to_ranges(differing)))
+
+    return inspected
+
+
+def _inspect(chunk):
+    """Return frames of `chunk` per summary, see :func:`inspect`"""
+    _, seq, first, last = chunk
+    groups = dict()
+
+    for frame in range(first, last + 1):
+        try:
+            key = _freeze(summarize(read(seq.path(frame))))
+        except (IOError, OSError, ValueError, struct.error):
+            key = None
+
+        groups.setdefault(key, list()).append(frame)
+
+    return groups
+
+
+def _freeze(summary):
+    return tuple(sorted((key, tuple(value) if isinstance(value, list)
+                         else value) for key, value in summary.items()))
+
+
+def _unfreeze(key):
+    return dict((name, list(value) if isinstance(value, tuple) else value)
+                for name, value in key)
+
+
+def _string(data, position):
+    """Return null-terminated string at `position`, and what follows"""
+    end = data.find(b"\0", position)
+    if end < 0:
+        raise Truncated()
+    return data[position:end].decode("latin-1"), end + 1
+
+
+def _value(kind, data):
+    """Return value of attribute of type `kind`, or None if unsupported"""
+    if kind in FORMATS:
+        value = struct.unpack(FORMATS[kind], data)
+        return value[0] if len(value) == 1 else list(value)
+
+    if kind == "string":
+        return data.decode("utf-8", "replace")
+
+    if kind == "compression":
+        return _name(COMPRESSION, struct.unpack("<B", data)[0])
+
+    if kind == "lineOrder":
+        return _name(LINE_ORDER, struct.unpack("<B", data)[0])
+
+    if kind == "chlist":
+        return _channels(data)
+
+    return None
+
+
+def _channels(data):
+    """Return name and pixel type of each channel of a chlist"""
+    channels = list()
+    position = 0
+
+    while True:
+        name, position = _string(data, position)
+        if not name:
+            return channels
+
+        pixel_type, = struct.unpack_from("<i", data, position)
+        position += 16  # Type, linear, reserved and sampling
+
+        channels.append((name, _name(PIXEL_TYPES, pixel_type)))
+
+
+def _name(names, index):
+    return names[index] if 0 <= index < len(names) else str(index)
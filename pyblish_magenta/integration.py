@@ -0,0 +1,198 @@
+"""Copy extracted files into a reserved version
+
+Shared by :class:`IntegrateAssets` and the background worker,
+see :mod:`daemon`, such that a publish integrates the same
+way whether or not it is run from within Maya.
+
+With $MAGENTA_STAGING set, files are instead extracted straight into
+a staging directory next to their version, and published by renaming
+the staging directory, see :func:`stage`.
+
+Example:
+    thedeal/assets/ben/modeling/publish/model/ben/
+        .staging/
+            v003/                            <-- Being extracted
+                .journal.json
+                ben.ma
+        v002/
+        v003/                                <-- Reserved, empty
+
+"""
+
+import os
+import shutil
+
+from multiprocessing.pool import ThreadPool
+
+from . import backends, journal, integrity, schema, versioning
+from .store import Store
+from .transfer import Transfer, concurrency, digest
+
+
+def publish_directory(path):
+    """Given the current file, determine where to publish
+
+    Arguments:
+        path (str): Absolute path to the current working file
+
+    """
+
+    project = schema.load()
+    data, template = schema.parse(path, project)
+
+    # TOPICS are a space-separated list of user-supplied topics
+    # E.g. "thedeal seq01 1000 animation"
+    task = os.environ["TOPICS"].split()[-1]
+    assert task == data["task"], (
+        "Task set in environment ({env}) is not the same as "
+        "the one parsed ({data})".format(
+            env=task,
+            data=data["task"]))
+
+    pattern = project.get(template.name.rsplit(".work", 1)[0] + ".publish")
+    return pattern.format(data)
+
+
+def versions_directory(publish_dir, instance):
+    """Return directory of versions of `instance`"""
+    return os.path.join(publish_dir,
+                        instance.data("family"),
+                        instance.data("name"))
+
+
+def stage(versions_dir):
+    """Reserve the next version and provide a directory to extract it into
+
+    The staging directory resides next to the version, on the same
+    filesystem, such that it may be published by renaming it, see
+    :func:`publish`. It is journaled until then, such that it is rolled
+    back should extraction or integration fail, see :mod:`journal`.
+
+    Returns name of version and absolute path to staging directory.
+
+    """
+
+    version = versioning.reserve(versions_dir)
+    staging_dir = journal.staging_dir(os.path.join(versions_dir, version))
+
+    os.makedirs(staging_dir)
+    journal.begin(staging_dir, None)
+
+    return version, staging_dir
+
+
+def publish(versions_dir, version, renames=None):
+    """Rename staged `version` into place and register it
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+        version (str): Name of staged version, see :func:`stage`
+        renames (list, optional): Source and destination of files
+            to rename within the staging directory beforehand
+
+    """
+
+    version_dir = os.path.join(versions_dir, version)
+    staging_dir = journal.staging_dir(version_dir)
+
+    for src, dst in renames or []:
+        os.rename(src, dst)
+
+    paths = list()
+    for root, dirs, fnames in os.walk(staging_dir):
+        paths.extend(os.path.join(root, fname) for fname in fnames
+                     if fname != journal.JOURNAL)
+
+    # Record what was published, for later verification
+    pool = ThreadPool(min(concurrency(), len(paths)) or 1)
+    try:
+        digests = pool.map(digest, paths, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    integrity.write(staging_dir, [
+        (path, os.path.getsize(path), sha256)
+        for path, sha256 in zip(paths, digests)])
+
+    if os.name == "nt":
+        os.rmdir(version_dir)  # Windows won't rename over directories
+
+    # Replaces the reserved, empty version directory
+    os.rename(staging_dir, version_dir)
+
+    journal.commit(version_dir)
+    versioning.register(versions_dir, version)
+
+
+def schedule(files, publish_dir=None, backend=None):
+    """Return transfer of `files`
+
+    Destinations already identical to their source are kept,
+    such that an interrupted integration may be completed.
+
+    Arguments:
+        files (list): Absolute path to source, destination and
+            previous counterpart, or None, of each file or directory
+        publish_dir (str, optional): Store files as blobs
+            of this publish directory, see :mod:`store`
+        backend (str, optional): Location of files other than
+            the local filesystem, see :func:`backends.get`
+
+    """
+
+    transfer = Transfer(store=Store(publish_dir) if publish_dir else None,
+                        checksum=True,
+                        resume=True,
+                        backend=backends.get(backend) if backend else None)
+
+    for src, dst, previous in files:
+        transfer.add(src, dst, previous)
+
+    return transfer
+
+
+def integrate(job, log=None):
+    """Copy files of `job` into its version and register the version
+
+    Arguments:
+        job (dict): Description of integration, with
+            versionsDir (str): Absolute path to directory of versions
+            version (str): Name of reserved version, e.g. "v002"
+            files (list): Files to copy, see :func:`schedule`
+            store (str): Publish directory of store, or None
+            backend (str, optional): Location of files, see :func:`schedule`
+            cleanup (list, optional): Directories to remove once done
+        log (logging.Logger, optional): Report progress here
+
+    Returns statistics of the integration.
+
+    """
+
+    versions_dir = job["versionsDir"]
+    version_dir = os.path.join(versions_dir, job["version"])
+
+    transfer = schedule(job["files"], job.get("store"), job.get("backend"))
+
+    journal.begin(version_dir, transfer)
+    transfer.run()
+
+    if log is not None:
+        log.info("Copied %s" % transfer)
+
+    # Record what was published, for later verification
+    integrity.write(version_dir, transfer.checksums(), job.get("backend"))
+
+    # Complete before registering, such that
+    # registered versions are never rolled back.
+    journal.commit(version_dir)
+    versioning.register(versions_dir, job["version"])
+
+    for dirname in job.get("cleanup", []):
+        shutil.rmtree(dirname, ignore_errors=True)
+
+    return {
+        "transferRate": transfer.rate,
+        "transferReused": transfer.reused,
+        "storeReused": transfer.store.reused if transfer.store else 0,
+    }
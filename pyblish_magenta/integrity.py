@@ -0,0 +1,130 @@
+"""Record and verify the contents of published versions
+
+Each version carries a manifest of its files, their size and SHA-256,
+computed while the files were being published.
+
+Example:
+    $ cat thedeal/assets/ben/modeling/publish/model/ben/v002/.integrity.json
+    {
+      "files": [
+        {
+          "path": "thedeal_ben_modeling_v002_ben.ma",
+          "sha256": "3a7bd3e2360a3d29eea436fcfb7e44c735d117c42d1c1835420b6b9942dd4f1b",
+          "size": 31337
+        }
+      ]
+    }
+
+"""
+
+import os
+import json
+import errno
+import multiprocessing
+
+from . import transfer
+
+MANIFEST = ".integrity.json"
+
+
+def write(version_dir, files, backend=None):
+    """Write manifest of `version_dir`
+
+    Arguments:
+        version_dir (str): Absolute path to version
+        files (list): Absolute path, size and SHA-256 of each file
+        backend (str, optional): Location of files other than
+            the local filesystem, see :mod:`backends`
+
+    """
+
+    entries = [{"path": os.path.relpath(path, version_dir).replace("\\", "/"),
+                "size": size,
+                "sha256": digest} for path, size, digest in files]
+
+    manifest = {"files": sorted(entries, key=lambda e: e["path"])}
+    if backend:
+        manifest["backend"] = backend
+
+    with open(os.path.join(version_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def read(version_dir):
+    """Return entries of the manifest of `version_dir`, if any"""
+    return _read(version_dir).get("files", [])
+
+
+def _read(version_dir):
+    try:
+        with open(os.path.join(version_dir, MANIFEST)) as f:
+            return json.load(f)
+    except IOError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return dict()
+
+
+def find(root):
+    """Return absolute paths to every version at or below `root`"""
+    versions = list()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        if MANIFEST in filenames:
+            versions.append(dirpath)
+    return versions
+
+
+def verify(root, processes=None):
+    """Re-check every file of every version at or below `root`
+
+    Files are hashed concurrently by a pool of processes. Run this
+    from a standalone Python rather than from within Maya.
+
+    Arguments:
+        root (str): Absolute path to a version, or any parent thereof
+        processes (int, optional): Size of pool, defaults to one per core
+
+    Returns list of messages, empty if every file matches its manifest.
+    Files stored other than on the local filesystem are not verified.
+
+    Example:
+        >> verify("/projects/thedeal/assets/ben/modeling/publish")
+        ['Size mismatch: .../model/ben/v002/thedeal_ben_modeling_v002_ben.ma']
+
+    """
+
+    jobs = list()
+    for version_dir in find(root):
+        manifest = _read(version_dir)
+        if manifest.get("backend"):
+            continue
+
+        for entry in manifest["files"]:
+            path = os.path.join(version_dir, entry["path"])
+            jobs.append((path, entry["size"], entry["sha256"]))
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        problems = pool.map(_check, jobs, chunksize=4)
+    finally:
+        pool.close()
+        pool.join()
+
+    return [problem for problem in problems if problem]
+
+
+def _check(job):
+    """Return problem with a single file, if any"""
+    path, size, digest = job
+
+    try:
+        actual = os.path.getsize(path)
+    except OSError:
+        return "Missing file: %s" % path
+
+    if actual != size:
+        return "Size mismatch: %s" % path
+
+    if transfer.digest(path) != digest:
+        return "Checksum mismatch: %s" % path
@@ -0,0 +1,162 @@
+"""Resume or roll back interrupted integrations
+
+Before any file is copied into a version, the files it is to contain
+are listed in a journal within the version. The journal is removed once
+the version is complete, such that a journal left behind marks a version
+whose integration was interrupted, e.g. by a crash or a network outage.
+
+Example:
+    thedeal/assets/ben/modeling/publish/model/ben/
+        v002/
+        v003/
+            .journal.json                    <-- Integration incomplete
+            thedeal_ben_modeling_v003_ben.ma <-- Possibly truncated
+
+The next integration of the same files resumes the interrupted version,
+copying only files missing or truncated. Any other interrupted version
+is rolled back, once abandoned by the process that started it.
+
+Versions extracted in place are journaled in their staging directory
+until published, see :func:`integration.stage`.
+
+"""
+
+import os
+import json
+import time
+import errno
+import shutil
+import socket
+
+from .versioning import number, _write
+
+JOURNAL = ".journal.json"
+STAGING = ".staging"
+
+# Seconds after which versions started on other machines are abandoned,
+# unless $MAGENTA_JOURNAL_TIMEOUT
+TIMEOUT = 24 * 60 * 60
+
+
+def begin(version_dir, transfer, queue=None):
+    """Record the files `transfer` is about to copy into `version_dir`
+
+    Arguments:
+        version_dir (str): Absolute path to version, or its staging directory
+        transfer (transfer.Transfer): Files scheduled for `version_dir`,
+            None for files yet to be extracted
+        queue (str, optional): Absolute path to queue of the job
+            integrating `version_dir`, if integrated in the background,
+            see :mod:`daemon`
+
+    """
+
+    journal = {
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "time": time.time(),
+        "files": files(version_dir, transfer) if transfer else [],
+    }
+
+    if queue is not None:
+        journal["queue"] = queue
+        journal["versionDir"] = version_dir
+
+    _write(os.path.join(version_dir, JOURNAL),
+           json.dumps(journal, indent=2, sort_keys=True))
+
+
+def commit(version_dir):
+    """Mark integration of `version_dir` as complete"""
+    try:
+        os.remove(os.path.join(version_dir, JOURNAL))
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+def read(version_dir):
+    """Return journal of `version_dir`, or None if complete"""
+    for dirname in (version_dir, staging_dir(version_dir)):
+        try:
+            with open(os.path.join(dirname, JOURNAL)) as f:
+                return json.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        except ValueError:
+            # Interrupted whilst writing the journal itself
+            return {"files": None, "time": 0}
+
+
+def staging_dir(version_dir):
+    """Return directory in which `version_dir` is staged, if at all"""
+    versions_dir, version = os.path.split(version_dir.rstrip("\\/"))
+    return os.path.join(versions_dir, STAGING, version)
+
+
+def files(version_dir, transfer):
+    """Return destinations of `transfer`, relative `version_dir`"""
+    return sorted(os.path.relpath(dst, version_dir).replace("\\", "/")
+                  for _, dst, _, _ in transfer.files)
+
+
+def incomplete(version_dir):
+    """Return whether `version_dir` has a journal, i.e. is incomplete"""
+    return (os.path.exists(os.path.join(version_dir, JOURNAL)) or
+            os.path.exists(os.path.join(staging_dir(version_dir), JOURNAL)))
+
+
+def pending(versions_dir):
+    """Return versions in `versions_dir` with an incomplete integration"""
+    try:
+        entries = os.listdir(versions_dir)
+    except OSError:
+        return list()
+
+    return sorted((entry for entry in entries
+                   if not entry.startswith(".")
+                   and incomplete(os.path.join(versions_dir, entry))),
+                  key=number)
+
+
+def abandoned(journal):
+    """Return whether the integration of `journal` is no longer running
+
+    Integrations of the current process are always abandoned,
+    as are those of processes no longer running on this machine.
+    Those of other machines are abandoned after :data:`TIMEOUT`,
+    or $MAGENTA_JOURNAL_TIMEOUT seconds.
+
+    Integrations queued for a background worker are never abandoned
+    whilst their job is yet to finish, see :mod:`daemon`
+
+    """
+
+    if journal.get("queue"):
+        from . import daemon
+        queue = daemon.Queue(journal["queue"])
+        if queue.integrating(journal["versionDir"]):
+            return False
+
+    if journal.get("host") == socket.gethostname():
+        if journal["pid"] == os.getpid():
+            return True
+
+        # Signals would terminate the process on Windows
+        if os.name != "nt":
+            try:
+                os.kill(journal["pid"], 0)
+            except OSError as e:
+                return e.errno == errno.ESRCH
+            return False
+
+    timeout = int(os.environ.get("MAGENTA_JOURNAL_TIMEOUT") or TIMEOUT)
+    return time.time() - journal["time"] > timeout
+
+
+def rollback(version_dir):
+    """Remove interrupted `version_dir` along with every file within"""
+    for dirname in (staging_dir(version_dir), version_dir):
+        if os.path.exists(dirname):
+            shutil.rmtree(dirname)
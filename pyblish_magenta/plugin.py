@@ -1,14 +1,93 @@
-import tempfile
+import os
+
 import pyblish.api
 
+from . import integration, scratch
+
+
+def extract_dir(instance):
+    """Return directory of files extracted for `instance`, if any
+
+    See :meth:`Extractor.temp_dir`
+
+    """
+
+    extract_dirs = instance.context.data("extractDirs") or dict()
+    return extract_dirs.get(_key(instance))
+
+
+def spill(context):
+    """Move directories of `context` from memory onto disk, if over budget
+
+    See :func:`scratch.enforce`
+
+    """
+
+    extract_dirs = context.data("extractDirs") or dict()
+    moved = dict(scratch.enforce(list(extract_dirs.values())))
+
+    for key, dirname in list(extract_dirs.items()):
+        if dirname in moved:
+            extract_dirs[key] = moved[dirname]
+
+    for instance in context:
+        if instance.data("extractDir") in moved:
+            instance.set_data("extractDir",
+                              value=moved[instance.data("extractDir")])
+
+    return moved
+
 
 class Extractor(pyblish.api.Extractor):
-    def temp_dir(self, context):
-        """Provide a temporary directory in which to store extracted files"""
-        extract_dir = context.data('extractDir')
+    def temp_dir(self, instance, small=False):
+        """Provide a temporary directory in which to store extracted files
+
+        Each instance is given a directory of its own, such that only
+        files extracted for an instance are integrated with it. The
+        directories of every instance are kept in the context, as
+        "extractDirs", until cleaned up.
+
+        With $MAGENTA_STAGING set, the directory is instead that of the
+        next version of the instance, staged for publishing, such that
+        files needn't be copied once extracted, see :func:`integration.stage`
+
+        Files extracted so far are moved onto disk once over the budget
+        of memory, see :func:`spill`
+
+        Arguments:
+            instance (Instance): Instance about to be extracted
+            small (bool, optional): Whether files about to be extracted
+                are small enough to be kept in memory, see :mod:`scratch`
+
+        """
+
+        context = instance.context
+        extract_dirs = context.data("extractDirs")
+
+        if extract_dirs is None:
+            extract_dirs = dict()
+            context.set_data("extractDirs", value=extract_dirs)
+
+        spill(context)
+
+        key = _key(instance)
+        if key not in extract_dirs and os.environ.get("MAGENTA_STAGING"):
+            publish_dir = integration.publish_directory(
+                context.data("currentFile").replace("\\", "/"))
+            version, extract_dirs[key] = integration.stage(
+                integration.versions_directory(publish_dir, instance))
+            instance.set_data("stagedVersion", value=version)
+
+        elif key not in extract_dirs:
+            extract_dirs[key] = scratch.mkdtemp(small)
+
+        elif not small and scratch.in_memory(extract_dirs[key]):
+            # Along with anything extracted so far
+            extract_dirs[key] = scratch.spill(extract_dirs[key])
+
+        instance.set_data("extractDir", value=extract_dirs[key])
+        return extract_dirs[key]
 
-        if not extract_dir:
-            extract_dir = tempfile.mkdtemp()
-            context.set_data('extractDir', value=extract_dir)
 
-        return extract_dir
+def _key(instance):
+    return "%s/%s" % (instance.data("family"), instance.data("name"))
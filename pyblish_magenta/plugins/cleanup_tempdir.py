@@ -1,20 +1,38 @@
-import shutil
+import os
 import pyblish.api
+import pyblish_magenta.plugin
+import pyblish_magenta.journal
+import pyblish_magenta.scratch
 
 
 class CleanupTempdir(pyblish.api.Plugin):
-    """Remove temporary directories used during extraction"""
+    """Remove temporary directories used during extraction
+
+    Directories are removed in the background, see
+    :func:`pyblish_magenta.scratch.remove`
+
+    """
+
     label = "Cleanup"
     order = 99
 
     def process(self, instance):
-        if not instance.has_data("extractDir"):
+        dirname = pyblish_magenta.plugin.extract_dir(instance)
+        if not dirname:
+            return
+
+        if instance.has_data("publishJob"):
+            # Removed by the background worker, once integrated
+            return
+
+        if instance.has_data("stagedVersion"):
+            if not instance.has_data("integrationDir"):
+                self.log.info("Rolling back staged version %s.."
+                              % instance.data("stagedVersion"))
+                staging, version = os.path.split(dirname)
+                pyblish_magenta.journal.rollback(
+                    os.path.join(os.path.dirname(staging), version))
             return
 
-        try:
-            dirname = instance.data("extractDir")
-            self.log.info("Cleaning up %s.." % dirname)
-            shutil.rmtree(dirname)
-            self.log.info("All clean")
-        except IOError:
-            self.log.info("Failed, there might be things lying around")
+        self.log.info("Cleaning up %s.." % dirname)
+        pyblish_magenta.scratch.remove(dirname)
@@ -20,7 +20,8 @@ class CollectMayaOrigin(pyblish.api.Collector):
         schema = pyblish_magenta.schema.load()
         self.log.info("Collecting references..")
 
-        references = dict()
+        filenames = list()
+        seen = set()
         for reference in cmds.ls(type="reference"):
             if reference in ("sharedReferenceNode",):
                 continue
@@ -35,10 +36,15 @@ class CollectMayaOrigin(pyblish.api.Collector):
                 filename=True,
                 withoutCopyNumber=True)  # Exclude suffix {1}
 
-            if filename in references:
+            if filename in seen:
                 continue
 
-            data, template = schema.parse(filename)
+            seen.add(filename)
+            filenames.append(filename)
+
+        references = dict()
+        parsed = pyblish_magenta.schema.parse_many(filenames, schema)
+        for filename, (data, template) in zip(filenames, parsed):
             project = os.path.basename(data["root"])
 
             self.log.info("Parsed with schema %s" % data)
@@ -53,3 +59,4 @@ class CollectMayaOrigin(pyblish.api.Collector):
             self.log.info("Collecting %s" % references[filename])
 
         instance[:] = references.values()
+        context.set_data("schemaCache", pyblish_magenta.schema.stats())
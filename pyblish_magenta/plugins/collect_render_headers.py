@@ -0,0 +1,51 @@
+import os
+
+import pyblish.api
+import pyblish_magenta.exr
+
+from pyblish_magenta.sequence import format_ranges
+
+
+class CollectRenderHeaders(pyblish.api.Collector):
+    """Summarise headers of rendered OpenEXR images
+
+    Each render layer gets the resolution, channels, pixel types and
+    compression of each of its sequences, as "renderHeaders", along
+    with frames whose header differs from the rest of their sequence.
+    Only headers are read, see :mod:`pyblish_magenta.exr`
+
+    """
+
+    hosts = ["maya", "standalone"]
+    label = "Render Headers"
+    order = pyblish.api.Collector.order + 0.2
+
+    def process(self, context):
+        for instance in context:
+            if instance.data("family") != "renderlayer":
+                continue
+
+            root = instance.data("path")
+            sequences = [seq for seq in instance.data("sequences") or []
+                         if pyblish_magenta.exr.is_exr(seq.tail)]
+
+            headers = dict()
+            for seq, (header, differing) in zip(
+                    sequences, pyblish_magenta.exr.inspect(sequences)):
+                name = os.path.relpath(
+                    os.path.join(seq.dirname, seq.pattern), root)
+
+                headers[name] = {"header": header, "differing": differing}
+
+                if header:
+                    self.log.info("%s: %dx%d, %s, %s" % (
+                        name, header["resolution"][0],
+                        header["resolution"][1],
+                        " ".join(header["channels"]),
+                        header["compression"]))
+
+                if differing:
+                    self.log.warning("%s: Frames %s differ" % (
+                        name, format_ranges(differing)))
+
+            instance.set_data("renderHeaders", headers)
@@ -1,5 +1,6 @@
 import os
 import pyblish.api
+import pyblish_magenta.sequence
 
 
 class CollectRenders(pyblish.api.Collector):
@@ -22,7 +23,15 @@ class CollectRenders(pyblish.api.Collector):
              images/
                myfile/          <-- Destination renders
                  renderLayer1/
-                  image1.exr
+                  image.1001.exr
+                  image.1002.exr
+
+        Images of each layer are collected as sequences, such as
+        image.####.exr 1001-1002, see :mod:`pyblish_magenta.sequence`
+
+        Under Maya, each layer is expected to have been rendered
+        from the start to the end frame of its render settings, by
+        its frame step, including overrides of the layer.
 
         """
 
@@ -47,13 +56,80 @@ class CollectRenders(pyblish.api.Collector):
         if not layers:
             return self.log.debug("No renders found for %s" % fname)
 
-        for layer in layers:
+        layers = [layer for layer in layers
+                  if os.path.isdir(os.path.join(layers_dir, layer))]
+        roots = [os.path.join(layers_dir, layer) for layer in layers]
+        collected = pyblish_magenta.sequence.scan(roots)
+        frame_ranges = self.frame_ranges(layers)
+
+        for layer, root, (sequences, files), frame_range in zip(
+                layers, roots, collected, frame_ranges):
             self.log.info("Found layer \"%s\"" % layer)
 
             instance = context.create_instance(layer, family="renderlayer")
-            instance.set_data("path", os.path.join(layers_dir, layer))
+            instance.set_data("path", root)
+            instance.set_data("sequences", sequences)
+            instance.set_data("files", files)
+
+            if frame_range is not None:
+                instance.set_data("startFrame", frame_range[0])
+                instance.set_data("endFrame", frame_range[1])
+                instance.set_data("byFrameStep", frame_range[2])
+
+            for sequence in sequences:
+                member = os.path.relpath(
+                    os.path.join(sequence.dirname, str(sequence)), root)
+                self.log.info("Adding /%s" % member)
+                instance.append(member)
+
+            for path in files:
+                member = os.path.relpath(path, root)
+                self.log.info("Adding /%s" % member)
+                instance.append(member)
+
+    def frame_ranges(self, layers):
+        """Return start, end frame and step of each of `layers`, if in Maya
+
+        Render settings may be adjusted per layer, and are queried
+        with each layer active in turn. Directories other than of
+        a layer, such as outside of Maya, are given None.
+
+        """
+
+        try:
+            from maya import cmds
+        except ImportError:
+            return [None] * len(layers)
+
+        current = cmds.editRenderLayerGlobals(
+            query=True, currentRenderLayer=True)
+
+        frame_ranges = list()
+        try:
+            for layer in layers:
+                # Images of the default layer are rendered into masterLayer/
+                node = {"masterLayer": "defaultRenderLayer"}.get(layer, layer)
+
+                if not (cmds.objExists(node) and
+                        cmds.nodeType(node) == "renderLayer"):
+                    self.log.warning("No render layer found for \"%s\""
+                                     % layer)
+                    frame_ranges.append(None)
+                    continue
+
+                if node != cmds.editRenderLayerGlobals(
+                        query=True, currentRenderLayer=True):
+                    cmds.editRenderLayerGlobals(currentRenderLayer=node)
+
+                start, end, step = (
+                    int(round(cmds.getAttr("defaultRenderGlobals.%s" % attr)))
+                    for attr in ("startFrame", "endFrame", "byFrameStep"))
+
+                frame_ranges.append((start, end, max(step, 1)))
+
+        finally:
+            if current != cmds.editRenderLayerGlobals(
+                    query=True, currentRenderLayer=True):
+                cmds.editRenderLayerGlobals(currentRenderLayer=current)
 
-            root = os.path.join(layers_dir, layer)
-            for child in os.listdir(root):
-                self.log.info("Adding /%s" % child)
-                instance[:] = os.path.join(root, child)
+        return frame_ranges
@@ -1,8 +1,6 @@
 import os
-import json
 import contextlib
 
-import pyblish_maya
 import pyblish_magenta.plugin
 
 from maya import cmds
@@ -20,8 +18,14 @@ def suspension():
 class ExtractAlembic(pyblish_magenta.api.Extractor):
     """Extract Alembic Cache
 
-    This extracts an Alembic cache using the `-selection` flag to minimize
-    the extracted content to solely what was Collected into the instance.
+    This extracts an Alembic cache of the hierarchy of each node
+    Collected into the instance, using the `-root` flag, unless the
+    instance provides roots of its own as `root`. Instances without
+    any transforms fail extraction.
+
+    Instances of a common frame range and step are extracted with a
+    single call to AbcExport, one job per instance, such that the
+    timeline is evaluated once for all of them rather than once each.
 
     Arguments:
         startFrame (float): Start frame of output. Ignored if `frameRange`
@@ -128,48 +132,90 @@ class ExtractAlembic(pyblish_magenta.api.Extractor):
             "dataFormat": "ogawa"  # ogawa, hdf5
         }
 
-    def process(self, instance):
+    def process(self, context):
         # Ensure alembic exporter is loaded
         cmds.loadPlugin('AbcExport', quiet=True)
 
-        # Define extract output file path
-        temp_dir = self.temp_dir(instance)
-        # parent_dir = os.path.join(temp_dir, instance.data("name"))
-        parent_dir = temp_dir
-        filename = "{0}.abc".format(instance.name)
-        path = os.path.join(parent_dir, filename)
+        defaults = self.default_options
+
+        # Frame range and step -> instance, job string and path of each job
+        exports = dict()
+        verbose = False
+        rootless = list()
+
+        for instance in context:
+            if instance.data("family") not in self.families:
+                continue
+
+            if instance.data("publish") is False:
+                continue
+
+            # Define extract output file path
+            temp_dir = self.temp_dir(instance)
+            filename = "{0}.abc".format(instance.name)
+            path = os.path.join(temp_dir, filename)
+
+            # Alembic Exporter requires forward slashes
+            path = path.replace('\\', '/')
 
-        # Alembic Exporter requires forward slashes
-        path = path.replace('\\', '/')
+            options = dict(defaults)
+            options["userAttr"] = ("uuid",)
+            options = self.parse_overrides(instance, options)
 
-        self.log.info("Extracting alembic to: {0}".format(path))
+            # Jobs of a single export share one selection,
+            # so each is given the roots of its instance instead.
+            if options.pop("selection", None) and \
+                    instance.has_data("selection"):
+                self.log.warning("Exporting roots of %s rather than "
+                                 "the selection" % instance)
 
-        options = self.default_options
-        options["userAttr"] = ("uuid",)
-        options = self.parse_overrides(instance, options)
+            # Roots of the instance, unless overridden and valid
+            options["root"] = options.get("root") or self.roots(instance)
 
-        job_str = self.parse_options(options)
-        job_str += ' -file "{0}"'.format(path)
+            if not options["root"]:
+                self.log.error("%s has no transforms to export" % instance)
+                rootless.append(instance)
+                continue
+
+            job_str = self.parse_options(options)
+            job_str += ' -file "{0}"'.format(path)
+
+            if instance.data('verbose', False):
+                verbose = True
+                self.log.debug('Alembic job string: "{0}"'.format(job_str))
+
+            key = (options.get("frameRange"), options.get("step"))
+            exports.setdefault(key, list()).append((instance, job_str, path))
 
-        self.log.info("Extracting alembic to: {0}".format(path))
+        for (frame_range, step), jobs in exports.items():
+            self.log.info("Extracting %d alembics of frames %s in one pass"
+                          % (len(jobs), frame_range))
 
-        verbose = instance.data('verbose', False)
-        if verbose:
-            self.log.debug('Alembic job string: "{0}"'.format(job_str))
+            with suspension():
+                cmds.AbcExport(j=[job_str for _, job_str, _ in jobs],
+                               verbose=verbose)
 
-        if not os.path.exists(parent_dir):
-            os.makedirs(parent_dir)
+            for instance, _, path in jobs:
+                assert os.path.exists(path), (
+                    "Alembic of %s was not written to %s" % (instance, path))
+                self.log.info("Extracted %s to: %s" % (instance, path))
 
-        with suspension():
-            with pyblish_maya.maintained_selection():
-                self.log.debug(
-                    "Preparing %s for export using the following options: %s\n"
-                    "and the following string: %s"
-                    % (list(instance),
-                       json.dumps(options, indent=4),
-                       job_str))
-                cmds.select(instance, hierarchy=True)
-                cmds.AbcExport(j=job_str, verbose=verbose)
+        assert not rootless, "Nothing to export of %s" % ", ".join(
+            str(instance) for instance in rootless)
+
+    def roots(self, instance):
+        """Return top-most transforms of `instance`, for -root"""
+        nodes = set(cmds.ls(instance, long=True, type="transform"))
+
+        shapes = cmds.ls(instance, long=True, shapes=True)
+        if shapes:
+            nodes.update(cmds.listRelatives(shapes, parent=True,
+                                            fullPath=True) or [])
+
+        # Roots of a job mustn't be parents of one another
+        return sorted(node for node in nodes
+                      if not any(node.startswith(other + "|")
+                                 for other in nodes))
 
     def parse_overrides(self, instance, options):
         """Inspect data of instance to determine overridden options
@@ -185,14 +231,19 @@ class ExtractAlembic(pyblish_magenta.api.Extractor):
 
             # Ensure the data is of correct type
             value = instance.data(key)
-            if not isinstance(value, self.options[key]):
+            valid_types = self.options[key]
+            if not isinstance(value, valid_types):
+                if not isinstance(valid_types, tuple):
+                    valid_types = (valid_types,)
+
                 self.log.warning(
                     "Overridden attribute {key} was of "
                     "the wrong type: {invalid_type} "
                     "- should have been {valid_type}".format(
                         key=key,
                         invalid_type=type(value).__name__,
-                        valid_type=self.options[key].__name__))
+                        valid_type=" or ".join(
+                            t.__name__ for t in valid_types)))
                 continue
 
             options[key] = value
@@ -218,11 +269,11 @@ class ExtractAlembic(pyblish_magenta.api.Extractor):
                 options['frameRange'] = "%s %s" % (start_frame, end_frame)
 
         job_args = list()
-        for key, value in options.iteritems():
+        for key, value in options.items():
             if isinstance(value, (list, tuple)):
                 for entry in value:
                     job_args.append("-{0} {1}".format(key, entry))
-            if isinstance(value, bool):
+            elif isinstance(value, bool):
                 job_args.append("-{0}".format(key))
             else:
                 job_args.append("-{0} {1}".format(key, value))
@@ -8,7 +8,7 @@ class ExtractComment(pyblish_magenta.api.Extractor):
     label = "Comment"
 
     def process(self, instance):
-        dir_path = self.temp_dir(instance)
+        dir_path = self.temp_dir(instance, small=True)
         filepath = os.path.join(dir_path, "comment.txt")
 
         self.log.info("Writing comment..")
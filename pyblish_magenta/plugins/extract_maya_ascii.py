@@ -16,7 +16,7 @@ class ExtractMayaAscii(pyblish_magenta.api.Extractor):
         from maya import cmds
 
         # Define extract output file path
-        dir_path = self.temp_dir(instance)
+        dir_path = self.temp_dir(instance, small=True)
         filename = "{0}.ma".format(instance.name)
         path = os.path.join(dir_path, filename)
 
@@ -10,7 +10,7 @@ class ExtractOrigin(pyblish_magenta.api.Extractor):
     families = ["metadata"]
 
     def process(self, instance):
-        temp_dir = self.temp_dir(instance)
+        temp_dir = self.temp_dir(instance, small=True)
         temp_file = os.path.join(temp_dir, "origin.json")
 
         serialised = dict(
@@ -0,0 +1,46 @@
+import os
+import pyblish_magenta.api
+import pyblish_magenta.review
+
+
+class ExtractRenderReview(pyblish_magenta.api.Extractor):
+    """Encode each sequence of a render layer into a review movie
+
+    Movies are encoded in segments, concurrently, and published in
+    a "review" directory alongside the renders, e.g. review/beauty.mov
+    See :mod:`pyblish_magenta.review`
+
+    """
+
+    label = "Render Review"
+    families = ["renderlayer"]
+    hosts = ["maya", "standalone"]
+    optional = True
+    order = pyblish_magenta.api.Extractor.order + 0.1
+
+    def process(self, context, instance):
+        sequences = instance.data("sequences")
+        if not sequences:
+            return self.log.info("No sequences to review")
+
+        temp_dir = self.temp_dir(instance)
+        root = instance.data("path")
+        fps = context.data("fps") or 24
+
+        taken = dict()  # Directory -> names of movies
+        for sequence in sequences:
+            dirname = os.path.normpath(os.path.join(
+                temp_dir, "review", os.path.relpath(sequence.dirname, root)))
+
+            names = taken.setdefault(dirname, set())
+            name = pyblish_magenta.review.name(sequence, names)
+            names.add(name)
+
+            output = os.path.join(dirname, name)
+
+            if not os.path.isdir(os.path.dirname(output)):
+                os.makedirs(os.path.dirname(output))
+
+            self.log.info("Encoding %s to %s" % (sequence, output))
+            parts = pyblish_magenta.review.encode(sequence, output, fps)
+            self.log.info("Encoded %d segments" % len(parts))
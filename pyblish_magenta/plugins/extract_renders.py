@@ -1,6 +1,6 @@
 import os
-import shutil
 import pyblish_magenta.api
+import pyblish_magenta.transfer
 
 
 class ExtractRenders(pyblish_magenta.api.Extractor):
@@ -13,10 +13,22 @@ class ExtractRenders(pyblish_magenta.api.Extractor):
         path = instance.data("path")
 
         self.log.info("Extracting \"%s\" to \"%s\"" % (path, temp_dir))
-        for layer in os.listdir(path):
-            src = os.path.join(path, layer)
-            dst = os.path.join(temp_dir, layer)
-            shutil.copytree(src, dst)
+        # Renders may be overwritten in place by subsequent renders,
+        # so mustn't be hardlinked or moved.
+        transfer = pyblish_magenta.transfer.Transfer(strategy="reflink")
+        for sequence in instance.data("sequences"):
+            dirname = os.path.normpath(os.path.join(
+                temp_dir, os.path.relpath(sequence.dirname, path)))
+            for frame in sequence.frames():
+                transfer.add(sequence.path(frame),
+                             os.path.join(dirname, sequence.name(frame)))
+
+        for src in instance.data("files"):
+            transfer.add(src, os.path.join(
+                temp_dir, os.path.relpath(src, path)))
+
+        transfer.run()
 
         instance.set_data("extractDir", temp_dir)
-        self.log.info("Written successfully")
+        instance.set_data("extractRate", transfer.rate)
+        self.log.info("Written successfully, %s" % transfer)
@@ -0,0 +1,19 @@
+import pyblish.api
+import pyblish_magenta.plugin
+
+
+class ExtractScratchBudget(pyblish.api.Extractor):
+    """Move files extracted into memory onto disk, if over budget
+
+    Extractors spill the files of those before them as they go,
+    leaving those of the last extractor, see
+    :func:`pyblish_magenta.plugin.spill`
+
+    """
+
+    label = "Scratch Budget"
+    order = pyblish.api.Extractor.order + 0.49
+
+    def process(self, context):
+        for src, dst in sorted(pyblish_magenta.plugin.spill(context).items()):
+            self.log.info("Moved %s onto disk, into %s" % (src, dst))
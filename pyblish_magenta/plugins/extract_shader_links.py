@@ -13,7 +13,7 @@ class ExtractShaderLinks(pyblish_magenta.api.Extractor):
 
     def process(self, instance):
         self.log.info("Extracting links..")
-        temp_dir = self.temp_dir(instance)
+        temp_dir = self.temp_dir(instance, small=True)
         temp_file = os.path.join(
             temp_dir, instance.data("name") + ".json")
 
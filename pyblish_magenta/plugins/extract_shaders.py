@@ -13,7 +13,7 @@ class ExtractShaders(pyblish_magenta.api.Extractor):
     def process(self, instance):
         from maya import cmds
 
-        temp_dir = self.temp_dir(instance)
+        temp_dir = self.temp_dir(instance, small=True)
         temp_file = os.path.join(temp_dir, instance.data("name"))
         with pyblish_maya.maintained_selection():
             cmds.select(instance, noExpand=True)
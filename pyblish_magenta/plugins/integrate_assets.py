@@ -1,13 +1,42 @@
 import os
-import shutil
 
 import pyblish.api
-import pyblish_magenta.api
+import pyblish_magenta.daemon
+import pyblish_magenta.plugin
 import pyblish_magenta.schema
+import pyblish_magenta.sequence
+import pyblish_magenta.journal
+import pyblish_magenta.transfer
+import pyblish_magenta.versioning
+import pyblish_magenta.integration
+
+from pyblish_magenta.versioning import number
 
 
 class IntegrateAssets(pyblish.api.Integrator):
-    """Name and position instances on disk"""
+    """Name and position instances on disk
+
+    Each version records the size and SHA-256 of its files,
+    see :mod:`pyblish_magenta.integrity`
+
+    Set $MAGENTA_STORE to store files once per publish directory,
+    shared by every version with identical contents.
+    See :mod:`pyblish_magenta.store`
+
+    Integration interrupted half-way is resumed or rolled back
+    by the next integration, see :mod:`pyblish_magenta.journal`
+
+    Set $MAGENTA_BACKEND to store files other than on the
+    local filesystem, see :mod:`pyblish_magenta.backends`
+
+    Set $MAGENTA_STAGING to extract files straight into a staging
+    directory next to their version, published here by renaming it,
+    see :mod:`pyblish_magenta.integration`
+
+    Set $MAGENTA_BACKGROUND to integrate in a background process
+    and return to Maya immediately, see :mod:`pyblish_magenta.daemon`
+
+    """
 
     label = "Assets"
 
@@ -16,62 +45,201 @@ class IntegrateAssets(pyblish.api.Integrator):
 
         current_file = context.data("currentFile").replace("\\", "/")
         publish_dir = self.compute_publish_directory(current_file)
-        versions_dir = os.path.join(publish_dir,
-                                    instance.data("family"),
-                                    instance.data("name"))
+        context.set_data("schemaCache", pyblish_magenta.schema.stats())
+        versions_dir = pyblish_magenta.integration.versions_directory(
+            publish_dir, instance)
+
+        # Copy files/directories from the temporary
+        # extraction directory to the integration directory.
+        extract_dir = pyblish_magenta.plugin.extract_dir(instance)
+
+        if not extract_dir:
+            return self.log.debug("Skipping %s; no files found" % instance)
+
+        if instance.has_data("stagedVersion"):
+            return self.publish_staged(context, instance, versions_dir)
+
+        store = None
+        if os.environ.get("MAGENTA_STORE"):
+            store = publish_dir
+
+        # Files unchanged since the previous version are linked from there
+        previous = pyblish_magenta.versioning.latest(versions_dir)
+
+        # Complete a version interrupted whilst publishing these same files,
+        # and roll back any other interrupted version.
+        version = None
+        for pending in pyblish_magenta.journal.pending(versions_dir):
+            pending_dir = os.path.join(versions_dir, pending)
+            journal = pyblish_magenta.journal.read(pending_dir)
 
-        # Compute next version for this instance
-        try:
-            existing_versions = os.listdir(versions_dir)
-            version = pyblish_magenta.api.find_next_version(existing_versions)
-        except OSError:
-            version = 1
+            if not journal or not pyblish_magenta.journal.abandoned(journal):
+                continue  # Being published elsewhere
 
-        version = pyblish_magenta.api.format_version(version)
+            files = self.compute_files(
+                instance, extract_dir, versions_dir, pending, previous)
+            candidate = pyblish_magenta.integration.schedule(files, store)
+
+            if version is None and journal["files"] == \
+                    pyblish_magenta.journal.files(pending_dir, candidate) \
+                    and number(pending) > number(previous or "0"):
+                self.log.info("Resuming interrupted version %s" % pending)
+                version = pending
+
+            else:
+                self.log.warning("Rolling back interrupted version %s"
+                                 % pending)
+                pyblish_magenta.journal.rollback(pending_dir)
+
+        if version is None:
+            # Reserve next version for this instance
+            version = pyblish_magenta.versioning.reserve(versions_dir)
 
         version_dir = "{versions}/{version}".format(
             versions=versions_dir,
             version=version)
 
-        # Copy files/directories from the temporary
-        # extraction directory to the integration directory.
-        extract_dir = instance.data("extractDir")
+        job = {
+            "versionsDir": versions_dir,
+            "version": version,
+            "files": self.compute_files(
+                instance, extract_dir, versions_dir, version, previous),
+            "store": store,
+            "backend": os.environ.get("MAGENTA_BACKEND"),
+        }
 
-        if not extract_dir:
-            return self.log.debug("Skipping %s; no files found" % instance)
+        # Store reference for further integration
+        instance.set_data("integrationDir", version_dir)
 
-        for fname in os.listdir(extract_dir):
-            src = os.path.join(extract_dir, fname)
-            dst = version_dir
+        if os.environ.get("MAGENTA_BACKGROUND"):
+            queue = pyblish_magenta.daemon.Queue()
+
+            # Incomplete until integrated by the worker, and
+            # left alone by this process until then.
+            pyblish_magenta.journal.begin(
+                version_dir,
+                pyblish_magenta.integration.schedule(job["files"], store),
+                queue=queue.path)
+
+            # The worker removes extracted files once integrated
+            job["cleanup"] = [extract_dir]
+
+            id = queue.submit("integrate", job)
+            pyblish_magenta.daemon.spawn()
+
+            instance.set_data("publishJob", id)
+            instance.set_data("publishStatus", pyblish_magenta.daemon.QUEUED)
+
+            return self.log.info("Queued integration to directory \"%s\" "
+                                 "as job %d" % (version_dir, id))
+
+        result = pyblish_magenta.integration.integrate(job, self.log)
+        for key, value in result.items():
+            instance.set_data(key, value)
 
-            if os.path.isfile(src):
-                try:
-                    os.makedirs(dst)
-                except OSError:
-                    pass
+        if store is not None:
+            self.log.info("Reused %s of stored files"
+                          % pyblish_magenta.transfer.format_size(
+                              result["storeReused"]))
 
+        self.log.info("Integrated to directory \"{0}\"".format(version_dir))
+
+    def publish_staged(self, context, instance, versions_dir):
+        """Publish version extracted in place, see :class:`Extractor`"""
+        version = instance.data("stagedVersion")
+        staging_dir = pyblish_magenta.plugin.extract_dir(instance)
+
+        # Staged versions of a failed publish are rolled back instead,
+        # see :class:`CleanupTempdir`
+        failed = [result for result in context.data("results") or []
+                  if result.get("error")]
+        assert not failed, "Not publishing %s, %d plug-ins failed" % (
+            version, len(failed))
+
+        # Fully-qualified names, as though copied
+        renames = list()
+        for src, dst, _ in self.compute_files(
+                instance, staging_dir, versions_dir, version, None):
+            dst = os.path.join(staging_dir, os.path.basename(dst))
+            if src != dst:
+                renames.append((src, dst))
+
+        pyblish_magenta.integration.publish(versions_dir, version, renames)
+
+        version_dir = "{versions}/{version}".format(
+            versions=versions_dir,
+            version=version)
+
+        instance.set_data("integrationDir", version_dir)
+        self.log.info("Published staged version to directory \"%s\""
+                      % version_dir)
+
+    def compute_files(self, instance, extract_dir, versions_dir,
+                      version, previous):
+        """Return files of `extract_dir` to copy into `version`
+
+        Arguments:
+            instance (Instance): Instance of which files were extracted
+            extract_dir (str): Absolute path to extracted files
+            versions_dir (str): Absolute path to directory of versions
+            version (str): Version to which files are published
+            previous (str): Version from which unchanged files
+                may be linked, or None
+
+        Returns list of source, destination and counterpart
+        in `previous`, see :func:`integration.schedule`.
+
+        """
+
+        version_dir = os.path.join(versions_dir, version)
+        files = list()
+
+        fnames = os.listdir(extract_dir)
+
+        # Frames of a sequence keep their names, as they would
+        # otherwise share the fully-qualified name of the instance.
+        frames = pyblish_magenta.sequence.members(fnames)
+
+        for fname in fnames:
+            src = os.path.join(extract_dir, fname)
+            previous_dst = None
+
+            if os.path.isfile(src) and fname not in frames:
                 # Assembly fully-qualified name
                 # E.g. thedeal_seq01_1000_animation_ben01_v002.ma
-                _, ext = os.path.splitext(fname)
-                filename = "{topic}_{version}_{instance}".format(
-                    topic="_".join(os.environ["TOPICS"].split()),
-                    instance=instance.data("name"),
-                    version=version) + ext
+                dst = os.path.join(version_dir, self.compute_filename(
+                    instance, fname, version))
 
-                dst = os.path.join(dst, filename)
-                self.log.info("Copying file \"%s\" to \"%s\"" % (src, dst))
-                shutil.copy(src, dst)
+                if previous:
+                    previous_dst = os.path.join(
+                        versions_dir, previous,
+                        self.compute_filename(instance, fname, previous))
 
             else:
-                dst = os.path.join(dst, fname)
-                self.log.info("Copying directory \"%s\" to \"%s\""
-                              % (src, dst))
-                shutil.copytree(src, dst)
+                dst = os.path.join(version_dir, fname)
 
-        # Store reference for further integration
-        instance.set_data("integrationDir", version_dir)
+                if previous:
+                    previous_dst = os.path.join(versions_dir, previous, fname)
 
-        self.log.info("Integrated to directory \"{0}\"".format(version_dir))
+            files.append((src, dst, previous_dst))
+
+        return files
+
+    def compute_filename(self, instance, fname, version):
+        """Return fully-qualified name of extracted file `fname`
+
+        Arguments:
+            instance (Instance): Instance of which `fname` was extracted
+            fname (str): Name of extracted file
+            version (str): Version to which `fname` is published
+
+        """
+
+        _, ext = os.path.splitext(fname)
+        return "{topic}_{version}_{instance}".format(
+            topic="_".join(os.environ["TOPICS"].split()),
+            instance=instance.data("name"),
+            version=version) + ext
 
     def compute_publish_directory(self, path):
         """Given the current file, determine where to publish
@@ -81,24 +249,5 @@ class IntegrateAssets(pyblish.api.Integrator):
 
         """
 
-        self.log.debug("Loading schema..")
-        schema = pyblish_magenta.schema.load()
-
         self.log.debug("Parsing with current file: %s" % path)
-        data, template = schema.parse(path)
-
-        # TOPICS are a space-separated list of user-supplied topics
-        # E.g. "thedeal seq01 1000 animation"
-        task = os.environ["TOPICS"].split()[-1]
-        assert task == data["task"], (
-            "Task set in environment ({env}) is not the same as "
-            "the one parsed ({data})".format(
-                env=task,
-                data=data["task"]))
-
-        self.log.info("Retrieving template from schema..")
-        pattern = schema.get(template.name.rsplit(
-            ".work", 1)[0] + ".publish")
-
-        self.log.info("Got \"%s\": formatting with %s" % (pattern, data))
-        return pattern.format(data)
+        return pyblish_magenta.integration.publish_directory(path)
@@ -1,8 +1,8 @@
 import os
-import shutil
 
 import pyblish.api
 import pyblish_magenta.schema
+import pyblish_magenta.transfer
 
 
 @pyblish.api.log
@@ -16,7 +16,7 @@ class ConformConceptArt(pyblish.api.Conformer):
 
     families = ["conceptArt"]
 
-    def process(self, instance):
+    def process(self, context, instance):
         # in  = thedeal/dev/conceptArt/characters/ben/ben_model.png
         # out = thedeal/asset/model/characters/ben/conceptArt
         input_path = instance.data("path")
@@ -28,7 +28,8 @@ class ConformConceptArt(pyblish.api.Conformer):
             raise Exception("Missing environment variable \"PROJECTROOT\"")
 
         schema = pyblish_magenta.schema.load()
-        data, template = schema.parse(input_path)
+        data, template = pyblish_magenta.schema.parse(input_path, schema)
+        context.set_data("schemaCache", pyblish_magenta.schema.stats())
 
         self.log.info("Schema successfully parsed")
         new_name = template.name.replace('dev', 'asset')
@@ -39,12 +40,15 @@ class ConformConceptArt(pyblish.api.Conformer):
         self.log.info("Conforming %s to %s" %
                       (instance, "..." + output_path[-35:]))
 
-        if not os.path.exists(output_path):
-            os.makedirs(output_path)
+        # The original remains in use by the artist
+        transfer = pyblish_magenta.transfer.Transfer(strategy="reflink")
+        transfer.add(input_path, os.path.join(
+            output_path, os.path.basename(input_path)))
 
         try:
-            shutil.copy(input_path, output_path)
+            transfer.run()
         except:
             raise pyblish.api.ConformError("Could not conform %s" % instance)
         else:
             self.log.info("Successfully conformed %s!" % instance)
+            self.log.info("Copied %s" % transfer)
@@ -0,0 +1,63 @@
+import os
+import time
+
+import pyblish.api
+import pyblish_magenta.daemon
+
+
+class ReportPublishJobs(pyblish.api.Integrator):
+    """Report the outcome of integrations queued in the background
+
+    Each instance integrated in the background gets the status of its
+    job as "publishStatus", along with its result once done, as does
+    the wrapping of alembics of the context, see :class:`WrapAlembics`.
+    Failed jobs fail the publish. See :func:`pyblish_magenta.daemon.report`
+
+    Set $MAGENTA_BACKGROUND_WAIT to wait this many seconds for jobs
+    to finish, defaults to reporting jobs as they are.
+
+    """
+
+    label = "Background Jobs"
+    order = pyblish.api.Integrator.order + 0.2
+
+    def process(self, context):
+        ids = [instance.data("publishJob") for instance in context
+               if instance.data("publishJob") is not None]
+
+        if context.data("wrapAlembicsJob") is not None:
+            ids.append(context.data("wrapAlembicsJob"))
+
+        if not ids:
+            return self.log.debug("No jobs queued in the background")
+
+        wait = float(os.environ.get("MAGENTA_BACKGROUND_WAIT") or 0)
+        queue = pyblish_magenta.daemon.Queue()
+
+        start = time.time()
+        while time.time() - start < wait:
+            statuses = [queue.status(id)["status"] for id in ids]
+            if all(status in (pyblish_magenta.daemon.DONE,
+                              pyblish_magenta.daemon.FAILED)
+                   for status in statuses):
+                break
+            time.sleep(pyblish_magenta.daemon.INTERVAL)
+
+        failed = pyblish_magenta.daemon.report(context, queue.path)
+
+        for instance in context:
+            if instance.data("publishJob") is not None:
+                self.log.info("%s: Job %d %s" % (
+                    instance, instance.data("publishJob"),
+                    instance.data("publishStatus")))
+
+        if context.data("wrapAlembicsJob") is not None:
+            self.log.info("Wrapping alembics: Job %d %s" % (
+                context.data("wrapAlembicsJob"),
+                context.data("wrapAlembicsStatus")))
+
+        for job in failed:
+            self.log.error("Job %d failed: %s" % (job["id"], job["error"]))
+
+        assert not failed, "%d jobs failed in the background, see %s" % (
+            len(failed), queue.path)
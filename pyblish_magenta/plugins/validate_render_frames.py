@@ -0,0 +1,80 @@
+import os
+
+import pyblish.api
+import pyblish_magenta.sequence
+
+from pyblish_magenta.sequence import format_ranges
+
+
+class ValidateRenderFrames(pyblish.api.Validator):
+    """Every sequence of a render layer must be complete
+
+    Each sequence must have every frame of its layer, from its start
+    to its end frame by its frame step, such that no pass or frame is
+    missing. Layers without either, such as outside of Maya, are
+    expected from the first frame of any of their sequences to the
+    last. Frames must not be empty or rendered twice under different
+    padding, e.g. beauty.###.exr and beauty.####.exr
+
+    Images must share the resolution, channels and compression of
+    their sequence, see :class:`CollectRenderHeaders`
+
+    """
+
+    label = "Render Frames"
+    families = ["renderlayer"]
+    hosts = ["maya", "standalone"]
+
+    def process(self, instance):
+        sequences = instance.data("sequences") or []
+        if not sequences:
+            return self.log.debug("No sequences found for %s" % instance)
+
+        first = instance.data("startFrame")
+        if first is None:
+            first = min(sequence.first for sequence in sequences)
+
+        last = instance.data("endFrame")
+        if last is None:
+            last = max(sequence.last for sequence in sequences)
+
+        step = instance.data("byFrameStep") or 1
+
+        self.log.info("Validating frames %d-%d by %d of %d sequences"
+                      % (first, last, step, len(sequences)))
+
+        root = instance.data("path")
+
+        def name(sequence):
+            return os.path.relpath(
+                os.path.join(sequence.dirname, sequence.pattern), root)
+
+        errors = list()
+        for sequence in sequences:
+            gaps = pyblish_magenta.sequence.missing(
+                sequence.ranges, first, last, step)
+            if gaps:
+                errors.append("%s is missing frames %s"
+                              % (name(sequence), format_ranges(gaps)))
+
+        for a, b, ranges in pyblish_magenta.sequence.duplicates(sequences):
+            errors.append("%s and %s both have frames %s"
+                          % (name(a), name(b), format_ranges(ranges)))
+
+        for sequence, ranges in zip(
+                sequences, pyblish_magenta.sequence.empty(sequences)):
+            if ranges:
+                errors.append("%s has empty frames %s"
+                              % (name(sequence), format_ranges(ranges)))
+
+        headers = instance.data("renderHeaders") or {}
+        for pattern, summary in sorted(headers.items()):
+            if summary["differing"]:
+                errors.append("%s has frames %s unlike the rest" % (
+                    pattern, format_ranges(summary["differing"])))
+
+        for error in errors:
+            self.log.error(error)
+
+        assert not errors, "%d problems with frames of %s" % (
+            len(errors), instance)
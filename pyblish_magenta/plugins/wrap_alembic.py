@@ -14,6 +14,7 @@ import tempfile
 import subprocess
 import contextlib
 import pyblish.api
+import pyblish_magenta.daemon
 
 
 CREATE_NO_WINDOW = 0x08000000
@@ -29,6 +30,9 @@ class WrapAlembics(pyblish.api.Integrator):
     Output from this subprocess is provided as DEBUG
     log records.
 
+    Instances integrated in the background are wrapped
+    in the background too, see :mod:`pyblish_magenta.daemon`
+
     """
 
     label = "Wrap Alembics"
@@ -38,6 +42,7 @@ class WrapAlembics(pyblish.api.Integrator):
 
     def process(self, context):
         paths = list()
+        jobs = list()
         for instance in context:
             if instance.data("family") != "pointcache":
                 continue
@@ -49,36 +54,57 @@ class WrapAlembics(pyblish.api.Integrator):
 
             paths.append(integration_dir)
 
-        source = code.format(paths=json.dumps(paths))
+            if instance.has_data("publishJob"):
+                jobs.append(instance.data("publishJob"))
+
+        if jobs:
+            # Integrated in the background, wrap once integrated
+            id = pyblish_magenta.daemon.Queue().submit(
+                "wrapAlembics", {"paths": paths}, after=jobs)
+            pyblish_magenta.daemon.spawn()
+
+            context.set_data("wrapAlembicsJob", id)
+            return self.log.info("Queued wrapping of alembics as job %d" % id)
+
+        wrap(paths, self.log)
+
+
+def wrap(paths, log):
+    """Wrap alembic files of each directory in `paths` in Maya Standalone
+
+    Arguments:
+        paths (list): Absolute paths to directories of alembic files
+        log (logging.Logger): Output of Maya Standalone is logged here
+
+    """
 
-        self.log.info("Running source in Maya Standalone: %s" % source)
-        self.log.info("temp_file: %s" % temp_file)
+    source = code.format(paths=json.dumps(paths))
 
-        with temp_file(source) as filename:
-            self.log.debug("Starting subprocess..")
-            
-            # Don't include Pyblish nor Magenta
-            environment = os.environ.copy()
-            environment.pop("PYTHONPATH", None)
+    log.info("Running source in Maya Standalone: %s" % source)
 
-            popen = subprocess.Popen(["mayapy", filename],
-                                     stdout=subprocess.PIPE,
-                                     stderr=subprocess.STDOUT,
-                                     creationflags=CREATE_NO_WINDOW,
-                                     env=environment)
+    with temp_file(source) as filename:
+        log.debug("Starting subprocess..")
 
-            # Include full output, including any traceback
-            for line in iter(popen.stdout.readline, b""):
-                self.log.debug(line.strip())
+        # Don't include Pyblish nor Magenta
+        environment = os.environ.copy()
+        environment.pop("PYTHONPATH", None)
 
-            popen.communicate()  # Block till finished
+        popen = subprocess.Popen(["mayapy", filename],
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT,
+                                 creationflags=CREATE_NO_WINDOW,
+                                 env=environment)
 
-            assert popen.returncode == 0, (
-                "An error occured, see debug log messages for details")
+        # Include full output, including any traceback
+        for line in iter(popen.stdout.readline, b""):
+            log.debug(line.strip())
 
-            self.log.info("Alembics wrapped successfully")
+        popen.communicate()  # Block till finished
 
+        assert popen.returncode == 0, (
+            "An error occured, see debug log messages for details")
 
+        log.info("Alembics wrapped successfully")
 
 
 code = r"""
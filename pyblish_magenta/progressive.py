@@ -0,0 +1,429 @@
+"""Publish renders whilst frames are still being rendered
+
+Rather than copying every frame of a render layer once the last one
+has been rendered, frames are copied into a reserved version as they
+land, and the version is registered once every sequence of the layer
+has every frame of the expected range. Sequences expected of the layer
+may be given up-front, such that passes yet to start rendering are
+waited for, see :func:`publish`.
+
+Example:
+    $ python -m pyblish_magenta.progressive \\
+        /projects/thedeal/film/seq01/1000/lighting/work/maya/images/\\
+            lighting_v003/masterLayer \\
+        /projects/thedeal/film/seq01/1000/lighting/publish/\\
+            renderlayer/masterLayer \\
+        --frames 1001-1100 \\
+        --passes beauty.####.exr AOV/depth.####.exr
+
+Frames are noticed by inotify on Linux and by listing the layer
+repeatedly elsewhere, see :func:`watch`. Until complete, the version is
+journaled, such that a publish interrupted half-way is resumed by
+passing its version, see :func:`publish`, or rolled back, see :mod:`journal`.
+
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import argparse
+
+from . import journal, integrity, sequence, versioning
+from .transfer import Transfer
+
+# Seconds between polls, and for which files must remain
+# unchanged before considered landed when polling
+INTERVAL = 2.0
+
+# Names of files of renderers yet to finish writing them
+TEMPORARY = (".tmp", ".part", "~")
+
+# Polls between listings of directories watched by inotify, which
+# isn't notified of files written by other machines, e.g. over NFS
+RESCAN = 10
+
+log = logging.getLogger(__name__)
+
+
+class Poller(object):
+    """Files of directory `root` as they land, by listing it repeatedly
+
+    Files are considered landed once unchanged for `interval` seconds,
+    and land again once changed.
+
+    Arguments:
+        root (str): Absolute path to directory
+        interval (float, optional): Seconds between polls,
+            defaults to :data:`INTERVAL`
+
+    """
+
+    def __init__(self, root, interval=None):
+        self.root = root
+        self.interval = interval or INTERVAL
+        self._pending = dict()  # Path -> size and time, when first seen
+        self._landed = dict()  # Path -> size and time once landed
+        self._polled = False
+
+    def poll(self):
+        """Return files landed since the last poll"""
+        if self._polled:
+            time.sleep(self.interval)
+        self._polled = True
+
+        return self._settle(_files(self.root))
+
+    @property
+    def busy(self):
+        """Whether files have been seen that are yet to land"""
+        return bool(self._pending)
+
+    def close(self):
+        pass
+
+    def _settle(self, paths):
+        """Return those of `paths` unchanged for :attr:`interval`"""
+        landed = list()
+        now = time.time()
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._pending.pop(path, None)
+                continue
+
+            state = (stat.st_size, stat.st_mtime)
+
+            pending, seen = self._pending.get(path, (None, now))
+
+            if self._landed.get(path) == state:
+                self._pending.pop(path, None)
+
+            elif pending != state:
+                self._pending[path] = (state, now)
+
+            elif now - seen >= self.interval:
+                del self._pending[path]
+                self._landed[path] = state
+                landed.append(path)
+
+        return landed
+
+
+class Inotify(Poller):
+    """Files of directory `root` as they land, as notified by Linux
+
+    Files are considered landed once closed after writing, or moved
+    into `root`. Files present before watching began, or before their
+    directory was watched, are polled until unchanged, like :class:`Poller`.
+    So are files found by listing `root` every :data:`RESCAN` polls,
+    such as those written by render farms onto network filesystems.
+
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, root, interval=None):
+        super(Inotify, self).__init__(root, interval)
+
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"),
+                                 use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK |
+                                            self.IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self._watches = dict()  # Descriptor -> directory
+        self._check = set(self._watch(root))
+        self._polls = 0
+
+    def poll(self):
+        """Return files landed since the last poll
+
+        Waits up to :attr:`interval` seconds for files to land.
+
+        """
+
+        landed = list()
+        readable, _, _ = select.select([self._fd], [], [], self.interval)
+
+        if readable:
+            for path, mask in self._events():
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were lost, look for files anew
+                    self._check.update(_files(self.root))
+
+                elif mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._check.update(self._watch(path))
+
+                elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                    self._check.discard(path)
+                    self._pending.pop(path, None)
+                    landed.append(path)
+
+        for path in landed:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self._landed[path] = (stat.st_size, stat.st_mtime)
+
+        self._polls += 1
+        if self._polls % RESCAN == 0:
+            self._check.update(_files(self.root))
+
+        settled = self._settle(self._check)
+        self._check.difference_update(settled)
+        self._check.intersection_update(self._pending)
+
+        return sorted(set(landed + settled))
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch(self, root):
+        """Watch `root` and every directory within, return files within"""
+        files = list()
+
+        for dirname, dirs, fnames in os.walk(root):
+            path = dirname
+            if not isinstance(path, bytes):
+                path = path.encode(sys.getfilesystemencoding())
+
+            descriptor = self._libc.inotify_add_watch(
+                self._fd, path, self.MASK)
+            if descriptor >= 0:
+                self._watches[descriptor] = dirname
+
+            files.extend(os.path.join(dirname, fname) for fname in fnames)
+
+        return files
+
+    def _events(self):
+        """Yield path and mask of each event read"""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+
+        position = 0
+        while position + 16 <= len(data):
+            descriptor, mask, _, size = struct.unpack_from(
+                "iIII", data, position)
+            name = data[position + 16:position + 16 + size].rstrip(b"\0")
+            position += 16 + size
+
+            dirname = self._watches.get(descriptor)
+            if dirname is None:
+                if mask & self.IN_Q_OVERFLOW:
+                    yield None, mask
+                continue
+
+            if not isinstance(dirname, bytes):
+                name = name.decode(sys.getfilesystemencoding())
+
+            yield os.path.join(dirname, name), mask
+
+
+def watch(root, interval=None):
+    """Return watcher of files landing in `root`
+
+    Uses inotify on Linux and polling elsewhere, or where inotify
+    is unavailable, such as when out of watches.
+
+    """
+
+    if sys.platform.startswith("linux"):
+        try:
+            return Inotify(root, interval)
+        except (OSError, AttributeError) as e:
+            log.warning("Polling %s, inotify unavailable: %s" % (root, e))
+
+    return Poller(root, interval)
+
+
+def publish(layer_dir, versions_dir, first, last,
+            version=None, timeout=None, watcher=None, passes=None):
+    """Copy frames of `layer_dir` into a version as they land
+
+    The version is registered once every sequence of the layer has
+    every frame from `first` to `last`. Files are copied relative
+    `layer_dir`, e.g. AOV/depth.1001.exr into <version>/AOV/depth.1001.exr
+
+    Sequences are expected as they are noticed, unless given as
+    `passes`, and the layer is considered complete only once no
+    more files are landing, such that passes starting late are
+    included nonetheless. Given `passes`, other files are copied
+    but not waited for.
+
+    Arguments:
+        layer_dir (str): Absolute path to directory being rendered into
+        versions_dir (str): Absolute path to directory of versions
+        first (int): First frame expected of every sequence
+        last (int): Last frame expected of every sequence
+        version (str, optional): Version of an interrupted publish
+            to resume, defaults to reserving the next version
+        timeout (float, optional): Give up after this many seconds
+            without any frame landing, defaults to waiting forever
+        watcher (Poller, optional): Defaults to :func:`watch`
+        passes (list, optional): Sequences expected, relative
+            `layer_dir`, e.g. ["beauty.####.exr", "AOV/depth.####.exr"]
+
+    Returns name of version.
+
+    """
+
+    if version is None:
+        version = versioning.reserve(versions_dir)
+
+    version_dir = os.path.join(versions_dir, version)
+
+    # Incomplete until every frame has landed
+    journal.begin(version_dir, None)
+
+    watcher = watcher or watch(layer_dir)
+    checksums = dict()  # Destination -> destination, size and SHA-256
+    frames = dict()  # Directory, head and tail -> frames in range
+    expected = last - first + 1
+
+    for pattern in passes or []:
+        key = _sequence(pattern.replace("#", "0"))
+        if key is None:
+            raise ValueError("%s is not a sequence, e.g. beauty.####.exr"
+                             % pattern)
+        frames[key] = set()
+
+    def complete():
+        return frames and all(len(found) >= expected
+                              for found in frames.values())
+
+    log.info("Publishing frames %d-%d of %s into %s"
+             % (first, last, layer_dir, version_dir))
+
+    try:
+        since = time.time()
+        while True:
+            paths = [path for path in watcher.poll()
+                     if not os.path.basename(path).startswith(".")
+                     and not path.endswith(TEMPORARY)]
+
+            if not paths:
+                if complete() and not watcher.busy:
+                    break
+
+                if timeout is not None and time.time() - since > timeout:
+                    raise RuntimeError("No frames landed in %s for %ds"
+                                       % (layer_dir, timeout))
+                continue
+
+            since = time.time()
+
+            # Renders may be overwritten in place, so mustn't be hardlinked
+            transfer = Transfer(strategy="reflink", checksum=True,
+                                resume=True)
+
+            for path in paths:
+                relpath = os.path.relpath(path, layer_dir)
+
+                try:
+                    transfer.add(path, os.path.join(version_dir, relpath))
+                except OSError:
+                    continue  # Removed since landing
+
+                match = sequence.FRAME.match(os.path.basename(path))
+                if match is None:
+                    continue
+
+                key = _sequence(relpath)
+                if passes and key not in frames:
+                    continue  # Not expected, e.g. a stray image
+
+                frame = int(match.group("frame"))
+                if first <= frame <= last:
+                    frames.setdefault(key, set()).add(frame)
+
+            transfer.run()
+
+            for dst, size, sha256 in transfer.checksums():
+                checksums[dst] = (dst, size, sha256)
+
+            log.info("Copied %d frames, %s" % (len(paths), transfer))
+
+    finally:
+        watcher.close()
+
+    # Record what was published, for later verification
+    integrity.write(version_dir, sorted(checksums.values()))
+
+    journal.commit(version_dir)
+    versioning.register(versions_dir, version)
+
+    log.info("Published %s" % version_dir)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pyblish_magenta.progressive",
+        description="Publish frames of a render layer as they land")
+    parser.add_argument("layer", help="Directory being rendered into")
+    parser.add_argument("versions", help="Directory of versions")
+    parser.add_argument("--frames", required=True,
+                        help="Expected frames, e.g. 1001-1100")
+    parser.add_argument("--passes", nargs="+",
+                        help="Expected sequences, e.g. AOV/depth.####.exr")
+    parser.add_argument("--version",
+                        help="Resume interrupted version, e.g. v003")
+    parser.add_argument("--timeout", type=float,
+                        help="Give up after this many seconds without frames")
+
+    args = parser.parse_args(argv)
+    first, _, last = args.frames.partition("-")
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    publish(args.layer, args.versions, int(first), int(last or first),
+            version=args.version, timeout=args.timeout, passes=args.passes)
+
+
+def _sequence(relpath):
+    """Return directory, head and tail of file `relpath`, if numbered"""
+    relpath = os.path.normpath(relpath)
+    match = sequence.FRAME.match(os.path.basename(relpath))
+    if match is None:
+        return None
+
+    return (os.path.dirname(relpath),) + match.group("head", "tail")
+
+
+def _files(root):
+    for dirname, dirs, fnames in os.walk(root):
+        for fname in fnames:
+            yield os.path.join(dirname, fname)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Review movies of image sequences
+
+Sequences are encoded in segments of frames, each by an ffmpeg process
+of its own, concurrently, and the segments joined without encoding
+them again, such that encoding scales with the number of cores.
+
+Configuration:
+    $MAGENTA_FFMPEG: Executable of ffmpeg, defaults to ffmpeg on $PATH
+
+Example:
+    >>> segments([(1001, 1100)], 4)
+    [(1001, 1025), (1026, 1050), (1051, 1075), (1076, 1100)]
+
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+import multiprocessing
+
+from multiprocessing.pool import ThreadPool
+
+# Unless $MAGENTA_FFMPEG
+FFMPEG = "ffmpeg"
+
+# Fewest frames worth a process of their own
+MIN_FRAMES = 24
+
+# Encoding of every segment, such that segments may be joined as-is
+CODEC = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "18"]
+
+# Images of odd width or height, cropped to even, as required by yuv420p
+SCALE = ["-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2"]
+
+
+def segments(ranges, count, minimum=1):
+    """Split `ranges` of frames into about `count` consecutive segments
+
+    Segments are of similar size, of at least `minimum` frames, and
+    never span frames missing in between `ranges`.
+
+    Example:
+        >>> segments([(1, 10), (15, 16)], 3)
+        [(1, 4), (5, 8), (9, 10), (15, 16)]
+
+    """
+
+    total = sum(last - first + 1 for first, last in ranges)
+    count = max(1, min(count, total // max(minimum, 1)))
+    size = -(-total // count)  # Rounded up
+
+    found = list()
+    for first, last in ranges:
+        for start in range(first, last + 1, size):
+            found.append((start, min(start + size - 1, last)))
+
+    return found
+
+
+def encode(sequence, output, fps=24, workers=None):
+    """Encode `sequence` into movie at `output`
+
+    Arguments:
+        sequence (Sequence): Images to encode,
+            see :mod:`pyblish_magenta.sequence`
+        output (str): Absolute path to movie, e.g. /review/beauty.mov
+        fps (float, optional): Frames per second of movie
+        workers (int, optional): Number of segments encoded at once,
+            defaults to the number of cores
+
+    Returns segments encoded.
+
+    """
+
+    workers = workers or multiprocessing.cpu_count()
+    parts = segments(sequence.ranges, workers, MIN_FRAMES)
+
+    # Cores are shared by the encoders of every segment
+    threads = max(1, multiprocessing.cpu_count() // len(parts))
+
+    tempdir = tempfile.mkdtemp(dir=os.path.dirname(output))
+
+    try:
+        commands = list()
+        for index, (first, last) in enumerate(parts):
+            segment = os.path.join(tempdir, "%04d.mov" % index)
+            commands.append(
+                command(sequence, first, last, fps, threads, segment))
+
+        pool = ThreadPool(min(len(commands), workers))
+        try:
+            pool.map(_run, commands, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        playlist = os.path.join(tempdir, "segments.txt")
+        with open(playlist, "w") as f:
+            for cmd in commands:
+                f.write("file '%s'\n" % os.path.basename(cmd[-1]))
+
+        _run([_ffmpeg(), "-y", "-loglevel", "error",
+              "-f", "concat", "-safe", "0", "-i", playlist,
+              "-c", "copy", output])
+
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+    return parts
+
+
+def command(sequence, first, last, fps, threads, output):
+    """Return ffmpeg command encoding frames `first` to `last`"""
+    cmd = [_ffmpeg(), "-y", "-loglevel", "error"]
+
+    if sequence.tail.lower().endswith(".exr"):
+        # Linear images, as seen on screen
+        cmd += ["-apply_trc", "iec61966_2_1"]
+
+    pattern = "%s%%0%dd%s" % (sequence.head.replace("%", "%%"),
+                              sequence.padding,
+                              sequence.tail.replace("%", "%%"))
+
+    cmd += ["-framerate", str(fps),
+            "-start_number", str(first),
+            "-i", os.path.join(sequence.dirname, pattern),
+            "-frames:v", str(last - first + 1),
+            "-threads", str(threads)]
+
+    return cmd + SCALE + CODEC + [output]
+
+
+def name(sequence, taken=()):
+    """Return name of movie of `sequence`, unlike any of `taken`
+
+    Movies are named after the sequence, followed by its padding
+    where sequences differ by padding alone, e.g. beauty_3.mov
+    for beauty.###.exr alongside beauty.####.exr
+
+    """
+
+    head = sequence.head.rstrip("._-") or "review"
+
+    candidate = head + ".mov"
+    if candidate in taken:
+        candidate = "%s_%d.mov" % (head, sequence.padding)
+
+    count = 2
+    while candidate in taken:
+        candidate = "%s_%d_%d.mov" % (head, sequence.padding, count)
+        count += 1
+
+    return candidate
+
+
+def _ffmpeg():
+    """Return executable of $MAGENTA_FFMPEG, read on each call"""
+    return os.environ.get("MAGENTA_FFMPEG") or FFMPEG
+
+
+def _run(cmd):
+    process = subprocess.Popen(cmd,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+
+    if process.returncode != 0:
+        raise RuntimeError("%s failed: %s" % (
+            " ".join(cmd), output.decode("utf-8", "replace")))
@@ -1,18 +1,317 @@
 import os
+import sys
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+import collections
+
 import lucidity
 
+log = logging.getLogger("pyblish_magenta.schema")
+
+
+self = sys.modules[__name__]
+self._cache = dict()  # abspath -> [(mtime, size), schema, matcher]
+self._lock = threading.Lock()
+self._hits = 0
+self._misses = 0
+self._disk_hits = 0
+
 
-def load():
-    """Load schema from project `project`
+def path():
+    """Return absolute path to the schema of the current project
 
     Schemas are assumed to be located within a /database
-    subdirectory of `project`.
+    subdirectory of $PROJECTROOT.
+
+    """
+
+    project = os.environ["PROJECTROOT"]
+    return os.path.join(project, "database", "schema.yaml")
+
+
+def load(abspath=None):
+    """Load schema of the current project
+
+    Schemas are parsed once per process and cached on their
+    absolute path. The cache is invalidated whenever the
+    modification time or size of the file on disk changes,
+    or explicitly via :func:`invalidate`.
 
     Arguments:
-        project (str): Absolute path to project
+        abspath (str, optional): Absolute path to schema, defaults
+            to the schema of the current project, see :func:`path`
+
+    Schemas not yet parsed by this process are looked up in the
+    on-disk cache, see :func:`cache_dir`, before falling back
+    to parsing YAML.
 
     """
 
-    project = os.environ["PROJECTROOT"]
-    abspath = os.path.join(project, "database", "schema.yaml")
-    return lucidity.Schema.from_yaml(abspath)
+    abspath = os.path.abspath(abspath or path())
+    stat = os.stat(abspath)
+    key = (stat.st_mtime, stat.st_size)
+
+    with self._lock:
+        cached = self._cache.get(abspath)
+        if cached is not None and cached[0] == key:
+            self._hits += 1
+            return cached[1]
+
+        self._misses += 1
+
+    schema = _load_compiled(abspath)
+
+    with self._lock:
+        self._cache[abspath] = [key, schema, None]
+
+    return schema
+
+
+def cache_dir():
+    """Return directory of compiled schemas
+
+    Defaults to a directory in the home directory of the current
+    user, and may be overridden via $MAGENTA_CACHE_DIR.
+
+    """
+
+    return os.environ.get("MAGENTA_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".pyblish_magenta", "cache")
+
+
+def _load_compiled(abspath):
+    """Load schema from its compiled counterpart, compiling as necessary
+
+    Compiled schemas are pickled alongside the hash of the YAML they were
+    compiled from and only used if the hash of the YAML on disk matches.
+
+    """
+
+    with open(abspath, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+
+    compiled = os.path.join(cache_dir(), "schema_%s_py%d.pickle" % (
+        hashlib.sha1(abspath.encode("utf-8")).hexdigest(),
+        sys.version_info[0]))
+
+    try:
+        with open(compiled, "rb") as f:
+            cached_digest, schema = pickle.load(f)
+    except Exception:
+        cached_digest = None
+
+    if cached_digest == digest:
+        with self._lock:
+            self._disk_hits += 1
+        return schema
+
+    schema = lucidity.Schema.from_yaml(abspath)
+
+    # Write to a temporary file first, such that concurrent
+    # processes never read a partially written file.
+    temp = None
+    try:
+        if not os.path.isdir(os.path.dirname(compiled)):
+            os.makedirs(os.path.dirname(compiled))
+
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(compiled))
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((digest, schema), f, pickle.HIGHEST_PROTOCOL)
+
+        if os.path.exists(compiled) and os.name == "nt":
+            os.remove(compiled)  # Windows won't rename over existing files
+        os.rename(temp, compiled)
+
+    except Exception as e:
+        log.warning("Could not cache schema to %s: %s" % (compiled, e))
+
+        if temp and os.path.exists(temp):
+            os.remove(temp)
+
+    return schema
+
+
+def invalidate(abspath=None):
+    """Forget cached schemas
+
+    Arguments:
+        abspath (str, optional): Only forget the schema at this path,
+            defaults to forgetting every cached schema.
+
+    """
+
+    with self._lock:
+        if abspath is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(os.path.abspath(abspath), None)
+
+
+def stats():
+    """Return number of cache hits and misses since startup
+
+    Misses satisfied by the on-disk cache are counted as `disk`.
+
+    Example:
+        >> stats()
+        {'hits': 39, 'misses': 1, 'disk': 1}
+
+    """
+
+    with self._lock:
+        return {"hits": self._hits,
+                "misses": self._misses,
+                "disk": self._disk_hits}
+
+
+def matcher(schema=None):
+    """Return the compiled :class:`Matcher` of `schema`
+
+    Arguments:
+        schema (lucidity.Schema, optional): Schema previously returned
+            by :func:`load`, defaults to the schema of the current project
+
+    """
+
+    if schema is None:
+        schema = load()
+
+    with self._lock:
+        for entry in self._cache.values():
+            if entry[1] is schema:
+                break
+        else:
+            return Matcher.from_schema(schema)
+
+        if entry[2] is None:
+            entry[2] = Matcher.from_schema(schema)
+
+        return entry[2]
+
+
+def parse(path, schema=None):
+    """Parse `path` with the first matching template of `schema`
+
+    Equivalent to `schema.parse(path)`, but using the compiled
+    matcher of `schema` and its cache of previously parsed paths.
+
+    Returns tuple of (data, template)
+
+    """
+
+    return matcher(schema).parse(path)
+
+
+def parse_many(paths, schema=None):
+    """Parse each of `paths`, see :func:`parse`
+
+    Returns list of (data, template), in the order of `paths`
+
+    """
+
+    return matcher(schema).parse_many(paths)
+
+
+class Matcher(object):
+    """Parse paths against a sequence of templates
+
+    The regular expression of each template is compiled once, up front,
+    and used to rule out templates that cannot match before handing the
+    path to lucidity. Paths are then parsed by lucidity itself, such that
+    results are identical to those of `lucidity.parse()`.
+
+    The most recently parsed paths are remembered.
+
+    Arguments:
+        templates (list): Templates, in the order they should be tried
+        size (int, optional): Maximum number of remembered paths
+        fallback (callable, optional): Used in place of `templates`
+            when none are available, e.g. `schema.parse`
+
+    Example:
+        >> matcher = Matcher([model, rig])
+        >> data, template = matcher.parse("/projects/thedeal/assets/ben")
+
+    """
+
+    def __init__(self, templates, size=16384, fallback=None):
+        self._templates = list()
+        self._fallback = fallback
+        self._parsed = collections.OrderedDict()
+        self._size = size
+        self._lock = threading.Lock()
+
+        for template in templates:
+            try:
+                regex = template._construct_regular_expression(
+                    template.expanded_pattern())
+            except Exception:
+                # Always let lucidity decide
+                regex = None
+
+            self._templates.append((template, regex))
+
+    @classmethod
+    def from_schema(cls, schema):
+        templates = getattr(schema, "templates", None)
+        if templates is None:
+            return cls(list(), fallback=schema.parse)
+        if isinstance(templates, dict):
+            templates = templates.values()
+        return cls(templates)
+
+    def parse(self, path):
+        with self._lock:
+            try:
+                result = self._parsed.pop(path)
+            except KeyError:
+                result = None
+            else:
+                self._parsed[path] = result
+
+        if result is None:
+            result = self._parse(path)
+
+            with self._lock:
+                self._parsed[path] = result
+                while len(self._parsed) > self._size:
+                    self._parsed.popitem(last=False)
+
+        data, template = result
+        if template is None:
+            raise lucidity.ParseError(
+                "Path %r did not match any of the supplied "
+                "template patterns." % path)
+
+        # Parsed data is mutable, don't let callers alter the cache
+        return _copy(data), template
+
+    def parse_many(self, paths):
+        return [self.parse(path) for path in paths]
+
+    def _parse(self, path):
+        if self._fallback is not None:
+            try:
+                return self._fallback(path)
+            except lucidity.ParseError:
+                return None, None
+
+        for template, regex in self._templates:
+            if regex is not None and not regex.search(path):
+                continue
+
+            try:
+                return template.parse(path), template
+            except lucidity.ParseError:
+                continue
+
+        return None, None
+
+
+def _copy(data):
+    """Copy nested dictionaries of parsed data, faster than deepcopy"""
+    return dict((key, _copy(value) if isinstance(value, dict) else value)
+                for key, value in data.items())
@@ -0,0 +1,196 @@
+"""Scratch space for extracted files
+
+Small outputs, such as comments and Maya ASCII files, are extracted
+into memory, e.g. tmpfs at /dev/shm, until a budget is reached, and
+spill onto disk thereafter, see :func:`enforce`. Large outputs are
+always extracted to disk.
+
+Directories are removed in the background, such that cleaning up
+never blocks publishing, see :func:`remove`.
+
+Configuration:
+    $MAGENTA_SCRATCH_RAM: Directory in memory, defaults to /dev/shm
+        where available. Set to an empty string to disable.
+    $MAGENTA_SCRATCH_BUDGET: Bytes in memory per process, e.g. "256M"
+
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+from .transfer import parse_size
+
+# Unless $MAGENTA_SCRATCH_RAM, see :func:`_ramdisk`
+RAMDISK = "/dev/shm" if sys.platform.startswith("linux") else ""
+
+# Bytes, unless $MAGENTA_SCRATCH_BUDGET, e.g. "1G"
+BUDGET = 256 * 1024 ** 2
+
+PREFIX = "magenta_"
+TRASH = "magenta_trash_"
+
+self = sys.modules[__name__]
+self._memory = list()  # Directories in memory
+self._threads = list()  # Directories being removed
+self._lock = threading.Lock()
+self._purged = False
+
+
+def mkdtemp(small=False):
+    """Create a directory for extracted files and return its path
+
+    Arguments:
+        small (bool, optional): Whether outputs are small enough
+            for memory, budget permitting
+
+    """
+
+    with self._lock:
+        ramdisk = _ramdisk()
+        if small and ramdisk and os.path.isdir(ramdisk) \
+                and usage() < _budget():
+            path = tempfile.mkdtemp(prefix=PREFIX, dir=ramdisk)
+            self._memory.append(path)
+            return path
+
+    return tempfile.mkdtemp(prefix=PREFIX)
+
+
+def in_memory(path):
+    """Return whether `path` was created in memory"""
+    return path in self._memory
+
+
+def usage():
+    """Return bytes in memory, of directories not yet removed"""
+    return sum(_size(path) for path in list(self._memory))
+
+
+def enforce(paths):
+    """Spill those of `paths` in memory onto disk whilst over budget
+
+    Outputs are only known once written, such that directories
+    deemed small when created may outgrow the budget thereafter.
+    The largest directories are spilled first.
+
+    Returns original and new path of each directory spilled.
+
+    """
+
+    sizes = [(_size(path), path) for path in paths if in_memory(path)]
+    total = usage()
+    budget = _budget()
+
+    spilled = list()
+    for size, path in sorted(sizes, reverse=True):
+        if total <= budget:
+            break
+
+        spilled.append((path, spill(path)))
+        total -= size
+
+    return spilled
+
+
+def spill(path):
+    """Move directory `path` from memory onto disk and return its new path"""
+    dst = tempfile.mkdtemp(prefix=PREFIX)
+
+    for fname in os.listdir(path):
+        shutil.move(os.path.join(path, fname), dst)
+
+    remove(path)
+    return dst
+
+
+def remove(path):
+    """Remove directory `path` in the background
+
+    The directory is first renamed, such that it is gone from `path`
+    immediately. Leftovers of processes exiting before having
+    removed everything are removed by the next process.
+
+    Returns the thread removing `path`.
+
+    """
+
+    with self._lock:
+        if path in self._memory:
+            self._memory.remove(path)
+
+    trash = os.path.join(os.path.dirname(path),
+                         TRASH + os.path.basename(path))
+
+    try:
+        os.rename(path, trash)
+    except OSError:
+        trash = path
+
+    paths = [trash]
+    if not self._purged:
+        self._purged = True
+        paths.extend(_leftovers())
+
+    thread = threading.Thread(target=_rmtree, args=(paths,))
+    thread.daemon = True
+    thread.start()
+
+    self._threads.append(thread)
+    return thread
+
+
+def wait(timeout=None):
+    """Block until every directory has been removed"""
+    while self._threads:
+        self._threads.pop().join(timeout)
+
+
+def _size(path):
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for fname in files:
+            try:
+                size += os.path.getsize(os.path.join(root, fname))
+            except OSError:
+                pass
+    return size
+
+
+def _ramdisk():
+    """Return directory in memory, of $MAGENTA_SCRATCH_RAM
+
+    Read on each call, as the environment may change in between
+    publishes of a running host. Defaults to :data:`RAMDISK`.
+
+    """
+
+    return os.environ.get("MAGENTA_SCRATCH_RAM", RAMDISK)
+
+
+def _budget():
+    """Return bytes permitted in memory, of $MAGENTA_SCRATCH_BUDGET"""
+    budget = os.environ.get("MAGENTA_SCRATCH_BUDGET")
+    return BUDGET if budget is None else parse_size(budget)
+
+
+def _rmtree(paths):
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _leftovers():
+    """Return trash of previous processes"""
+    leftovers = list()
+    for root in set(filter(None, (_ramdisk(), tempfile.gettempdir()))):
+        try:
+            fnames = os.listdir(root)
+        except OSError:
+            continue
+
+        leftovers.extend(os.path.join(root, fname) for fname in fnames
+                         if fname.startswith(TRASH))
+
+    return leftovers
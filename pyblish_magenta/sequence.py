@@ -0,0 +1,543 @@
+"""Image sequences
+
+Files numbered by frame are grouped into sequences, such that thousands
+of rendered frames are handled as a handful of sequences, each with a
+compact set of frame ranges.
+
+Render layers are collected concurrently, and collected again only once
+modified, see :func:`scan`.
+
+Configuration:
+    $MAGENTA_SCAN_WORKERS: Number of directories collected at once
+
+Example:
+    >>> seq = Sequence.from_frames("/renders", "beauty.", ".exr", 4,
+    ...                            [1001, 1002, 1003, 1005])
+    >>> str(seq)
+    'beauty.####.exr 1001-1003, 1005'
+    >>> len(seq)
+    4
+    >>> seq.path(1005).replace("\\\\", "/")
+    '/renders/beauty.1005.exr'
+
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+
+from stat import S_ISDIR
+from multiprocessing.pool import ThreadPool
+
+# Render layers collected at once, unless $MAGENTA_SCAN_WORKERS,
+# see :func:`concurrency`
+WORKERS = 8
+
+# Frames queried by each worker at a time, see :func:`empty`
+CHUNK = 1000
+
+# Seconds within which modifications may go unnoticed, see :func:`_unchanged`
+PRECISION = 2
+
+# Last number of a filename before its extension, e.g. beauty.1001.exr
+# or beauty.1001.jp2, where the extension is not itself a number
+FRAME = re.compile(r"^(?P<head>.*?)(?P<frame>\d+)"
+                   r"(?P<tail>\D*(?:\.[^.]*[^.\d][^.]*)?)$")
+
+self = sys.modules[__name__]
+self._snapshots = dict()  # Root -> directories, sequences and files
+self._lock = threading.Lock()
+
+
+class Sequence(object):
+    """Files of a single directory, differing only by frame number
+
+    Arguments:
+        dirname (str): Absolute path to directory of files
+        head (str): Name up until the frame number, e.g. "beauty."
+        tail (str): Name following the frame number, e.g. ".exr"
+        padding (int): Number of digits of each frame number
+        ranges (list): First and last frame of each range of frames
+        empty (list, optional): Ranges of frames of empty files,
+            if known, such as when collected, see :func:`empty`
+
+    """
+
+    def __init__(self, dirname, head, tail, padding, ranges, empty=None):
+        self.dirname = dirname
+        self.head = head
+        self.tail = tail
+        self.padding = padding
+        self.ranges = ranges
+        self.empty = empty
+
+    @classmethod
+    def from_frames(cls, dirname, head, tail, padding, frames):
+        """Return sequence of `frames`, in any order"""
+        return cls(dirname, head, tail, padding, to_ranges(frames))
+
+    def __str__(self):
+        return "%s %s" % (self.pattern, format_ranges(self.ranges))
+
+    def __repr__(self):
+        return "Sequence(%r)" % str(self)
+
+    def __len__(self):
+        return sum(last - first + 1 for first, last in self.ranges)
+
+    def __iter__(self):
+        """Yield absolute path to each file, in order of frame"""
+        for frame in self.frames():
+            yield self.path(frame)
+
+    @property
+    def pattern(self):
+        """Name of files, with frame numbers as #, e.g. beauty.####.exr"""
+        return self.head + "#" * self.padding + self.tail
+
+    @property
+    def first(self):
+        return self.ranges[0][0]
+
+    @property
+    def last(self):
+        return self.ranges[-1][1]
+
+    def frames(self):
+        """Yield each frame, in order"""
+        for first, last in self.ranges:
+            for frame in range(first, last + 1):
+                yield frame
+
+    def name(self, frame):
+        """Return name of file of `frame`"""
+        return "%s%0*d%s" % (self.head, self.padding, frame, self.tail)
+
+    def path(self, frame):
+        """Return absolute path to file of `frame`"""
+        return os.path.join(self.dirname, self.name(frame))
+
+
+def scan(roots, workers=None):
+    """Return sequences and remaining files of each of `roots`
+
+    Roots are collected concurrently, see :func:`collect`.
+
+    Arguments:
+        roots (list): Absolute paths to directories, e.g. render layers
+        workers (int, optional): Number of roots collected at once,
+            defaults to $MAGENTA_SCAN_WORKERS or 8
+
+    """
+
+    if not roots:
+        return list()
+
+    pool = ThreadPool(min(len(roots), workers or concurrency()))
+    try:
+        return pool.map(collect, roots, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def collect(root):
+    """Return sequences and remaining files at or below `root`
+
+    Each directory is listed once, along with the size of each
+    file, see :func:`_entries`, such that empty frames are known
+    without further queries, see :func:`empty`. Numbered files
+    without siblings are considered files.
+
+    The result is kept for as long as the modification time of
+    every directory remains unchanged, such that collecting again,
+    e.g. when publishing anew, takes a single query per directory.
+
+    Returns sorted list of sequences and sorted list of absolute
+    paths to remaining files.
+
+    """
+
+    with self._lock:
+        snapshot = self._snapshots.get(root)
+
+    if snapshot is not None and _unchanged(snapshot):
+        return list(snapshot["sequences"]), list(snapshot["files"])
+
+    snapshot = _collect(root)
+
+    with self._lock:
+        self._snapshots[root] = snapshot
+
+    return list(snapshot["sequences"]), list(snapshot["files"])
+
+
+def _collect(root):
+    groups = dict()  # (dirname, head, tail) -> padding -> frames
+    empties = dict()  # (dirname, head, tail) -> digits and frame
+    files = list()
+    mtimes = {root: os.stat(root).st_mtime}
+    taken = time.time()
+
+    directories = [root]
+    while directories:
+        dirname = directories.pop()
+
+        for name, mtime, size in _entries(dirname):
+            if mtime is not None:
+                path = os.path.join(dirname, name)
+                mtimes[path] = mtime
+                directories.append(path)
+                continue
+
+            match = FRAME.match(name)
+            if match is None:
+                files.append(os.path.join(dirname, name))
+                continue
+
+            head, frame, tail = match.group("head", "frame", "tail")
+            paddings = groups.setdefault((dirname, head, tail), dict())
+            paddings.setdefault(len(frame), list()).append(int(frame))
+
+            if not size:
+                empties.setdefault((dirname, head, tail), set()).add(
+                    (len(frame), int(frame)))
+
+    sequences = list()
+    for key, paddings in _merge(groups).items():
+        dirname, head, tail = key
+        zero = empties.get(key, ())
+
+        for padding, frames in paddings:
+            if len(frames) > 1:
+                # Digits of frames outgrowing their padding, see :func:`_merge`
+                empty = [frame for frame in frames if zero and
+                         (max(padding, len(str(frame))), frame) in zero]
+
+                sequences.append(Sequence(
+                    dirname, head, tail, padding, to_ranges(frames),
+                    to_ranges(empty)))
+            else:
+                files.append(os.path.join(
+                    dirname, "%s%0*d%s" % (head, padding, frames[0], tail)))
+
+    sequences.sort(key=lambda seq: (seq.dirname, seq.pattern))
+
+    return {
+        "mtimes": mtimes,
+        "taken": taken,
+        "sequences": sequences,
+        "files": sorted(files),
+    }
+
+
+def _merge(groups):
+    """Merge frames outgrowing their padding into the padding before
+
+    Frames of a sequence padded to 4 digits beyond frame 9999, such as
+    beauty.10000.exr, are of the same sequence as beauty.9999.exr,
+    whereas beauty.00999.exr is not. Likewise for unpadded sequences.
+
+    Returns padding and frames of each sequence, per name.
+
+    """
+
+    merged = dict()
+    for key, paddings in groups.items():
+        sequences = merged[key] = list()
+
+        for padding in sorted(paddings):
+            frames = paddings[padding]
+
+            if sequences:
+                # Frames without leading zeros, padded by their size alone
+                smallest = 10 ** (padding - 1)
+                sequences[-1][1].extend(f for f in frames if f >= smallest)
+                frames = [f for f in frames if f < smallest]
+
+            if frames:
+                sequences.append((padding, frames))
+
+    return merged
+
+
+def _unchanged(snapshot):
+    """Return whether directories of `snapshot` remain as they were
+
+    Directories modified shortly before the snapshot was taken may
+    be modified again without their time changing, depending on
+    the precision of the filesystem, and are never considered
+    unchanged.
+
+    """
+
+    for dirname, mtime in snapshot["mtimes"].items():
+        if mtime > snapshot["taken"] - PRECISION:
+            return False
+
+        try:
+            if os.stat(dirname).st_mtime != mtime:
+                return False
+        except OSError:
+            return False
+
+    return True
+
+
+def members(fnames):
+    """Return those of `fnames` numbered alongside others, i.e. frames
+
+    Example:
+        >>> sorted(members(["a.1.exr", "a.2.exr", "ben_v002.ma", "b.txt"]))
+        ['a.1.exr', 'a.2.exr']
+        >>> sorted(members(["c.0001.jp2", "c.0002.jp2", "d.0001.mp4"]))
+        ['c.0001.jp2', 'c.0002.jp2']
+
+    """
+
+    groups = dict()
+    for fname in fnames:
+        match = FRAME.match(fname)
+        if match is not None:
+            key = match.group("head", "tail")
+            groups.setdefault(key, list()).append(fname)
+
+    return set(fname for group in groups.values() if len(group) > 1
+               for fname in group)
+
+
+def to_ranges(frames):
+    """Return first and last frame of each consecutive range of `frames`
+
+    Example:
+        >>> to_ranges([5, 1, 2, 3, 8, 7])
+        [(1, 3), (5, 5), (7, 8)]
+
+    """
+
+    ranges = list()
+    for frame in sorted(set(frames)):
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], frame)
+        else:
+            ranges.append((frame, frame))
+    return ranges
+
+
+def format_ranges(ranges):
+    """Return human-readable `ranges`
+
+    Example:
+        >>> format_ranges([(1001, 3000), (3002, 3002)])
+        '1001-3000, 3002'
+
+    """
+
+    return ", ".join("%d-%d" % (first, last) if first != last
+                     else "%d" % first for first, last in ranges)
+
+
+def missing(ranges, first=None, last=None, step=1):
+    """Return ranges of frames from `first` to `last` not in `ranges`
+
+    Arguments:
+        ranges (list): Sorted ranges, see :func:`to_ranges`
+        first (int, optional): Defaults to the first frame of `ranges`
+        last (int, optional): Defaults to the last frame of `ranges`
+        step (int, optional): Expect every `step` frame from `first`
+
+    Example:
+        >>> missing([(1, 3), (5, 5), (8, 9)])
+        [(4, 4), (6, 7)]
+        >>> missing([(3, 5)], 1, 6)
+        [(1, 2), (6, 6)]
+        >>> missing([(1, 1), (5, 5)], 1, 7, step=2)
+        [(3, 3), (7, 7)]
+
+    """
+
+    first = ranges[0][0] if first is None else first
+    last = ranges[-1][1] if last is None else last
+
+    if step > 1:
+        frames = list()
+        index = 0
+        for frame in range(first, last + 1, step):
+            while index < len(ranges) and ranges[index][1] < frame:
+                index += 1
+            if index == len(ranges) or ranges[index][0] > frame:
+                frames.append(frame)
+        return to_ranges(frames)
+
+    gaps = list()
+    frame = first
+    for start, end in ranges:
+        if start > last:
+            break
+        if start > frame:
+            gaps.append((frame, start - 1))
+        frame = max(frame, end + 1)
+
+    if frame <= last:
+        gaps.append((frame, last))
+
+    return gaps
+
+
+def intersection(a, b):
+    """Return ranges of frames in both `a` and `b`
+
+    Example:
+        >>> intersection([(1, 10), (20, 30)], [(5, 25)])
+        [(5, 10), (20, 25)]
+
+    """
+
+    ranges = list()
+    i = j = 0
+    while i < len(a) and j < len(b):
+        first = max(a[i][0], b[j][0])
+        last = min(a[i][1], b[j][1])
+        if first <= last:
+            ranges.append((first, last))
+
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+
+    return ranges
+
+
+def duplicates(sequences):
+    """Return sequences of the same images, along with frames of both
+
+    Sequences of a directory differing only by padding, such as
+    beauty.###.exr and beauty.####.exr, are of the same images.
+
+    Returns list of tuples of both sequences and ranges of frames.
+
+    """
+
+    groups = dict()
+    for sequence in sequences:
+        key = (sequence.dirname, sequence.head, sequence.tail)
+        groups.setdefault(key, list()).append(sequence)
+
+    found = list()
+    for group in groups.values():
+        for index, a in enumerate(group):
+            for b in group[index + 1:]:
+                ranges = intersection(a.ranges, b.ranges)
+                if ranges:
+                    found.append((a, b, ranges))
+
+    return found
+
+
+def empty(sequences, workers=None):
+    """Return ranges of frames of each of `sequences` with empty files
+
+    Files no longer on disk are considered empty. Sequences collected,
+    see :func:`collect`, know their empty frames already. Files of other
+    sequences are queried in chunks of :data:`CHUNK` frames, concurrently.
+
+    Arguments:
+        sequences (list): Sequences of which to query files
+        workers (int, optional): Number of chunks queried at once,
+            defaults to $MAGENTA_SCAN_WORKERS or 8
+
+    """
+
+    chunks = list()
+    for index, sequence in enumerate(sequences):
+        if sequence.empty is not None:
+            continue
+
+        for first, last in sequence.ranges:
+            for start in range(first, last + 1, CHUNK):
+                chunks.append((index, sequence,
+                               start, min(start + CHUNK - 1, last)))
+
+    frames = [list() for sequence in sequences]
+
+    if chunks:
+        pool = ThreadPool(min(len(chunks), workers or concurrency()))
+        try:
+            results = pool.map(_empty, chunks)
+        finally:
+            pool.close()
+            pool.join()
+
+        for (index, _, _, _), result in zip(chunks, results):
+            frames[index].extend(result)
+
+    return [list(sequence.empty) if sequence.empty is not None
+            else to_ranges(result)
+            for sequence, result in zip(sequences, frames)]
+
+
+def _empty(chunk):
+    """Return empty frames of `chunk`, see :func:`empty`"""
+    _, sequence, first, last = chunk
+    frames = list()
+
+    for frame in range(first, last + 1):
+        try:
+            if os.stat(sequence.path(frame)).st_size == 0:
+                frames.append(frame)
+        except OSError:
+            frames.append(frame)
+
+    return frames
+
+
+def concurrency():
+    """Return number of directories or files queried at once
+
+    Of $MAGENTA_SCAN_WORKERS, read on each call as the environment
+    may change in between publishes. Defaults to :data:`WORKERS`.
+
+    """
+
+    return int(os.environ.get("MAGENTA_SCAN_WORKERS") or WORKERS)
+
+
+def _entries(dirname):
+    """Yield name of each entry of `dirname`, with mtime or size
+
+    Directories are given their mtime and files their size, or 0
+    if unavailable, such as of broken links.
+
+    Uses os.scandir where available, which knows whether an entry
+    is a directory without querying each entry, and the size of
+    files on Windows. Python 2 lacks it.
+
+    """
+
+    if hasattr(os, "scandir"):
+        for entry in os.scandir(dirname):
+            try:
+                stat = entry.stat()
+            except OSError:
+                yield entry.name, None, 0
+                continue
+
+            if entry.is_dir():
+                yield entry.name, stat.st_mtime, None
+            else:
+                yield entry.name, None, stat.st_size
+    else:
+        for name in os.listdir(dirname):
+            try:
+                stat = os.stat(os.path.join(dirname, name))
+            except OSError:
+                yield name, None, 0
+                continue
+
+            if S_ISDIR(stat.st_mode):
+                yield name, stat.st_mtime, None
+            else:
+                yield name, None, stat.st_size
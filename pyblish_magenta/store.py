@@ -0,0 +1,174 @@
+"""Content-addressed storage of published files
+
+Successive versions of an instance are usually near-identical, such as
+textures, comments and metadata carried over unchanged. Rather than
+storing a full copy per version, each unique file is stored once as a
+blob named after the hash of its content, and versions hardlink to it.
+
+Example:
+    thedeal/assets/ben/modeling/publish/
+        .blobs/
+            3a/
+                3a7bd3e2360a3d29eea436fcfb7e44c735d117c42d1c1835420b6b9942dd4f1b
+        model/ben/v001/
+            .integrity.json                  <-- SHA-256 of each file
+            thedeal_ben_modeling_v001_ben.ma
+        model/ben/v002/
+            .integrity.json
+            thedeal_ben_modeling_v002_ben.ma <-- Same blob as v001
+
+"""
+
+import os
+import stat
+import tempfile
+import threading
+
+from . import transfer, integrity
+
+BLOBS = ".blobs"
+
+digest = transfer.digest
+
+
+class Store(object):
+    """Blobs of a single publish directory
+
+    Arguments:
+        root (str): Absolute path to publish directory,
+            in which blobs are stored under :data:`BLOBS`
+
+    """
+
+    def __init__(self, root):
+        self.root = os.path.join(root, BLOBS)
+
+        self.reused = 0  # Bytes found already stored
+        self._lock = threading.Lock()
+
+    def path(self, digest):
+        """Return absolute path to blob of `digest`"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def add(self, src):
+        """Store contents of `src`, unless already stored
+
+        Sources are hashed before anything is written, such that
+        contents already stored are never sent over the network.
+
+        Returns digest of `src`.
+
+        """
+
+        key = digest(src)
+        blob = self.path(key)
+
+        if os.path.exists(blob):
+            self._reuse(blob)
+            return key
+
+        transfer.makedirs(os.path.dirname(blob))
+
+        # Written next to the blob and renamed, such that concurrent
+        # additions of the same contents never see a partial blob.
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(blob))
+        os.close(fd)
+        os.remove(temp)
+
+        try:
+            transfer.transfer(src, temp, "reflink",
+                              throttle=transfer.bandwidth())
+
+            # Blobs are shared between versions and mustn't change
+            os.chmod(temp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+            if os.name == "nt" and os.path.exists(blob):
+                # Stored concurrently
+                os.remove(temp)
+                self._reuse(blob)
+            else:
+                os.rename(temp, blob)
+
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+        return key
+
+    def _reuse(self, blob):
+        with self._lock:
+            self.reused += os.path.getsize(blob)
+
+    def link(self, digest, dst):
+        """Make blob of `digest` available at `dst`"""
+        blob = self.path(digest)
+
+        try:
+            os.link(blob, dst)
+        except (AttributeError, OSError):
+            # Filesystem without hardlinks
+            transfer.copyfile(blob, dst)
+
+    def check(self, versions=None):
+        """Return problems found with blobs and the versions using them
+
+        Each blob is hashed and compared with its name, and every
+        file of `versions` compared with the blob its integrity
+        manifest lists it as, see :mod:`integrity`.
+
+        Arguments:
+            versions (list, optional): Absolute paths to version
+                directories to check, defaults to no versions
+
+        Returns list of messages, empty if consistent.
+
+        """
+
+        problems = list()
+
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for fname in filenames:
+                path = os.path.join(dirpath, fname)
+                if len(fname) != 64:
+                    problems.append("Stray file: %s" % path)
+                elif digest(path) != fname:
+                    problems.append("Corrupt blob: %s" % path)
+
+        for version_dir in versions or list():
+            for entry in integrity.read(version_dir):
+                path = os.path.join(version_dir, entry["path"])
+                key = entry["sha256"]
+                blob = self.path(key)
+
+                if not os.path.exists(blob):
+                    problems.append("Missing blob %s of %s" % (key, path))
+                elif not os.path.exists(path):
+                    problems.append("Missing file: %s" % path)
+                elif not _same(path, blob) and digest(path) != key:
+                    problems.append("Modified file: %s" % path)
+
+        return problems
+
+
+def check(root):
+    """Check blobs of publish directory `root` and every version using them
+
+    Returns list of messages, empty if consistent.
+
+    Example:
+        >> check("/projects/thedeal/assets/ben/modeling/publish")
+        ['Modified file: .../model/ben/v002/thedeal_ben_modeling_v002_ben.ma']
+
+    """
+
+    return Store(root).check(integrity.find(root))
+
+
+def _same(path, other):
+    """Return whether `path` and `other` are links to the same file"""
+    try:
+        return os.path.samefile(path, other)
+    except AttributeError:
+        # Windows, Python 2
+        return False
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+from nose.tools import with_setup
+
+import pyblish_magenta.backends
+import pyblish_magenta.transfer
+
+self = sys.modules[__name__]
+
+
+class NotFound(Exception):
+    response = {"Error": {"Code": "404"}}
+
+
+class FakeS3(object):
+    """In-process stand-in for boto3's S3 client"""
+
+    def __init__(self):
+        self.objects = dict()
+        self.uploads = dict()
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, Metadata):
+        self.objects[(Bucket, Key)] = (Body, Metadata)
+
+    def head_object(self, Bucket, Key):
+        try:
+            body, metadata = self.objects[(Bucket, Key)]
+        except KeyError:
+            raise NotFound()
+        return {"ContentLength": len(body), "Metadata": metadata}
+
+    def create_multipart_upload(self, Bucket, Key, Metadata):
+        with self._lock:
+            upload = str(len(self.uploads))
+            self.uploads[upload] = (dict(), Metadata)
+        return {"UploadId": upload}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self._lock:
+            self.threads.add(threading.current_thread().ident)
+        time.sleep(0.01)  # Network latency
+        self.uploads[UploadId][0][PartNumber] = Body
+        return {"ETag": "etag%d" % PartNumber}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId,
+                                  MultipartUpload):
+        parts, metadata = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts), numbers
+        self.objects[(Bucket, Key)] = (
+            b"".join(parts[number] for number in numbers), metadata)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId)
+
+
+def initialise():
+    """For every test, provide a small and a large file"""
+    self._tempdir = tempfile.mkdtemp()
+    self._src = os.path.join(self._tempdir, "extract")
+    self._dst = os.path.join(self._tempdir, "publish", "v001")
+
+    os.makedirs(self._src)
+    with open(os.path.join(self._src, "ben.ma"), "wb") as f:
+        f.write(b"Contents of ben.ma")
+    with open(os.path.join(self._src, "ben.abc"), "wb") as f:
+        f.write(os.urandom(10000))
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def read(*parts):
+    with open(os.path.join(*parts), "rb") as f:
+        return f.read()
+
+
+@with_setup(initialise, cleanup)
+def test_s3():
+    """Large files are uploaded in parts, concurrently"""
+    client = FakeS3()
+    backend = pyblish_magenta.backends.S3("thedeal", "publish",
+                                          part_size=1024,
+                                          workers=4,
+                                          client=client)
+
+    transfer = pyblish_magenta.transfer.Transfer(backend=backend,
+                                                 checksum=True)
+    transfer.add(self._src, self._dst)
+    transfer.run()
+
+    assert transfer.strategies == {"s3": 2}, transfer.strategies
+    assert not os.path.exists(self._dst)
+    assert len(client.threads) > 1
+
+    for fname in ("ben.ma", "ben.abc"):
+        key = backend.key(os.path.join(self._dst, fname))
+        body, metadata = client.objects[("thedeal", key)]
+
+        assert key.startswith("publish/"), key
+        assert body == read(self._src, fname)
+        assert metadata["sha256"] == transfer.digests[
+            os.path.join(self._dst, fname)]
+
+    # Nothing left to upload when resumed
+    transfer = pyblish_magenta.transfer.Transfer(backend=backend,
+                                                 resume=True)
+    transfer.add(self._src, self._dst)
+    transfer.run()
+
+    assert transfer.strategies == {"resume": 2}, transfer.strategies
+
+
+def test_get():
+    """Backends are selected by url"""
+    backend = pyblish_magenta.backends.get("s3://thedeal/publish/assets",
+                                           client=FakeS3())
+
+    assert backend.bucket == "thedeal"
+    assert backend.key("/projects/thedeal/ben.ma") == \
+        "publish/assets/projects/thedeal/ben.ma"
+    assert pyblish_magenta.backends.get("file://").local
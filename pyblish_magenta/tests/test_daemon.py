@@ -0,0 +1,204 @@
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+
+from nose.tools import with_setup
+
+import pyblish.api
+import pyblish_magenta.daemon
+import pyblish_magenta.journal
+import pyblish_magenta.versioning
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, provide an empty queue and extracted files"""
+    self._tempdir = tempfile.mkdtemp()
+    self._queue = pyblish_magenta.daemon.Queue(
+        os.path.join(self._tempdir, "queue.sqlite"))
+    self._src = os.path.join(self._tempdir, "extract")
+    self._versions_dir = os.path.join(self._tempdir, "model", "ben")
+
+    os.makedirs(self._src)
+    with open(os.path.join(self._src, "ben.ma"), "w") as f:
+        f.write("Contents of ben.ma")
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def job(src):
+    version = pyblish_magenta.versioning.reserve(self._versions_dir)
+    return {
+        "versionsDir": self._versions_dir,
+        "version": version,
+        "files": [(src, os.path.join(self._versions_dir, version,
+                                     "ben_%s.ma" % version), None)],
+        "store": None,
+    }
+
+
+def work():
+    """Run jobs in a local worker process, until none are left"""
+    worker = multiprocessing.Process(target=pyblish_magenta.daemon.work,
+                                     args=(self._queue.path,),
+                                     kwargs={"idle": 1})
+    worker.start()
+    worker.join(60)
+
+    assert worker.exitcode == 0, worker.exitcode
+
+
+@with_setup(initialise, cleanup)
+def test_integrate():
+    """Jobs are run by a separate worker process"""
+    id = self._queue.submit("integrate", job(
+        os.path.join(self._src, "ben.ma")))
+
+    assert self._queue.status(id)["status"] == "queued"
+
+    work()
+
+    status = self._queue.status(id)
+    assert status["status"] == "done", status["error"]
+    assert status["pid"] != os.getpid()
+    assert status["result"]["transferReused"] == 0
+    assert pyblish_magenta.versioning.latest(self._versions_dir) == "v001"
+    assert os.path.exists(os.path.join(self._versions_dir, "v001",
+                                       "ben_v001.ma"))
+
+
+@with_setup(initialise, cleanup)
+def test_failure():
+    """Failures are reported, along with jobs depending on them"""
+    failing = self._queue.submit("integrate", job(
+        os.path.join(self._src, "missing.ma")))
+    dependent = self._queue.submit("wrapAlembics", {"paths": []},
+                                   after=[failing])
+
+    work()
+
+    failing, dependent = self._queue.wait([failing, dependent], timeout=10)
+
+    assert failing["status"] == "failed"
+    assert "missing.ma" in failing["error"], failing["error"]
+    assert dependent["status"] == "failed"
+
+
+@with_setup(initialise, cleanup)
+def test_recover():
+    """Jobs of workers no longer running are run again"""
+    id = self._queue.submit("integrate", job(
+        os.path.join(self._src, "ben.ma")))
+
+    # Claimed by a worker, which then died
+    assert self._queue.claim()["id"] == id
+    assert self._queue.claim() is None
+    assert self._queue.recover() == [id]
+
+    work()
+
+    assert self._queue.status(id)["status"] == "done"
+
+
+@with_setup(initialise, cleanup)
+def test_queued_journal():
+    """Versions queued for integration are left alone until integrated"""
+    data = job(os.path.join(self._src, "ben.ma"))
+    version_dir = os.path.join(self._versions_dir, data["version"])
+
+    pyblish_magenta.journal.begin(version_dir, None,
+                                  queue=self._queue.path)
+    id = self._queue.submit("integrate", data)
+
+    # Though journaled by this very process
+    journal = pyblish_magenta.journal.read(version_dir)
+    assert not pyblish_magenta.journal.abandoned(journal)
+
+    self._queue.fail(id, "Interrupted")
+    assert pyblish_magenta.journal.abandoned(journal)
+
+
+@with_setup(initialise, cleanup)
+def test_report():
+    """Outcome of jobs is reported back into the publish context"""
+    from pyblish_magenta.plugins.report_publish_jobs import ReportPublishJobs
+
+    context = pyblish.api.Context()
+    done = context.create_instance("ben")
+    failed = context.create_instance("jerry")
+
+    id = self._queue.submit("wrapAlembics", {"paths": []})
+    self._queue.finish(id, {"transferRate": 1.0})
+    done.set_data("publishJob", id)
+
+    id = self._queue.submit("wrapAlembics", {"paths": []})
+    self._queue.fail(id, "Disk full")
+    failed.set_data("publishJob", id)
+
+    default = pyblish_magenta.daemon.DATABASE
+    pyblish_magenta.daemon.DATABASE = self._queue.path
+
+    try:
+        ReportPublishJobs().process(context)
+    except AssertionError:
+        pass
+    else:
+        raise AssertionError("Failed jobs should fail the publish")
+    finally:
+        pyblish_magenta.daemon.DATABASE = default
+
+    assert done.data("publishStatus") == "done"
+    assert done.data("transferRate") == 1.0
+    assert failed.data("publishStatus") == "failed"
+
+
+@with_setup(initialise, cleanup)
+def test_report_wrap():
+    """Failed wrapping of alembics fails the publish"""
+    context = pyblish.api.Context()
+
+    id = self._queue.submit("wrapAlembics", {"paths": []})
+    self._queue.fail(id, "Maya crashed")
+    context.set_data("wrapAlembicsJob", id)
+
+    failed = pyblish_magenta.daemon.report(context, self._queue.path)
+
+    assert [job["id"] for job in failed] == [id], failed
+    assert context.data("wrapAlembicsStatus") == "failed"
+
+
+@with_setup(initialise, cleanup)
+def test_spawn_once():
+    """Workers spawned for every instance of a publish start once"""
+    if os.name == "nt":
+        return
+
+    # Stand-in for a worker, never enlisting itself
+    python = os.path.join(self._tempdir, "python")
+    with open(python, "w") as f:
+        f.write("#!/bin/sh\nsleep 30\n")
+    os.chmod(python, 0o755)
+
+    default = pyblish_magenta.daemon.PYTHON
+    pyblish_magenta.daemon.PYTHON = python
+
+    processes = list()
+    try:
+        for instance in range(3):
+            processes.append(pyblish_magenta.daemon.spawn(self._queue.path))
+
+        workers = self._queue.workers()
+    finally:
+        pyblish_magenta.daemon.PYTHON = default
+        for process in processes:
+            if process is not None:
+                process.kill()
+                process.wait()
+
+    assert processes[1:] == [None, None], processes
+    assert workers == [processes[0].pid], workers
@@ -0,0 +1,133 @@
+import os
+import sys
+import shutil
+import struct
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish.api
+import pyblish_magenta.exr
+import pyblish_magenta.sequence
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    self._tempdir = tempfile.mkdtemp()
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def attribute(name, kind, value):
+    return (name.encode() + b"\0" + kind.encode() + b"\0" +
+            struct.pack("<i", len(value)) + value)
+
+
+def write(fname, width=1920, channels="RGBA", compression=3):
+    """Write header of an OpenEXR image, without pixels"""
+    chlist = b"".join(name.encode() + b"\0" +
+                      struct.pack("<iB3xii", 1, 0, 1, 1)  # half
+                      for name in channels) + b"\0"
+
+    header = (pyblish_magenta.exr.MAGIC + struct.pack("<i", 2) +
+              attribute("channels", "chlist", chlist) +
+              attribute("compression", "compression",
+                        struct.pack("<B", compression)) +
+              attribute("dataWindow", "box2i",
+                        struct.pack("<4i", 0, 0, width - 1, 1079)) +
+              attribute("displayWindow", "box2i",
+                        struct.pack("<4i", 0, 0, width - 1, 1079)) +
+              attribute("owner", "string", b"ben") +
+              attribute("worldToCamera", "m44f", b"\0" * 64) +
+              b"\0")
+
+    with open(os.path.join(self._tempdir, fname), "wb") as f:
+        f.write(header + b"\0" * 1024)
+
+
+@with_setup(initialise, cleanup)
+def test_read():
+    """Attributes of headers are read"""
+    write("beauty.exr")
+
+    header = pyblish_magenta.exr.read(
+        os.path.join(self._tempdir, "beauty.exr"))
+
+    assert header["channels"] == [("R", "half"), ("G", "half"),
+                                  ("B", "half"), ("A", "half")], header
+    assert header["dataWindow"] == [0, 0, 1919, 1079], header
+    assert header["owner"] == "ben", header
+    assert "worldToCamera" not in header
+
+    assert pyblish_magenta.exr.summarize(header) == {
+        "resolution": [1920, 1080],
+        "channels": ["A", "B", "G", "R"],
+        "pixelTypes": ["half"],
+        "compression": "zip",
+    }
+
+
+@with_setup(initialise, cleanup)
+def test_read_beyond_block():
+    """Headers larger than a block are read in full"""
+    write("beauty.exr")
+
+    default = pyblish_magenta.exr.BLOCK
+    pyblish_magenta.exr.BLOCK = 16
+
+    try:
+        header = pyblish_magenta.exr.read(
+            os.path.join(self._tempdir, "beauty.exr"))
+    finally:
+        pyblish_magenta.exr.BLOCK = default
+
+    assert header["compression"] == "zip", header
+
+
+@with_setup(initialise, cleanup)
+def test_inspect():
+    """Frames unlike the rest of their sequence are found"""
+    for frame in range(1, 11):
+        write("beauty.%04d.exr" % frame,
+              width=960 if frame == 4 else 1920,
+              channels="RGB" if frame in (7, 8) else "RGBA")
+
+    with open(os.path.join(self._tempdir, "beauty.0010.exr"), "wb") as f:
+        f.write(b"Not an image")
+
+    sequences, _ = pyblish_magenta.sequence.collect(self._tempdir)
+    (header, differing), = pyblish_magenta.exr.inspect(sequences, workers=2)
+
+    assert header["resolution"] == [1920, 1080], header
+    assert differing == [(4, 4), (7, 8), (10, 10)], differing
+
+
+@with_setup(initialise, cleanup)
+def test_collect_render_headers():
+    """Headers of every collected sequence of OpenEXR images are summarised"""
+    from pyblish_magenta.plugins.collect_render_headers import (
+        CollectRenderHeaders)
+
+    for frame in range(1001, 1004):
+        write("beauty.%04d.exr" % frame,
+              compression=0 if frame == 1002 else 3)
+    open(os.path.join(self._tempdir, "notes.%04d.txt" % 1), "w").close()
+    open(os.path.join(self._tempdir, "notes.%04d.txt" % 2), "w").close()
+
+    sequences, _ = pyblish_magenta.sequence.collect(self._tempdir)
+
+    context = pyblish.api.Context()
+    instance = context.create_instance("masterLayer")
+    instance.set_data("family", "renderlayer")
+    instance.set_data("path", self._tempdir)
+    instance.set_data("sequences", sequences)
+
+    CollectRenderHeaders().process(context)
+
+    headers = instance.data("renderHeaders")
+    assert sorted(headers) == ["beauty.####.exr"], headers
+    assert headers["beauty.####.exr"]["header"]["compression"] == "zip"
+    assert headers["beauty.####.exr"]["differing"] == [(1002, 1002)]
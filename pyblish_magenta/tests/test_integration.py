@@ -0,0 +1,71 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.journal
+import pyblish_magenta.integrity
+import pyblish_magenta.versioning
+import pyblish_magenta.integration
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, start from an empty directory of versions"""
+    self._tempdir = tempfile.mkdtemp()
+    self._versions_dir = os.path.join(self._tempdir, "model", "ben")
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def extract(staging_dir):
+    os.makedirs(os.path.join(staging_dir, "textures"))
+    for fname in ("ben.ma", os.path.join("textures", "diffuse.png")):
+        with open(os.path.join(staging_dir, fname), "w") as f:
+            f.write("Contents of %s" % fname)
+
+
+@with_setup(initialise, cleanup)
+def test_stage():
+    """Staged versions are published by renaming them"""
+    version, staging_dir = pyblish_magenta.integration.stage(
+        self._versions_dir)
+    extract(staging_dir)
+
+    assert version == "v001"
+    assert pyblish_magenta.journal.pending(self._versions_dir) == ["v001"]
+    assert pyblish_magenta.versioning.latest(self._versions_dir) is None
+
+    pyblish_magenta.integration.publish(self._versions_dir, version, [(
+        os.path.join(staging_dir, "ben.ma"),
+        os.path.join(staging_dir, "ben_v001.ma"))])
+
+    version_dir = os.path.join(self._versions_dir, version)
+
+    assert not os.path.exists(staging_dir)
+    assert sorted(os.listdir(version_dir)) == [
+        pyblish_magenta.integrity.MANIFEST, "ben_v001.ma", "textures"]
+    assert pyblish_magenta.journal.pending(self._versions_dir) == []
+    assert pyblish_magenta.versioning.latest(self._versions_dir) == "v001"
+    assert pyblish_magenta.integrity.verify(version_dir, processes=1) == []
+
+
+@with_setup(initialise, cleanup)
+def test_stage_rollback():
+    """Staged versions are rolled back along with their reservation"""
+    version, staging_dir = pyblish_magenta.integration.stage(
+        self._versions_dir)
+    extract(staging_dir)
+
+    pyblish_magenta.journal.rollback(
+        os.path.join(self._versions_dir, version))
+
+    assert not os.path.exists(staging_dir)
+    assert pyblish_magenta.versioning.latest(self._versions_dir) is None
+    assert pyblish_magenta.integration.stage(
+        self._versions_dir)[0] == "v001"
@@ -0,0 +1,56 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.transfer
+import pyblish_magenta.integrity
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, publish a version of two files"""
+    self._tempdir = tempfile.mkdtemp()
+    self._version_dir = os.path.join(self._tempdir, "model", "ben", "v001")
+
+    extract_dir = os.path.join(self._tempdir, "extract")
+    os.makedirs(extract_dir)
+    for fname in ("ben.ma", "comment.txt"):
+        with open(os.path.join(extract_dir, fname), "w") as f:
+            f.write("Contents of %s" % fname)
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="copy",
+                                                 checksum=True)
+    transfer.add(extract_dir, self._version_dir)
+    transfer.run()
+
+    pyblish_magenta.integrity.write(self._version_dir, transfer.checksums())
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+@with_setup(initialise, cleanup)
+def test_verify():
+    """Published versions verify"""
+    entries = pyblish_magenta.integrity.read(self._version_dir)
+
+    assert sorted(e["path"] for e in entries) == ["ben.ma", "comment.txt"]
+    assert pyblish_magenta.integrity.verify(self._tempdir, processes=2) == []
+
+
+@with_setup(initialise, cleanup)
+def test_verify_modified():
+    """Modified and missing files are detected"""
+    with open(os.path.join(self._version_dir, "ben.ma"), "w") as f:
+        f.write("Contents of ben.mb")
+    os.remove(os.path.join(self._version_dir, "comment.txt"))
+
+    problems = pyblish_magenta.integrity.verify(self._tempdir, processes=2)
+
+    assert sorted(p.split(":")[0] for p in problems) == [
+        "Checksum mismatch", "Missing file"], problems
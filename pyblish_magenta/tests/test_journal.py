@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.journal
+import pyblish_magenta.transfer
+import pyblish_magenta.versioning
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, provide extracted files and a directory of versions"""
+    self._tempdir = tempfile.mkdtemp()
+    self._src = os.path.join(self._tempdir, "extract")
+    self._versions_dir = os.path.join(self._tempdir, "model", "ben")
+
+    os.makedirs(self._src)
+    for fname in ("ben.abc", "ben.ma"):
+        with open(os.path.join(self._src, fname), "wb") as f:
+            f.write(b"Contents of %s" % fname.encode("ascii") * 1000)
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def schedule(version, **kwargs):
+    if not kwargs.get("resume"):
+        assert pyblish_magenta.versioning.reserve(
+            self._versions_dir) == version
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="copy", **kwargs)
+    transfer.add(self._src, os.path.join(self._versions_dir, version))
+    return transfer
+
+
+@with_setup(initialise, cleanup)
+def test_resume():
+    """Interrupted versions copy only what is missing or truncated"""
+    version_dir = os.path.join(self._versions_dir, "v001")
+
+    transfer = schedule("v001")
+    pyblish_magenta.journal.begin(version_dir, transfer)
+    transfer.run()
+
+    # Interrupted half-way through the second file
+    with open(os.path.join(version_dir, "ben.ma"), "r+b") as f:
+        f.truncate(100)
+
+    assert pyblish_magenta.journal.pending(self._versions_dir) == ["v001"]
+    assert pyblish_magenta.versioning.latest(self._versions_dir) is None
+
+    journal = pyblish_magenta.journal.read(version_dir)
+    assert pyblish_magenta.journal.abandoned(journal)
+
+    transfer = schedule("v001", resume=True)
+    assert journal["files"] == pyblish_magenta.journal.files(
+        version_dir, transfer)
+
+    transfer.run()
+    pyblish_magenta.journal.commit(version_dir)
+
+    assert transfer.strategies == {"resume": 1, "copy": 1}
+    assert os.path.getsize(os.path.join(version_dir, "ben.ma")) == \
+        os.path.getsize(os.path.join(self._src, "ben.ma"))
+    assert pyblish_magenta.journal.pending(self._versions_dir) == []
+
+
+@with_setup(initialise, cleanup)
+def test_abandoned():
+    """Only integrations no longer running are abandoned"""
+    journal = {"host": "elsewhere", "pid": 1, "time": time.time()}
+    assert not pyblish_magenta.journal.abandoned(journal)
+
+    journal["time"] -= pyblish_magenta.journal.TIMEOUT + 1
+    assert pyblish_magenta.journal.abandoned(journal)
+
+
+@with_setup(initialise, cleanup)
+def test_rollback():
+    """Rolled back versions are excluded from the latest version"""
+    for version in ("v001", "v002"):
+        transfer = schedule(version)
+        pyblish_magenta.journal.begin(
+            os.path.join(self._versions_dir, version), transfer)
+        transfer.run()
+
+    pyblish_magenta.journal.commit(os.path.join(self._versions_dir, "v001"))
+    assert pyblish_magenta.versioning.latest(self._versions_dir) == "v001"
+
+    pyblish_magenta.journal.rollback(os.path.join(self._versions_dir, "v002"))
+    assert not os.path.exists(os.path.join(self._versions_dir, "v002"))
+    assert pyblish_magenta.journal.pending(self._versions_dir) == []
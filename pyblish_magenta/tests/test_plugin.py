@@ -0,0 +1,194 @@
+import os
+import shutil
+import tempfile
+
+import pyblish.api
+import pyblish_magenta.plugin
+import pyblish_magenta.scratch
+import pyblish_magenta.sequence
+
+
+def test_temp_dir():
+    """Each instance is extracted into a directory of its own"""
+    context = pyblish.api.Context()
+    extractor = pyblish_magenta.plugin.Extractor()
+
+    instances = list()
+    for family, name in (("pointcache", "ben01"),
+                         ("pointcache", "ben02"),
+                         ("model", "ben01")):
+        instance = context.create_instance(name)
+        instance.set_data("family", family)
+        instances.append(instance)
+
+    unextracted = context.create_instance("ben03")
+    unextracted.set_data("family", "pointcache")
+
+    try:
+        dirs = [extractor.temp_dir(instance) for instance in instances]
+
+        assert len(set(dirs)) == 3, dirs
+        assert extractor.temp_dir(instances[0]) == dirs[0]
+        assert pyblish_magenta.plugin.extract_dir(instances[1]) == dirs[1]
+        assert pyblish_magenta.plugin.extract_dir(unextracted) is None
+        assert all(os.path.isdir(dirname) for dirname in dirs)
+
+    finally:
+        for dirname in context.data("extractDirs").values():
+            shutil.rmtree(dirname)
+
+
+def test_temp_dir_spill():
+    """Files extracted into memory spill onto disk once over budget"""
+    context = pyblish.api.Context()
+    extractor = pyblish_magenta.plugin.Extractor()
+
+    instances = list()
+    for name in ("ben01", "ben02"):
+        instance = context.create_instance(name)
+        instance.set_data("family", "comment")
+        instances.append(instance)
+
+    ramdisk = tempfile.mkdtemp()
+    defaults = (pyblish_magenta.scratch.RAMDISK,
+                pyblish_magenta.scratch.BUDGET)
+    pyblish_magenta.scratch.RAMDISK = ramdisk
+    pyblish_magenta.scratch.BUDGET = 1024
+
+    try:
+        first = extractor.temp_dir(instances[0], small=True)
+        assert pyblish_magenta.scratch.in_memory(first)
+
+        with open(os.path.join(first, "comment.txt"), "w") as f:
+            f.write("-" * 2048)
+
+        second = extractor.temp_dir(instances[1], small=True)
+        moved = pyblish_magenta.plugin.extract_dir(instances[0])
+
+        assert moved != first
+        assert instances[0].data("extractDir") == moved
+        assert not pyblish_magenta.scratch.in_memory(moved)
+        assert os.listdir(moved) == ["comment.txt"]
+        assert pyblish_magenta.scratch.in_memory(second)
+
+    finally:
+        for dirname in context.data("extractDirs").values():
+            pyblish_magenta.scratch.remove(dirname)
+        pyblish_magenta.scratch.wait()
+
+        pyblish_magenta.scratch.RAMDISK, pyblish_magenta.scratch.BUDGET = \
+            defaults
+        shutil.rmtree(ramdisk)
+
+
+def test_compute_files_frames():
+    """Frames at the root of a render layer keep their names"""
+    from pyblish_magenta.plugins.integrate_assets import IntegrateAssets
+
+    context = pyblish.api.Context()
+    instance = context.create_instance("masterLayer")
+    instance.set_data("family", "renderlayer")
+
+    extract_dir = tempfile.mkdtemp()
+    for fname in ("beauty.1001.exr", "beauty.1002.exr", "beauty.1003.exr",
+                  "notes.txt"):
+        open(os.path.join(extract_dir, fname), "w").close()
+
+    topics = os.environ.get("TOPICS")
+    os.environ["TOPICS"] = "thedeal seq01 1000 lighting"
+
+    try:
+        files = IntegrateAssets().compute_files(
+            instance, extract_dir, "/versions", "v002", "v001")
+    finally:
+        shutil.rmtree(extract_dir)
+        if topics is None:
+            os.environ.pop("TOPICS")
+        else:
+            os.environ["TOPICS"] = topics
+
+    destinations = sorted(os.path.relpath(dst, "/versions").replace("\\", "/")
+                          for _, dst, _ in files)
+    assert destinations == [
+        "v002/beauty.1001.exr",
+        "v002/beauty.1002.exr",
+        "v002/beauty.1003.exr",
+        "v002/thedeal_seq01_1000_lighting_v002_masterLayer.txt",
+    ], destinations
+
+    previous = sorted(previous for _, _, previous in files)
+    assert os.path.join("/versions", "v001", "beauty.1001.exr") in previous
+
+
+def test_validate_render_frames_truncated():
+    """Layers rendered short of their end frame are invalid"""
+    from pyblish_magenta.plugins.validate_render_frames import (
+        ValidateRenderFrames)
+
+    layer_dir = tempfile.mkdtemp()
+    for frame in (1001, 1002, 1003):
+        with open(os.path.join(layer_dir, "beauty.%04d.exr" % frame),
+                  "w") as f:
+            f.write("image")
+
+    try:
+        sequences, _ = pyblish_magenta.sequence.collect(layer_dir)
+
+        context = pyblish.api.Context()
+        instance = context.create_instance("masterLayer")
+        instance.set_data("family", "renderlayer")
+        instance.set_data("path", layer_dir)
+        instance.set_data("sequences", sequences)
+        instance.set_data("startFrame", 1001)
+        instance.set_data("endFrame", 1005)
+
+        try:
+            ValidateRenderFrames().process(instance)
+        except AssertionError:
+            pass
+        else:
+            raise AssertionError("Truncated layer passed validation")
+
+        instance.set_data("endFrame", 1003)
+        ValidateRenderFrames().process(instance)
+
+    finally:
+        shutil.rmtree(layer_dir)
+
+
+def test_validate_render_frames_stepped():
+    """Layers rendered by a frame step are valid without frames between"""
+    from pyblish_magenta.plugins.validate_render_frames import (
+        ValidateRenderFrames)
+
+    layer_dir = tempfile.mkdtemp()
+    for frame in (1001, 1003, 1005):
+        with open(os.path.join(layer_dir, "beauty.%04d.jp2" % frame),
+                  "w") as f:
+            f.write("image")
+
+    try:
+        sequences, _ = pyblish_magenta.sequence.collect(layer_dir)
+        assert [(sequence.head, sequence.tail) for sequence in sequences] \
+            == [("beauty.", ".jp2")], sequences
+
+        context = pyblish.api.Context()
+        instance = context.create_instance("masterLayer")
+        instance.set_data("family", "renderlayer")
+        instance.set_data("path", layer_dir)
+        instance.set_data("sequences", sequences)
+        instance.set_data("startFrame", 1001)
+        instance.set_data("endFrame", 1005)
+
+        try:
+            ValidateRenderFrames().process(instance)
+        except AssertionError:
+            pass
+        else:
+            raise AssertionError("Layer missing frames passed validation")
+
+        instance.set_data("byFrameStep", 2)
+        ValidateRenderFrames().process(instance)
+
+    finally:
+        shutil.rmtree(layer_dir)
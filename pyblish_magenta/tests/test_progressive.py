@@ -0,0 +1,170 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+from nose.tools import with_setup
+
+import pyblish_magenta.journal
+import pyblish_magenta.integrity
+import pyblish_magenta.versioning
+import pyblish_magenta.progressive
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    self._tempdir = tempfile.mkdtemp()
+    self._layer_dir = os.path.join(self._tempdir, "images", "masterLayer")
+    self._versions_dir = os.path.join(self._tempdir, "publish")
+    os.makedirs(os.path.join(self._layer_dir, "AOV"))
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def render(frame):
+    for fname in ("beauty.%04d.exr" % frame,
+                  os.path.join("AOV", "depth.%04d.exr" % frame)):
+        with open(os.path.join(self._layer_dir, fname), "w") as f:
+            f.write("Frame %d" % frame)
+
+
+def publish(watcher):
+    """Render frames 1-4, whilst publishing them"""
+    render(1)
+    render(2)
+
+    result = list()
+    thread = threading.Thread(target=lambda: result.append(
+        pyblish_magenta.progressive.publish(
+            self._layer_dir, self._versions_dir, 1, 4,
+            timeout=10, watcher=watcher)))
+    thread.start()
+
+    render(3)
+    render(4)
+    thread.join(20)
+
+    assert not thread.is_alive(), "Publish never completed"
+    assert result == ["v001"], result
+
+    version_dir = os.path.join(self._versions_dir, "v001")
+    assert pyblish_magenta.versioning.latest(self._versions_dir) == "v001"
+    assert not pyblish_magenta.journal.pending(self._versions_dir)
+
+    paths = [entry["path"]
+             for entry in pyblish_magenta.integrity.read(version_dir)]
+    assert len(paths) == 8, paths
+    assert "AOV/depth.0004.exr" in paths, paths
+
+    with open(os.path.join(version_dir, "beauty.0004.exr")) as f:
+        assert f.read() == "Frame 4"
+
+
+@with_setup(initialise, cleanup)
+def test_poller():
+    """Frames are published as they land, when polling"""
+    publish(pyblish_magenta.progressive.Poller(self._layer_dir, 0.05))
+
+
+@with_setup(initialise, cleanup)
+def test_watch():
+    """Frames are published as they land, when watched"""
+    publish(pyblish_magenta.progressive.watch(self._layer_dir, 0.05))
+
+
+@with_setup(initialise, cleanup)
+def test_timeout():
+    """Publishing gives up once frames stop landing"""
+    render(1)
+
+    watcher = pyblish_magenta.progressive.Poller(self._layer_dir, 0.05)
+
+    try:
+        pyblish_magenta.progressive.publish(
+            self._layer_dir, self._versions_dir, 1, 4,
+            timeout=0.5, watcher=watcher)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Publishing should have given up")
+
+    assert pyblish_magenta.journal.pending(self._versions_dir) == ["v001"]
+
+
+@with_setup(initialise, cleanup)
+def test_passes():
+    """Passes expected of the layer are waited for, however late"""
+    for frame in (1, 2):
+        with open(os.path.join(self._layer_dir,
+                               "beauty.%04d.exr" % frame), "w") as f:
+            f.write("Frame %d" % frame)
+
+    result = list()
+    thread = threading.Thread(target=lambda: result.append(
+        pyblish_magenta.progressive.publish(
+            self._layer_dir, self._versions_dir, 1, 2, timeout=10,
+            watcher=pyblish_magenta.progressive.Poller(self._layer_dir, 0.05),
+            passes=["beauty.####.exr", "AOV/depth.####.exr"])))
+    thread.start()
+
+    # Finished beauty, and then some
+    thread.join(0.5)
+    assert thread.is_alive(), "Publish completed without depth"
+
+    for frame in (1, 2):
+        with open(os.path.join(self._layer_dir, "AOV",
+                               "depth.%04d.exr" % frame), "w") as f:
+            f.write("Frame %d" % frame)
+
+    thread.join(20)
+
+    assert result == ["v001"], result
+    paths = [entry["path"] for entry in pyblish_magenta.integrity.read(
+        os.path.join(self._versions_dir, "v001"))]
+    assert sorted(paths) == ["AOV/depth.0001.exr", "AOV/depth.0002.exr",
+                             "beauty.0001.exr", "beauty.0002.exr"], paths
+
+
+@with_setup(initialise, cleanup)
+def test_passes_stray():
+    """Files other than the passes expected are copied, but not waited for"""
+    for fname in ("beauty.0001.exr", "beauty.0002.exr", "stray.0001.exr"):
+        with open(os.path.join(self._layer_dir, fname), "w") as f:
+            f.write(fname)
+
+    version = pyblish_magenta.progressive.publish(
+        self._layer_dir, self._versions_dir, 1, 2, timeout=5,
+        watcher=pyblish_magenta.progressive.Poller(self._layer_dir, 0.05),
+        passes=["beauty.####.exr"])
+
+    assert os.path.exists(os.path.join(
+        self._versions_dir, version, "stray.0001.exr"))
+
+
+@with_setup(initialise, cleanup)
+def test_watch_rescan():
+    """Files landing unnoticed by inotify are found by listing"""
+    if not sys.platform.startswith("linux"):
+        return
+
+    watcher = pyblish_magenta.progressive.watch(self._layer_dir, 0.01)
+    if not isinstance(watcher, pyblish_magenta.progressive.Inotify):
+        return
+
+    try:
+        render(1)
+
+        # As written by another machine, over a network filesystem
+        list(watcher._events())
+
+        landed = list()
+        for poll in range(pyblish_magenta.progressive.RESCAN * 3):
+            landed.extend(watcher.poll())
+    finally:
+        watcher.close()
+
+    assert os.path.join(self._layer_dir, "beauty.0001.exr") in landed, landed
@@ -0,0 +1,44 @@
+import pyblish_magenta.review
+
+from pyblish_magenta.sequence import Sequence
+
+
+def test_segments():
+    """Frames are split into similar segments, of a minimum size"""
+    segments = pyblish_magenta.review.segments
+
+    assert segments([(1, 100)], 4) == [(1, 25), (26, 50), (51, 75), (76, 100)]
+    assert segments([(1, 100)], 8, minimum=40) == [(1, 50), (51, 100)]
+    assert segments([(1, 10)], 4, minimum=40) == [(1, 10)]
+    assert segments([(1, 3), (5, 6)], 2) == [(1, 3), (5, 6)]
+
+
+def test_command():
+    """Each segment is encoded from its first frame"""
+    sequence = Sequence("/renders", "beauty%.", ".exr", 4, [(1001, 1100)])
+
+    cmd = pyblish_magenta.review.command(
+        sequence, 1026, 1050, 25, 2, "/tmp/0001.mov")
+
+    assert cmd[cmd.index("-i") + 1].replace("\\", "/") == \
+        "/renders/beauty%%.%04d.exr", cmd
+    assert cmd[cmd.index("-start_number") + 1] == "1026", cmd
+    assert cmd[cmd.index("-frames:v") + 1] == "25", cmd
+    assert "-apply_trc" in cmd
+    assert cmd[-1] == "/tmp/0001.mov"
+    assert cmd[cmd.index("-vf") + 1] == "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+
+
+def test_name():
+    """Sequences differing by padding alone are given movies of their own"""
+    long = Sequence("/renders", "beauty.", ".exr", 4, [(1, 2)])
+    short = Sequence("/renders", "beauty.", ".exr", 3, [(1, 2)])
+    jpeg = Sequence("/renders", "beauty.", ".jpg", 3, [(1, 2)])
+
+    taken = set()
+    for sequence in (long, short, jpeg):
+        taken.add(pyblish_magenta.review.name(sequence, taken))
+
+    assert taken == set(["beauty.mov", "beauty_3.mov", "beauty_3_2.mov"])
+    assert pyblish_magenta.review.name(
+        Sequence("/renders", "_", ".exr", 4, [(1, 2)])) == "review.mov"
@@ -0,0 +1,139 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.schema
+
+self = sys.modules[__name__]
+
+
+def setup():
+    self._tempdir = tempfile.mkdtemp()
+    self._path = os.path.join(self._tempdir, "schema.yaml")
+    self._cache_dir = os.environ.get("MAGENTA_CACHE_DIR")
+    os.environ["MAGENTA_CACHE_DIR"] = os.path.join(self._tempdir, "cache")
+    self._from_yaml = pyblish_magenta.schema.lucidity.Schema.from_yaml
+    self._parsed = list()
+
+    def from_yaml(path):
+        self._parsed.append(path)
+        return dict(path=path)
+
+    pyblish_magenta.schema.lucidity.Schema.from_yaml = staticmethod(from_yaml)
+
+
+def teardown():
+    pyblish_magenta.schema.lucidity.Schema.from_yaml = self._from_yaml
+    shutil.rmtree(self._tempdir)
+
+    if self._cache_dir is None:
+        os.environ.pop("MAGENTA_CACHE_DIR")
+    else:
+        os.environ["MAGENTA_CACHE_DIR"] = self._cache_dir
+
+
+def initialise():
+    """For every test, start from an empty cache"""
+    pyblish_magenta.schema.invalidate()
+    self._parsed[:] = []
+
+    cache_dir = pyblish_magenta.schema.cache_dir()
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+
+    with open(self._path, "w") as f:
+        f.write("templates: {}\n")
+
+
+@with_setup(initialise)
+def test_load_cached():
+    """Loading the same schema twice parses it once"""
+    before = pyblish_magenta.schema.stats()
+
+    first = pyblish_magenta.schema.load(self._path)
+    second = pyblish_magenta.schema.load(self._path)
+
+    after = pyblish_magenta.schema.stats()
+
+    assert first is second
+    assert len(self._parsed) == 1
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+
+
+@with_setup(initialise)
+def test_load_modified():
+    """Modifying the schema on disk invalidates the cache"""
+    first = pyblish_magenta.schema.load(self._path)
+
+    with open(self._path, "a") as f:
+        f.write("# modified\n")
+
+    second = pyblish_magenta.schema.load(self._path)
+
+    assert first is not second
+    assert len(self._parsed) == 2
+
+
+@with_setup(initialise)
+def test_invalidate():
+    """Explicit invalidation forces a reload"""
+    before = pyblish_magenta.schema.stats()
+
+    pyblish_magenta.schema.load(self._path)
+    pyblish_magenta.schema.invalidate(self._path)
+    pyblish_magenta.schema.load(self._path)
+
+    after = pyblish_magenta.schema.stats()
+
+    assert after["misses"] - before["misses"] == 2
+
+
+@with_setup(initialise)
+def test_load_compiled():
+    """Schemas are compiled to disk and reused by other processes"""
+    first = pyblish_magenta.schema.load(self._path)
+
+    # Simulate a new process
+    pyblish_magenta.schema.invalidate()
+    second = pyblish_magenta.schema.load(self._path)
+
+    assert first == second
+    assert len(self._parsed) == 1
+    assert os.listdir(pyblish_magenta.schema.cache_dir())
+
+    # Changing the contents invalidates the compiled schema
+    with open(self._path, "a") as f:
+        f.write("# modified\n")
+
+    pyblish_magenta.schema.invalidate()
+    pyblish_magenta.schema.load(self._path)
+
+    assert len(self._parsed) == 2
+
+
+def test_matcher():
+    """Compiled matcher parses identically to lucidity"""
+    lucidity = pyblish_magenta.schema.lucidity
+    templates = [
+        lucidity.Template("asset.work", "{root:.+}/assets/{asset}/work"),
+        lucidity.Template("asset.publish", "{root:.+}/assets/{asset}/publish"),
+    ]
+
+    matcher = pyblish_magenta.schema.Matcher(templates)
+    paths = ["/projects/thedeal/assets/ben/publish",
+             "/projects/thedeal/assets/ben/work",
+             "/projects/thedeal/assets/ben/publish"]
+
+    for path, result in zip(paths, matcher.parse_many(paths)):
+        assert result == lucidity.parse(path, templates)
+
+    try:
+        matcher.parse("/projects/thedeal/unknown")
+    except lucidity.ParseError:
+        pass
+    else:
+        raise AssertionError("Unknown path should not be parsed")
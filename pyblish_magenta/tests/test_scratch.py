@@ -0,0 +1,105 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.scratch
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, provide a small area of memory"""
+    self._ramdisk = tempfile.mkdtemp()
+    self._defaults = (pyblish_magenta.scratch.RAMDISK,
+                      pyblish_magenta.scratch.BUDGET)
+
+    pyblish_magenta.scratch.RAMDISK = self._ramdisk
+    pyblish_magenta.scratch.BUDGET = 1024
+
+
+def cleanup():
+    pyblish_magenta.scratch.wait()
+    pyblish_magenta.scratch.RAMDISK, pyblish_magenta.scratch.BUDGET = \
+        self._defaults
+
+    for path in list(pyblish_magenta.scratch._memory):
+        pyblish_magenta.scratch.remove(path)
+    pyblish_magenta.scratch.wait()
+
+    shutil.rmtree(self._ramdisk)
+
+
+def write(dirname, fname, size):
+    with open(os.path.join(dirname, fname), "wb") as f:
+        f.write(b"\0" * size)
+
+
+@with_setup(initialise, cleanup)
+def test_budget():
+    """Small outputs spill onto disk once over budget"""
+    small = pyblish_magenta.scratch.mkdtemp(small=True)
+    large = pyblish_magenta.scratch.mkdtemp()
+
+    assert pyblish_magenta.scratch.in_memory(small)
+    assert not pyblish_magenta.scratch.in_memory(large)
+    assert os.path.dirname(small) == self._ramdisk
+
+    write(small, "comment.txt", 2048)
+    spilled = pyblish_magenta.scratch.mkdtemp(small=True)
+
+    assert not pyblish_magenta.scratch.in_memory(spilled)
+
+    for path in (large, spilled):
+        pyblish_magenta.scratch.remove(path)
+
+
+@with_setup(initialise, cleanup)
+def test_spill():
+    """Directories move onto disk along with their contents"""
+    small = pyblish_magenta.scratch.mkdtemp(small=True)
+    write(small, "comment.txt", 10)
+
+    moved = pyblish_magenta.scratch.spill(small)
+    pyblish_magenta.scratch.wait()
+
+    assert not pyblish_magenta.scratch.in_memory(moved)
+    assert os.listdir(moved) == ["comment.txt"]
+    assert os.listdir(self._ramdisk) == []
+
+    pyblish_magenta.scratch.remove(moved)
+
+
+@with_setup(initialise, cleanup)
+def test_remove():
+    """Directories are gone immediately, and removed in the background"""
+    path = pyblish_magenta.scratch.mkdtemp(small=True)
+    write(path, "ben.ma", 10)
+
+    thread = pyblish_magenta.scratch.remove(path)
+
+    assert not os.path.exists(path)
+    thread.join()
+    assert os.listdir(self._ramdisk) == []
+
+
+@with_setup(initialise, cleanup)
+def test_enforce():
+    """Directories outgrowing the budget once written spill onto disk"""
+    large = pyblish_magenta.scratch.mkdtemp(small=True)
+    small = pyblish_magenta.scratch.mkdtemp(small=True)
+    write(small, "comment.txt", 10)
+
+    assert pyblish_magenta.scratch.enforce([large, small]) == []
+
+    write(large, "ben.ma", 2048)
+    spilled = pyblish_magenta.scratch.enforce([large, small])
+
+    assert [src for src, dst in spilled] == [large], spilled
+    assert os.listdir(spilled[0][1]) == ["ben.ma"]
+    assert pyblish_magenta.scratch.in_memory(small)
+    assert pyblish_magenta.scratch.usage() <= 1024
+
+    pyblish_magenta.scratch.remove(spilled[0][1])
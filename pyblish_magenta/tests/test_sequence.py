@@ -0,0 +1,156 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.sequence
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    self._tempdir = tempfile.mkdtemp()
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def touch(*parts):
+    path = os.path.join(self._tempdir, *parts)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    open(path, "w").close()
+    return path
+
+
+@with_setup(initialise, cleanup)
+def test_collect():
+    """Frames are collected as sequences, per directory"""
+    for frame in (1001, 1002, 1003, 1005):
+        touch("beauty.%04d.exr" % frame)
+        touch("AOV", "depth_%04d.exr" % frame)
+    touch("beauty.1001.jpg")
+    touch("notes.txt")
+
+    sequences, files = pyblish_magenta.sequence.collect(self._tempdir)
+
+    assert [str(seq) for seq in sequences] == [
+        "beauty.####.exr 1001-1003, 1005",
+        "depth_####.exr 1001-1003, 1005",
+    ], sequences
+
+    assert sequences[1].dirname == os.path.join(self._tempdir, "AOV")
+    assert files == [os.path.join(self._tempdir, "beauty.1001.jpg"),
+                     os.path.join(self._tempdir, "notes.txt")], files
+
+
+@with_setup(initialise, cleanup)
+def test_paths():
+    """Sequences yield the path of every file, padded as on disk"""
+    expected = [touch("beauty.%04d.exr" % frame) for frame in (998, 999, 1000)]
+
+    sequences, _ = pyblish_magenta.sequence.collect(self._tempdir)
+
+    assert len(sequences) == 1
+    assert len(sequences[0]) == 3
+    assert list(sequences[0]) == expected, list(sequences[0])
+    assert sequences[0].ranges == [(998, 1000)]
+
+
+@with_setup(initialise, cleanup)
+def test_scan_cached():
+    """Directories are collected again only once modified"""
+    for frame in (1, 2):
+        touch("layerA", "beauty.%04d.exr" % frame)
+        touch("layerB", "beauty.%04d.exr" % frame)
+
+    # Pretend the directories were modified long ago
+    roots = [os.path.join(self._tempdir, layer)
+             for layer in ("layerA", "layerB")]
+    for root in roots:
+        os.utime(root, (0, 0))
+
+    first = pyblish_magenta.sequence.scan(roots, workers=2)
+    assert [str(sequences[0]) for sequences, _ in first] == \
+        ["beauty.####.exr 1-2"] * 2
+
+    # Unmodified directories are not listed again
+    again = pyblish_magenta.sequence.scan(roots, workers=2)
+    assert again[0][0][0] is first[0][0][0]
+
+    touch("layerA", "beauty.0003.exr")
+    os.utime(roots[0], (10, 10))
+
+    again = pyblish_magenta.sequence.scan(roots, workers=2)
+    assert str(again[0][0][0]) == "beauty.####.exr 1-3", again
+    assert again[1][0][0] is first[1][0][0]
+
+
+@with_setup(initialise, cleanup)
+def test_incomplete():
+    """Missing, duplicate and empty frames are found"""
+    for frame in (1, 2, 3, 5):
+        touch("beauty.%04d.exr" % frame)
+    for frame in (4, 5, 6):
+        touch("beauty.%03d.exr" % frame)
+
+    with open(os.path.join(self._tempdir, "beauty.0002.exr"), "w") as f:
+        f.write("image")
+
+    sequences, _ = pyblish_magenta.sequence.collect(self._tempdir)
+    long, short = sequences
+
+    assert pyblish_magenta.sequence.missing(long.ranges, 1, 6) == \
+        [(4, 4), (6, 6)]
+
+    duplicates = pyblish_magenta.sequence.duplicates(sequences)
+    assert duplicates == [(long, short, [(5, 5)])], duplicates
+
+    empty = pyblish_magenta.sequence.empty(sequences, workers=2)
+    assert empty == [[(1, 1), (3, 3), (5, 5)], [(4, 6)]], empty
+
+
+@with_setup(initialise, cleanup)
+def test_empty_collected():
+    """Empty frames are known from collecting, without further queries"""
+    for frame in (1, 2, 3):
+        touch("beauty.%04d.exr" % frame)
+    with open(os.path.join(self._tempdir, "beauty.0002.exr"), "w") as f:
+        f.write("image")
+
+    sequences, _ = pyblish_magenta.sequence.collect(self._tempdir)
+
+    def _empty(chunk):
+        raise AssertionError("Queried %s" % (chunk,))
+
+    original = pyblish_magenta.sequence._empty
+    pyblish_magenta.sequence._empty = _empty
+    try:
+        empty = pyblish_magenta.sequence.empty(sequences)
+    finally:
+        pyblish_magenta.sequence._empty = original
+
+    assert empty == [[(1, 1), (3, 3)]], empty
+
+
+@with_setup(initialise, cleanup)
+def test_outgrown_padding():
+    """Frames outgrowing their padding remain of their sequence"""
+    for frame in (9998, 9999, 10000, 10001):
+        touch("beauty.%04d.exr" % frame)
+    for frame in (8, 9, 10, 11):
+        touch("unpadded.%d.exr" % frame)
+    touch("beauty.00999.exr")
+
+    sequences, files = pyblish_magenta.sequence.collect(self._tempdir)
+
+    assert [str(seq) for seq in sequences] == [
+        "beauty.####.exr 9998-10001",
+        "unpadded.#.exr 8-11",
+    ], sequences
+
+    assert os.path.exists(sequences[0].path(10000))
+    assert files == [os.path.join(self._tempdir, "beauty.00999.exr")]
@@ -0,0 +1,96 @@
+import os
+import sys
+import stat
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.store
+import pyblish_magenta.transfer
+import pyblish_magenta.integrity
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, provide an extraction and publish directory"""
+    self._tempdir = tempfile.mkdtemp()
+    self._extract = os.path.join(self._tempdir, "extract")
+    self._publish = os.path.join(self._tempdir, "publish")
+
+    os.makedirs(self._extract)
+    with open(os.path.join(self._extract, "comment.txt"), "w") as f:
+        f.write("Fixed the nose")
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def publish(version):
+    version_dir = os.path.join(self._publish, "model", "ben", version)
+
+    store = pyblish_magenta.store.Store(self._publish)
+    transfer = pyblish_magenta.transfer.Transfer(store=store)
+    transfer.add(self._extract, version_dir)
+    transfer.run()
+
+    pyblish_magenta.integrity.write(version_dir, transfer.checksums())
+    return version_dir, store
+
+
+@with_setup(initialise, cleanup)
+def test_store_deduplicates():
+    """Identical files of successive versions are stored once"""
+    v001, _ = publish("v001")
+    v002, store = publish("v002")
+
+    first = os.path.join(v001, "comment.txt")
+    second = os.path.join(v002, "comment.txt")
+
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    assert store.reused == os.path.getsize(first)
+    assert pyblish_magenta.store.check(self._publish) == []
+
+
+@with_setup(initialise, cleanup)
+def test_check_modified():
+    """Modified blobs are detected"""
+    v001, _ = publish("v001")
+
+    path = os.path.join(v001, "comment.txt")
+    os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+    with open(path, "w") as f:
+        f.write("Broke the nose")
+
+    problems = pyblish_magenta.store.check(self._publish)
+    assert len(problems) == 1, problems
+    assert problems[0].startswith("Corrupt blob")
+
+
+@with_setup(initialise, cleanup)
+def test_store_written_once():
+    """Contents already stored are never written again"""
+    copy = os.path.join(self._extract, "copy.txt")
+    shutil.copy(os.path.join(self._extract, "comment.txt"), copy)
+
+    written = list()
+    transfer = pyblish_magenta.transfer.transfer
+
+    def counting(src, dst, *args, **kwargs):
+        written.append(src)
+        return transfer(src, dst, *args, **kwargs)
+
+    pyblish_magenta.transfer.transfer = counting
+    try:
+        store = pyblish_magenta.store.Store(self._publish)
+        key = store.add(os.path.join(self._extract, "comment.txt"))
+        assert store.add(copy) == key
+    finally:
+        pyblish_magenta.transfer.transfer = transfer
+
+    assert len(written) == 1, written
+    assert store.reused == os.path.getsize(copy)
+    assert [fname for _, _, fnames in os.walk(store.root)
+            for fname in fnames] == [key]
@@ -0,0 +1,222 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from nose.tools import with_setup
+
+import pyblish_magenta.transfer
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, provide an extraction directory with contents"""
+    self._tempdir = tempfile.mkdtemp()
+    self._src = os.path.join(self._tempdir, "extract")
+    self._dst = os.path.join(self._tempdir, "publish")
+
+    os.makedirs(os.path.join(self._src, "images", "empty"))
+    with open(os.path.join(self._src, "ben.abc"), "wb") as f:
+        f.write(b"alembic" * 1000)
+
+    for frame in range(1001, 1011):
+        fname = "beauty.%04d.exr" % frame
+        with open(os.path.join(self._src, "images", fname), "wb") as f:
+            f.write(b"exr %d" % frame)
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def read(*parts):
+    with open(os.path.join(*parts), "rb") as f:
+        return f.read()
+
+
+@with_setup(initialise, cleanup)
+def test_transfer():
+    """Files and directories are copied"""
+    transfer = pyblish_magenta.transfer.Transfer(workers=4)
+    transfer.add(os.path.join(self._src, "ben.abc"),
+                 os.path.join(self._dst, "v001", "ben_v001.abc"))
+    transfer.add(os.path.join(self._src, "images"),
+                 os.path.join(self._dst, "v001", "images"))
+    transfer.run()
+
+    assert len(transfer.files) == 11
+    assert transfer.bytes == sum(item[2] for item in transfer.files)
+    assert read(self._dst, "v001", "ben_v001.abc") == read(
+        self._src, "ben.abc")
+    assert read(self._dst, "v001", "images", "beauty.1005.exr") == b"exr 1005"
+    assert os.path.isdir(os.path.join(self._dst, "v001", "images", "empty"))
+
+
+@with_setup(initialise, cleanup)
+def test_transfer_hardlink():
+    """Files on the same filesystem are linked rather than copied"""
+    src = os.path.join(self._src, "ben.abc")
+    dst = os.path.join(self._dst, "ben_v001.abc")
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="hardlink")
+    transfer.add(src, dst)
+    transfer.run()
+
+    assert transfer.strategies == {"hardlink": 1}
+    assert os.stat(src).st_ino == os.stat(dst).st_ino
+
+
+@with_setup(initialise, cleanup)
+def test_transfer_move():
+    """Moving consumes the source"""
+    src = os.path.join(self._src, "images")
+    dst = os.path.join(self._dst, "images")
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="move")
+    transfer.add(src, dst)
+    transfer.run()
+
+    assert transfer.strategies == {"move": 10}
+    assert not os.path.exists(os.path.join(src, "beauty.1001.exr"))
+    assert read(dst, "beauty.1001.exr") == b"exr 1001"
+
+
+@with_setup(initialise, cleanup)
+def test_transfer_incremental():
+    """Files unchanged from the previous version are reused"""
+    v001 = os.path.join(self._dst, "v001", "images")
+    v002 = os.path.join(self._dst, "v002", "images")
+    src = os.path.join(self._src, "images")
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="copy")
+    transfer.add(src, v001)
+    transfer.run()
+
+    # Re-render a single frame
+    with open(os.path.join(src, "beauty.1005.exr"), "wb") as f:
+        f.write(b"EXR 1005")
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="copy")
+    transfer.add(src, v002, previous=v001)
+    transfer.run()
+
+    assert transfer.strategies == {"reuse": 9, "copy": 1}, transfer.strategies
+    assert transfer.reused == 9 * len(b"exr 1001")
+    assert read(v002, "beauty.1005.exr") == b"EXR 1005"
+    assert os.stat(os.path.join(v001, "beauty.1001.exr")).st_ino == \
+        os.stat(os.path.join(v002, "beauty.1001.exr")).st_ino
+
+
+@with_setup(initialise, cleanup)
+def test_transfer_throttle():
+    """Copies share a limited bandwidth"""
+    for index in range(4):
+        with open(os.path.join(self._src, "images", "big%d.exr" % index),
+                  "wb") as f:
+            f.write(b"\0" * 256 * 1024)
+
+    throttle = pyblish_magenta.transfer.Throttle(2 * 1024 * 1024,
+                                                 burst=64 * 1024)
+    transfer = pyblish_magenta.transfer.Transfer(strategy="copy",
+                                                 buffer_size=64 * 1024,
+                                                 throttle=throttle)
+    transfer.add(os.path.join(self._src, "images"), self._dst)
+    transfer.run()
+
+    # 1 MB at 2 MB/s, less what fits in a single burst
+    assert transfer.seconds > 0.4, transfer.seconds
+    assert transfer.rate < 2.5 * 1024 * 1024, transfer.rate
+    assert read(self._dst, "big3.exr") == b"\0" * 256 * 1024
+
+
+@with_setup(initialise, cleanup)
+def test_transfer_reuse_read_once():
+    """Files compared by hash with the previous version are hashed once"""
+    v001 = os.path.join(self._dst, "v001")
+    v002 = os.path.join(self._dst, "v002")
+    src = os.path.join(self._src, "ben.abc")
+
+    transfer = pyblish_magenta.transfer.Transfer(strategy="copy")
+    transfer.add(src, os.path.join(v001, "ben.abc"))
+    transfer.run()
+
+    # Extracted anew, with identical contents
+    os.utime(src, (0, 0))
+
+    hashed = list()
+    digest = pyblish_magenta.transfer.digest
+
+    def counting(path, *args, **kwargs):
+        hashed.append(path)
+        return digest(path, *args, **kwargs)
+
+    pyblish_magenta.transfer.digest = counting
+    try:
+        transfer = pyblish_magenta.transfer.Transfer(checksum=True)
+        transfer.add(src, os.path.join(v002, "ben.abc"),
+                     previous=os.path.join(v001, "ben.abc"))
+        transfer.run()
+    finally:
+        pyblish_magenta.transfer.digest = digest
+
+    assert transfer.strategies == {"reuse": 1}, transfer.strategies
+    assert hashed.count(src) == 1, hashed
+    assert transfer.checksums()[0][2] == digest(src)
+
+
+@with_setup(initialise, cleanup)
+def test_transfer_across_devices():
+    """Files of another device are copied without attempting links"""
+    src = os.path.join(self._src, "ben.abc")
+    os.makedirs(self._dst)
+
+    def reflink(src, dst):
+        raise AssertionError("Attempted to clone across devices")
+
+    # As though the destination was on another device
+    pyblish_magenta.transfer._devices.update({self._src: 1, self._dst: 2})
+    default = pyblish_magenta.transfer.reflink
+    pyblish_magenta.transfer.reflink = reflink
+
+    try:
+        strategy, _ = pyblish_magenta.transfer.transfer(
+            src, os.path.join(self._dst, "ben.abc"), "auto")
+    finally:
+        pyblish_magenta.transfer.reflink = default
+        pyblish_magenta.transfer._devices.clear()
+
+    assert strategy == "copy", strategy
+    assert read(self._dst, "ben.abc") == b"alembic" * 1000
+
+
+def test_transfer_environment():
+    """Settings are read from the environment of each transfer"""
+    names = ("MAGENTA_COPY_WORKERS", "MAGENTA_TRANSFER_STRATEGY",
+             "MAGENTA_BANDWIDTH")
+    defaults = [os.environ.pop(name, None) for name in names]
+
+    try:
+        transfer = pyblish_magenta.transfer.Transfer()
+        assert transfer.workers == pyblish_magenta.transfer.WORKERS
+        assert transfer.strategy == pyblish_magenta.transfer.STRATEGY
+        assert transfer.throttle is None
+
+        os.environ.update({"MAGENTA_COPY_WORKERS": "3",
+                           "MAGENTA_TRANSFER_STRATEGY": "copy",
+                           "MAGENTA_BANDWIDTH": "10M"})
+
+        transfer = pyblish_magenta.transfer.Transfer()
+        assert transfer.workers == 3, transfer.workers
+        assert transfer.strategy == "copy", transfer.strategy
+        assert transfer.throttle.rate == 10 * 1024 ** 2
+
+        # Shared, such that the limit applies to every transfer at once
+        other = pyblish_magenta.transfer.Transfer()
+        assert other.throttle is transfer.throttle
+
+    finally:
+        for name, default in zip(names, defaults):
+            os.environ.pop(name, None)
+            if default is not None:
+                os.environ[name] = default
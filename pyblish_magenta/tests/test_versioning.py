@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+from nose.tools import with_setup
+
+import pyblish_magenta.journal
+import pyblish_magenta.versioning
+
+self = sys.modules[__name__]
+
+
+def initialise():
+    """For every test, start from an empty directory of versions"""
+    self._tempdir = tempfile.mkdtemp()
+
+
+def cleanup():
+    shutil.rmtree(self._tempdir)
+
+
+def extract(versions_dir, version):
+    """Write a file into `version`, as published behind its back"""
+    version_dir = os.path.join(versions_dir, version)
+    if not os.path.isdir(version_dir):
+        os.makedirs(version_dir)
+    open(os.path.join(version_dir, "ben.ma"), "w").close()
+
+
+def publish(version):
+    os.makedirs(os.path.join(self._tempdir, version))
+    pyblish_magenta.versioning.register(self._tempdir, version)
+
+
+def reserve(versions_dir):
+    """Run in a separate process, see :func:`test_reserve_concurrent`"""
+    version = pyblish_magenta.versioning.reserve(versions_dir)
+    extract(versions_dir, version)
+    pyblish_magenta.versioning.register(versions_dir, version)
+    return version
+
+
+@with_setup(initialise, cleanup)
+def test_next_version():
+    """Versions are counted from the manifest"""
+    assert pyblish_magenta.versioning.next_version(self._tempdir) == 1
+
+    publish("v001")
+    publish("v002")
+
+    assert pyblish_magenta.versioning.next_version(self._tempdir) == 3
+    assert pyblish_magenta.versioning.latest(self._tempdir) == "v002"
+    assert pyblish_magenta.versioning.versions(
+        self._tempdir) == ["v001", "v002"]
+
+
+@with_setup(initialise, cleanup)
+def test_manifest_missing():
+    """Versions published without a manifest are discovered"""
+    extract(self._tempdir, "v009")
+    extract(self._tempdir, "v010")
+
+    assert pyblish_magenta.versioning.latest(self._tempdir) == "v010"
+    assert os.path.exists(os.path.join(
+        self._tempdir, pyblish_magenta.versioning.MANIFEST))
+
+
+@with_setup(initialise, cleanup)
+def test_manifest_stale():
+    """Versions added behind the back of the manifest are discovered"""
+    publish("v001")
+
+    # Ensure the directory is modified after the manifest
+    manifest = os.path.join(self._tempdir,
+                            pyblish_magenta.versioning.MANIFEST)
+    past = time.time() - 10
+    os.utime(manifest, (past, past))
+    extract(self._tempdir, "v002")
+
+    assert pyblish_magenta.versioning.latest(self._tempdir) == "v002"
+    assert pyblish_magenta.versioning.next_version(self._tempdir) == 3
+
+
+@with_setup(initialise, cleanup)
+def test_reserve():
+    """Reserving creates the next version"""
+    publish("v001")
+
+    assert pyblish_magenta.versioning.reserve(self._tempdir) == "v002"
+    assert pyblish_magenta.versioning.reserve(self._tempdir) == "v003"
+    assert os.path.isdir(os.path.join(self._tempdir, "v003"))
+
+
+@with_setup(initialise, cleanup)
+def test_reserve_concurrent():
+    """Concurrent publishers each reserve a distinct version"""
+    count = 64
+    versions_dir = os.path.join(self._tempdir, "model", "ben")
+
+    pool = multiprocessing.Pool(16)
+    try:
+        versions = pool.map(reserve, [versions_dir] * count)
+    finally:
+        pool.close()
+        pool.join()
+
+    assert len(set(versions)) == count, versions
+    assert pyblish_magenta.versioning.latest(versions_dir) == "v%03d" % count
+    assert pyblish_magenta.versioning.next_version(versions_dir) == count + 1
+
+
+@with_setup(initialise, cleanup)
+def test_manifest_incomplete():
+    """Versions reserved or being published are not discovered"""
+    publish("v001")
+    pyblish_magenta.versioning.reserve(self._tempdir)
+    pyblish_magenta.versioning.reserve(self._tempdir)
+
+    journal = os.path.join(self._tempdir, "v003",
+                           pyblish_magenta.journal.JOURNAL)
+    with open(journal, "w") as f:
+        f.write("{}")
+    with open(os.path.join(self._tempdir, "v003", "ben.ma"), "w") as f:
+        f.write("half-copied")
+
+    assert pyblish_magenta.versioning.latest(self._tempdir) == "v001"
+    assert pyblish_magenta.versioning.versions(self._tempdir) == ["v001"]
+
+    os.remove(journal)
+    pyblish_magenta.versioning.register(self._tempdir, "v003")
+
+    assert pyblish_magenta.versioning.latest(self._tempdir) == "v003"
+
+
+@with_setup(initialise, cleanup)
+def test_manifest_same_time():
+    """Versions added as the manifest was written are discovered"""
+    publish("v001")
+    extract(self._tempdir, "v003")
+
+    # Filesystems storing whole seconds
+    manifest = os.path.join(self._tempdir,
+                            pyblish_magenta.versioning.MANIFEST)
+    past = int(time.time()) - 10
+    os.utime(manifest, (past, past))
+    os.utime(self._tempdir, (past, past))
+
+    assert pyblish_magenta.versioning.latest(self._tempdir) == "v003"
+
+
+@with_setup(initialise, cleanup)
+def test_register_again():
+    """Versions registered again, such as once resumed, are listed once"""
+    publish("v001")
+    pyblish_magenta.versioning.register(self._tempdir, "v001")
+
+    with open(os.path.join(self._tempdir,
+                           pyblish_magenta.versioning.MANIFEST)) as f:
+        assert f.read() == "v001\n"
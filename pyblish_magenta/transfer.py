@@ -0,0 +1,642 @@
+"""Copy files concurrently
+
+Network storage is typically bound by latency rather than bandwidth,
+such that copying many files one at a time leaves most of the
+available throughput unused.
+
+Files on the same filesystem as their destination needn't be copied
+at all and are instead cloned, linked or moved, depending on strategy.
+
+Bandwidth used by copies may be capped with $MAGENTA_BANDWIDTH, e.g.
+"50M" for 50 MB/s shared by every copy of the process, and the priority
+of their I/O lowered with $MAGENTA_IO_PRIORITY, "low" or "idle", such
+that publishing leaves room for others using the same storage.
+
+Strategies:
+    auto: Reflink, else hardlink, else copy
+    copy: Always copy
+    reflink: Clone copy-on-write (e.g. btrfs, XFS), else copy
+    hardlink: Hardlink, else copy
+    move: Rename, else copy. The source is consumed.
+
+Example:
+    >> transfer = Transfer()
+    >> transfer.add("/tmp/extract/ben.abc", "/publish/v001/ben.abc")
+    >> transfer.add("/tmp/extract/images", "/publish/v001/images")
+    >> transfer.run()
+    >> str(transfer)
+    '2 files, 1.25 GB in 8.1s (154.30 MB/s)'
+
+"""
+
+import os
+import sys
+import time
+import errno
+import shutil
+import ctypes
+import hashlib
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+# Number of files copied at once, unless $MAGENTA_COPY_WORKERS or
+# otherwise specified, see :func:`concurrency`
+WORKERS = 8
+
+STRATEGIES = ("auto", "copy", "reflink", "hardlink", "move")
+
+# Unless $MAGENTA_TRANSFER_STRATEGY or otherwise specified
+STRATEGY = "auto"
+
+# From linux/fs.h
+FICLONE = 0x40049409
+
+# Directory -> device, see :func:`same_device`
+_devices = dict()
+
+# Size of each read and write, in bytes
+BUFFER_SIZE = 1024 * 1024
+
+# I/O priority of threads copying files, one of "low", "idle" or "",
+# unless $MAGENTA_IO_PRIORITY
+PRIORITY = ""
+
+# ioprio_set(2) by machine, from asm/unistd.h
+IOPRIO_SET = {"x86_64": 251, "i686": 289, "aarch64": 30, "ppc64le": 273}
+
+# From linux/ioprio.h
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+# From winbase.h
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+
+class Throttle(object):
+    """Limit bytes per second shared by any number of threads
+
+    A token bucket, from which each thread takes as many tokens as bytes
+    it is about to transfer, waiting for the bucket to refill if empty.
+
+    Arguments:
+        rate (int): Bytes per second
+        burst (int, optional): Bytes transferred at once without waiting,
+            defaults to one buffer
+
+    """
+
+    def __init__(self, rate, burst=BUFFER_SIZE):
+        self.rate = float(rate)
+        self.burst = burst
+
+        self._tokens = burst
+        self._time = time.time()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return "%s/s" % format_size(self.rate)
+
+    def consume(self, size):
+        """Wait until `size` bytes may be transferred"""
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._time) * self.rate)
+            self._time = now
+
+            # Borrowed ahead of time, to be repaid by waiting
+            self._tokens -= size
+            wait = -self._tokens / self.rate
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Shared by every copy, unless $MAGENTA_BANDWIDTH or otherwise
+# specified, see :func:`bandwidth`
+THROTTLE = None
+
+# Rate -> throttle, shared by copies of the same bandwidth
+_throttles = dict()
+
+
+class Transfer(object):
+    """Copy files and directories using a pool of threads
+
+    Directories are walked once, when added, and their destination
+    directories created once, before copying starts.
+
+    Arguments:
+        workers (int, optional): Number of files copied at once,
+            defaults to $MAGENTA_COPY_WORKERS or 8
+        buffer_size (int, optional): Size of each read and write
+        strategy (str, optional): One of :data:`STRATEGIES`,
+            defaults to $MAGENTA_TRANSFER_STRATEGY or "auto"
+        store (store.Store, optional): Store files as blobs and link
+            to these, in place of `strategy`
+        checksum (bool, optional): Compute SHA-256 of every file,
+            while copying where possible, see :meth:`checksums`
+        resume (bool, optional): Keep destinations already identical
+            to their source, e.g. from an interrupted run
+        backend (object, optional): Store files here rather than
+            on the local filesystem, see :mod:`backends`
+        throttle (Throttle, optional): Limit bandwidth of copies,
+            defaults to $MAGENTA_BANDWIDTH, if set
+
+    Files unchanged from a previous version, see :meth:`add`,
+    are hardlinked from there rather than transferred, unless
+    stored by a `backend` other than the local filesystem.
+
+    """
+
+    def __init__(self,
+                 workers=None,
+                 buffer_size=BUFFER_SIZE,
+                 strategy=None,
+                 store=None,
+                 checksum=False,
+                 resume=False,
+                 backend=None,
+                 throttle=None):
+        from . import backends
+
+        self.workers = workers or concurrency()
+        self.buffer_size = buffer_size
+        self.strategy = strategy or os.environ.get(
+            "MAGENTA_TRANSFER_STRATEGY") or STRATEGY
+        self.store = store
+        self.checksum = checksum
+        self.resume = resume
+        self.throttle = throttle or bandwidth()
+        self.backend = backend or backends.Local(self.strategy,
+                                                 buffer_size,
+                                                 self.throttle)
+
+        assert self.strategy in STRATEGIES, (
+            "Unknown strategy \"%s\", choose from %s"
+            % (self.strategy, ", ".join(STRATEGIES)))
+
+        self.files = list()  # (src, dst, size, previous)
+        self.directories = set()
+        self.bytes = 0
+        self.seconds = 0.0
+        self.strategies = dict()  # strategy -> number of files
+        self.digests = dict()  # dst -> digest, when stored or checksummed
+        self.reused = 0  # Bytes linked from previous versions
+
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return "%d files, %s in %.1fs (%s/s%s, %s reused, %s)" % (
+            len(self.files), format_size(self.bytes),
+            self.seconds, format_size(self.rate),
+            " of %s" % self.throttle if self.throttle else "",
+            format_size(self.reused),
+            ", ".join("%s: %d" % item
+                      for item in sorted(self.strategies.items())))
+
+    @property
+    def rate(self):
+        """Bytes per second of the last run"""
+        return self.bytes / self.seconds if self.seconds else 0
+
+    def checksums(self):
+        """Return destination, size and SHA-256 of each file of the last run
+
+        Only available with `checksum` or `store`.
+
+        """
+
+        return [(dst, size, self.digests[dst])
+                for _, dst, size, _ in self.files]
+
+    def add(self, src, dst, previous=None):
+        """Schedule copying of file or directory `src` to `dst`
+
+        Arguments:
+            src (str): Absolute path to file or directory
+            dst (str): Absolute path to destination, including its name
+            previous (str, optional): Absolute path to the counterpart
+                of `dst` in a previous version, if any
+
+        """
+
+        if not os.path.isdir(src):
+            self.files.append((src, dst, os.path.getsize(src), previous))
+            self.directories.add(os.path.dirname(dst))
+            return
+
+        for root, dirs, files in os.walk(src):
+            relpath = os.path.relpath(root, src)
+            dirname = os.path.normpath(os.path.join(dst, relpath))
+            self.directories.add(dirname)
+
+            for fname in files:
+                path = os.path.join(root, fname)
+                self.files.append((
+                    path,
+                    os.path.join(dirname, fname),
+                    os.path.getsize(path),
+                    previous and os.path.normpath(
+                        os.path.join(previous, relpath, fname))))
+
+    def run(self):
+        """Copy every scheduled file
+
+        Raises the first error encountered, if any.
+
+        """
+
+        if self.backend.local:
+            for dirname in sorted(self.directories):
+                makedirs(dirname)
+
+        start = time.time()
+        self.bytes = 0
+        self.strategies.clear()
+        self.digests.clear()
+        self.reused = 0
+
+        pool = ThreadPool(min(self.workers, len(self.files)) or 1,
+                          initializer=lower_priority)
+        try:
+            pool.map(self._copy, self.files, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+            self.backend.close()
+
+        self.seconds = time.time() - start
+
+    def _copy(self, item):
+        src, dst, size, previous = item
+
+        local = self.backend.local
+
+        if self.resume:
+            if self.backend.unchanged(src, dst):
+                sha256 = digest(src) if self.checksum else None
+                self._done(dst, "resume", sha256)
+                return
+
+            if local and os.path.lexists(dst):
+                # Truncated, or otherwise incomplete
+                os.remove(dst)
+
+        if local and previous and self.store is None:
+            same, sha256 = _compare(src, previous)
+        else:
+            same = False
+
+        if same:
+            try:
+                os.link(previous, dst)
+            except (AttributeError, OSError):
+                pass  # Filesystem without hardlinks, transfer as usual
+            else:
+                # The source is identical and likely local,
+                # unless already hashed to tell.
+                if not self.checksum:
+                    sha256 = None
+                elif sha256 is None:
+                    sha256 = digest(src)
+                self._done(dst, "reuse", sha256, reused=size)
+                return
+
+        if local and self.store is not None:
+            sha256 = self.store.add(src)
+            self.store.link(sha256, dst)
+            strategy = "store"
+
+        else:
+            strategy, sha256 = self.backend.put(src, dst, self.checksum)
+
+        self._done(dst, strategy, sha256, transferred=size)
+
+    def _done(self, dst, strategy, sha256, transferred=0, reused=0):
+        with self._lock:
+            self.bytes += transferred
+            self.reused += reused
+            self.strategies[strategy] = self.strategies.get(strategy, 0) + 1
+
+            if sha256 is not None:
+                self.digests[dst] = sha256
+
+
+def transfer(src, dst, strategy="auto", buffer_size=BUFFER_SIZE,
+             checksum=False, throttle=None):
+    """Make `src` available at `dst`
+
+    Strategies other than "copy" only apply when `src` and `dst`
+    share a filesystem, and otherwise fall back to copying without
+    attempting them, see :func:`same_device`.
+
+    Arguments:
+        src (str): Absolute path to file
+        dst (str): Absolute path to destination, including its name
+        strategy (str, optional): One of :data:`STRATEGIES`
+        buffer_size (int, optional): Size of each read and write, if copied
+        checksum (bool, optional): Also compute SHA-256 of `src`
+        throttle (Throttle, optional): Limit bandwidth, if copied
+
+    Returns tuple of strategy used and SHA-256, or None.
+
+    """
+
+    if strategy != "copy" and not same_device(src, dst):
+        strategy = "copy"
+
+    if strategy == "move":
+        try:
+            os.rename(src, dst)
+        except OSError:
+            pass
+        else:
+            return "move", digest(dst) if checksum else None
+
+    if strategy in ("auto", "reflink"):
+        if reflink(src, dst):
+            return "reflink", digest(src) if checksum else None
+
+    if strategy in ("auto", "hardlink") and hasattr(os, "link"):
+        try:
+            os.link(src, dst)
+        except OSError:
+            pass
+        else:
+            return "hardlink", digest(src) if checksum else None
+
+    return "copy", copyfile(src, dst, buffer_size, checksum, throttle)
+
+
+def same_device(src, dst):
+    """Return whether `src` and the directory of `dst` share a device
+
+    Devices are queried once per directory, such that files copied
+    across devices cost no attempts at linking them, each of which
+    is a round trip to network storage.
+
+    """
+
+    try:
+        return _device(os.path.dirname(src)) == \
+            _device(os.path.dirname(dst))
+    except OSError:
+        return False
+
+
+def _device(dirname):
+    try:
+        return _devices[dirname]
+    except KeyError:
+        device = _devices[dirname] = os.stat(dirname).st_dev
+        return device
+
+
+def reflink(src, dst):
+    """Clone `src` to `dst` copy-on-write, returns whether it succeeded
+
+    Supported on Linux by e.g. btrfs and XFS, provided
+    both files reside on the same filesystem.
+
+    """
+
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+
+    with open(src, "rb") as fsrc:
+        with open(dst, "wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                cloned = True
+            except (IOError, OSError):
+                cloned = False
+
+    if cloned:
+        shutil.copystat(src, dst)
+    else:
+        os.remove(dst)
+
+    return cloned
+
+
+def copyfile(src, dst, buffer_size=BUFFER_SIZE, checksum=False,
+             throttle=None):
+    """Copy contents, permissions and modification time of `src` to `dst`
+
+    Uses sendfile where available, such that data never passes through
+    Python, unless a `checksum` is computed while copying.
+
+    Returns SHA-256 of `src` if `checksum`, else None.
+
+    """
+
+    sha = hashlib.sha256() if checksum else None
+
+    with open(src, "rb") as fsrc:
+        with open(dst, "wb") as fdst:
+            if sha is not None or not _sendfile(fsrc, fdst, buffer_size,
+                                                throttle):
+                for chunk in iter(lambda: fsrc.read(buffer_size), b""):
+                    if throttle is not None:
+                        throttle.consume(len(chunk))
+                    if sha is not None:
+                        sha.update(chunk)
+                    fdst.write(chunk)
+
+    shutil.copystat(src, dst)
+
+    return sha.hexdigest() if sha is not None else None
+
+
+def _sendfile(fsrc, fdst, buffer_size, throttle=None):
+    """Copy `fsrc` to `fdst` in the kernel, returns whether it succeeded"""
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        return False
+
+    offset = 0
+    size = max(os.fstat(fsrc.fileno()).st_size, buffer_size)
+
+    if throttle is not None:
+        size = buffer_size
+
+    try:
+        while True:
+            if throttle is not None:
+                throttle.consume(size)
+
+            sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size)
+            if sent == 0:
+                return True
+            offset += sent
+
+    except OSError:
+        if offset:
+            raise
+
+        # Unsupported by the filesystem, fall back to reading
+        return False
+
+
+def digest(path, buffer_size=BUFFER_SIZE):
+    """Return hexadecimal SHA-256 of the contents of `path`"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(buffer_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def unchanged(src, previous):
+    """Return whether `src` has the same contents as `previous`
+
+    Files of equal size and modification time are assumed identical,
+    other files of equal size are compared by their hash.
+
+    """
+
+    return _compare(src, previous)[0]
+
+
+def _compare(src, previous):
+    """Return :func:`unchanged`, along with SHA-256 of `src` if hashed"""
+    try:
+        a, b = os.stat(src), os.stat(previous)
+    except OSError:
+        return False, None
+
+    if a.st_size != b.st_size:
+        return False, None
+
+    if a.st_mtime == b.st_mtime:
+        return True, None
+
+    # Some filesystems only store whole seconds
+    coarse = a.st_mtime % 1 == 0 or b.st_mtime % 1 == 0
+    if coarse and int(a.st_mtime) == int(b.st_mtime):
+        return True, None
+
+    sha256 = digest(src)
+    return sha256 == digest(previous), sha256
+
+
+def lower_priority(priority=None):
+    """Lower the I/O priority of the current thread
+
+    Arguments:
+        priority (str, optional): "low", "idle" or "" for unchanged,
+            defaults to $MAGENTA_IO_PRIORITY
+
+    Returns whether priority was lowered.
+
+    """
+
+    if priority is None:
+        priority = os.environ.get("MAGENTA_IO_PRIORITY", PRIORITY)
+    if priority not in ("low", "idle"):
+        return False
+
+    if os.name == "nt":
+        # Both CPU and I/O priority, but only the latter matters here
+        kernel32 = ctypes.windll.kernel32
+        return bool(kernel32.SetThreadPriority(
+            kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN))
+
+    if not sys.platform.startswith("linux"):
+        return False
+
+    syscall = IOPRIO_SET.get(os.uname()[4])
+    if syscall is None:
+        return False
+
+    if priority == "idle":
+        value = IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT
+    else:
+        value = IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT | 7  # Lowest level
+
+    # Of the calling thread, as I/O priority is per-thread on Linux
+    libc = ctypes.CDLL(None, use_errno=True)
+    return libc.syscall(syscall, IOPRIO_WHO_PROCESS, 0, value) == 0
+
+
+def makedirs(path):
+    """Create `path` and its parents, unless they already exist"""
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def format_size(size):
+    """Return human-readable `size`
+
+    Example:
+        >>> format_size(1536)
+        '1.50 kB'
+        >>> format_size(12)
+        '12 B'
+
+    """
+
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024.0
+
+    return ("%d %s" if unit == "B" else "%.2f %s") % (size, unit)
+
+
+def parse_size(size):
+    """Return number of bytes of human-readable `size`
+
+    Example:
+        >>> parse_size("50M")
+        52428800
+        >>> parse_size("1.5kB")
+        1536
+        >>> parse_size("12")
+        12
+
+    """
+
+    size = size.strip().upper().rstrip("B")
+    for power, unit in enumerate("KMG", 1):
+        if size.endswith(unit):
+            return int(float(size[:-1]) * 1024 ** power)
+    return int(size or 0)
+
+
+def concurrency():
+    """Return number of files copied at once, of $MAGENTA_COPY_WORKERS
+
+    Read on each call, as the environment may change in between
+    publishes of a running host. Defaults to :data:`WORKERS`.
+
+    """
+
+    return int(os.environ.get("MAGENTA_COPY_WORKERS") or WORKERS)
+
+
+def bandwidth():
+    """Return throttle of $MAGENTA_BANDWIDTH, e.g. "100M"
+
+    Copies of the same bandwidth share the same throttle, such that
+    the limit applies to all at once. Defaults to :data:`THROTTLE`.
+
+    """
+
+    rate = parse_size(os.environ.get("MAGENTA_BANDWIDTH") or "")
+    if not rate:
+        return THROTTLE
+
+    return _throttles.setdefault(rate, Throttle(rate))
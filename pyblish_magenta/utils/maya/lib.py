@@ -5,6 +5,7 @@ import maya.api.OpenMaya as om
 import maya.cmds as cmds
 
 import pyblish_magenta.schema
+import pyblish_magenta.versioning
 
 
 def lsattr(attr, value=None):
@@ -143,10 +144,8 @@ def lookdev_link():
             }
             assetdir = template.format(data)
 
-            # NOTE(marcus): Need more robust version comparison
-            try:
-                version = sorted(os.listdir(assetdir))[-1]
-            except OSError:
+            version = pyblish_magenta.versioning.latest(assetdir)
+            if version is None:
                 # no versions
                 continue
 
@@ -2,6 +2,8 @@ import os
 
 from maya import cmds
 
+import pyblish_magenta.versioning
+
 
 def update_reference(reference):
     """Update reference to the latest version
@@ -17,12 +19,16 @@ def update_reference(reference):
     # flexible than a fixed number of levels up a hierarchy.
     version_dir = os.path.realpath(os.path.join(filename, "..", "..", ".."))
     versions_dir = os.path.realpath(os.path.join(version_dir, ".."))
-    versions = sorted(os.listdir(versions_dir))
 
     # Compute latest
-    latest_version = versions[-1]
+    latest_version = pyblish_magenta.versioning.latest(versions_dir)
     old_version = os.path.basename(version_dir)
 
+    if latest_version is None:
+        # No complete versions, e.g. whilst the first is being published
+        print("\"%s\" has no versions to update to" % reference)
+        return
+
     # Compare latest with current
     new_filename = filename.replace(old_version, latest_version)
 
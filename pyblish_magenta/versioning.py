@@ -0,0 +1,273 @@
+"""Discover versions without listing directories
+
+Each directory of versions carries an append-only manifest of the
+versions it contains, along with a pointer to the latest version.
+
+Example:
+    thedeal/assets/ben/modeling/publish/model/ben/
+        .versions   <-- One version per line, in order of publishing
+        .latest     <-- Name of the highest version
+        v001/
+        v002/
+
+The manifest is trusted for as long as it was modified after the
+directory itself, i.e. no version has been added or removed behind
+its back. Otherwise the directory is scanned and the manifest rebuilt,
+leaving out versions reserved or still being published.
+
+"""
+
+import os
+import re
+import errno
+import tempfile
+
+from .lib import format_version
+
+MANIFEST = ".versions"
+LATEST = ".latest"
+
+
+def number(version):
+    """Return number of `version`, see :func:`lib.find_next_version`
+
+    Example:
+        >>> number("v012")
+        12
+        >>> number("untitled") is None
+        True
+
+    """
+
+    matches = re.findall(r"\d+", version)
+    return int(matches[-1]) if matches else None
+
+
+def versions(versions_dir):
+    """Return versions in `versions_dir`, in order of publishing
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+
+    """
+
+    if not _fresh(versions_dir):
+        return rebuild(versions_dir)
+
+    return _registered(versions_dir) or list()
+
+
+def latest(versions_dir):
+    """Return name of the highest version in `versions_dir`
+
+    Returns None if there are no versions.
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+
+    """
+
+    if _fresh(versions_dir):
+        version = _read(os.path.join(versions_dir, LATEST))
+
+        # Concurrent publishes may leave the pointer one behind
+        if version and os.path.isdir(os.path.join(versions_dir, version)) \
+                and not os.path.exists(os.path.join(
+                    versions_dir, format_version(number(version) + 1))):
+            return version
+
+    return _highest(rebuild(versions_dir))
+
+
+def next_version(versions_dir):
+    """Return number of the version following the highest version
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+
+    """
+
+    highest = number(latest(versions_dir) or "")
+    return (highest or 0) + 1
+
+
+def reserve(versions_dir, attempts=1000):
+    """Create the directory of the next version and return its name
+
+    Directories are created exclusively, such that concurrent
+    publishers of the same instance each get a distinct version.
+    Whoever loses the race moves on to the next version.
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+        attempts (int, optional): Give up after this many taken versions
+
+    """
+
+    try:
+        os.makedirs(versions_dir)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    version = next_version(versions_dir)
+    for _ in range(attempts):
+        name = format_version(version)
+
+        try:
+            os.mkdir(os.path.join(versions_dir, name))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            version += 1
+        else:
+            return name
+
+    raise OSError("Could not reserve a version in %s after %d attempts"
+                  % (versions_dir, attempts))
+
+
+def register(versions_dir, version):
+    """Add `version` to the manifest of `versions_dir`
+
+    Call this once `version` has been reserved and published,
+    see :func:`reserve`.
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+        version (str): Name of version, e.g. "v002"
+
+    """
+
+    manifest = os.path.join(versions_dir, MANIFEST)
+    registered = _registered(versions_dir)
+
+    if registered is None:
+        registered = rebuild(versions_dir)
+
+    # Versions resumed may have been registered before
+    if version not in registered:
+        with open(manifest, "a") as f:
+            f.write(version + "\n")
+
+    current = _read(os.path.join(versions_dir, LATEST))
+
+    if version != current and number(version) >= number(current or version):
+        _write(os.path.join(versions_dir, LATEST), version)
+
+    # Touched last, making the manifest newer than the directory
+    os.utime(manifest, None)
+
+
+def rebuild(versions_dir):
+    """Rebuild manifest of `versions_dir` from its contents
+
+    Returns versions found, in order of their number. Versions yet
+    to be registered are left out whilst reserved or being published,
+    i.e. empty or journaled, see :mod:`journal`. The manifest is left
+    untouched when `versions_dir` isn't writable.
+
+    Arguments:
+        versions_dir (str): Absolute path to directory of versions
+
+    """
+
+    listed = _registered(versions_dir)
+    registered = set(listed or [])
+
+    try:
+        found = [entry for entry in os.listdir(versions_dir)
+                 if not entry.startswith(".") and number(entry) is not None
+                 and os.path.isdir(os.path.join(versions_dir, entry))
+                 and (entry in registered or
+                      _published(os.path.join(versions_dir, entry)))]
+    except OSError:
+        return list()
+
+    found.sort(key=number)
+
+    # Files are only replaced once changed, as replacing them modifies
+    # the directory, which would then be newer than the manifest.
+    try:
+        if found and _read(os.path.join(versions_dir, LATEST)) != found[-1]:
+            _write(os.path.join(versions_dir, LATEST), found[-1])
+        if listed != found:
+            _write(os.path.join(versions_dir, MANIFEST),
+                   "".join(version + "\n" for version in found))
+        os.utime(os.path.join(versions_dir, MANIFEST), None)
+    except (IOError, OSError):
+        pass
+
+    return found
+
+
+def _fresh(versions_dir):
+    """Return whether the manifest of `versions_dir` may be trusted
+
+    Directories modified at the same time as the manifest may have been
+    modified after it, by filesystems storing times in whole seconds.
+
+    """
+
+    try:
+        manifest = os.stat(os.path.join(versions_dir, MANIFEST))
+        directory = os.stat(versions_dir)
+    except OSError:
+        return False
+
+    return manifest.st_mtime > directory.st_mtime
+
+
+def _registered(versions_dir):
+    """Return versions listed in the manifest, or None without one"""
+    try:
+        with open(os.path.join(versions_dir, MANIFEST)) as f:
+            # A trailing line without newline is still being written
+            lines = f.read().split("\n")[:-1]
+    except IOError:
+        return None
+
+    return [line for line in lines if line]
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except IOError:
+        return None
+
+
+def _published(version_dir):
+    """Return whether `version_dir` has files and no journal"""
+    from . import journal  # Imports this module
+
+    try:
+        if not os.listdir(version_dir):
+            return False  # Reserved, see :func:`reserve`
+    except OSError:
+        return False
+
+    return not journal.incomplete(version_dir)
+
+
+def _highest(versions):
+    return max(versions, key=number) if versions else None
+
+
+def _write(path, contents):
+    """Replace contents of `path` atomically"""
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(path),
+                                prefix=os.path.basename(path) + "-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(contents)
+
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)  # Windows won't rename over existing files
+        os.rename(temp, path)
+
+    except Exception:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise